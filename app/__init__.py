@@ -0,0 +1,4 @@
+from dotenv import load_dotenv
+
+# Carregado uma única vez, antes de qualquer módulo ler a configuração com `os.getenv`
+load_dotenv()
@@ -0,0 +1,153 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from .auth import get_current_user
+from .contracts import get_db
+from .models import Contract, ContractPartyTotal, ContractTotal
+from .schemas import Aggregates
+
+router = APIRouter()
+
+
+# Papéis das partes totalizadas em `contract_party_totals`
+PARTY_ROLES = ("contratante", "contratado")
+
+MAX_PARTIES = 100
+
+
+def party_statements(role: str, sign: str, row: str) -> str:
+    if sign == "+":
+        return (
+            "INSERT INTO contract_party_totals (role, party, moeda, contracts, valor_centavos) "
+            f"SELECT DISTINCT '{role}', value, {row}.moeda, 1, {row}.valor_centavos FROM json_each({row}.{role}) "
+            f"WHERE {row}.valor_centavos IS NOT NULL "
+            "ON CONFLICT (role, party, moeda) DO UPDATE SET "
+            "contracts = contracts + 1, valor_centavos = valor_centavos + excluded.valor_centavos; "
+        )
+    return (
+        "UPDATE contract_party_totals SET contracts = contracts - 1, "
+        f"valor_centavos = valor_centavos - {row}.valor_centavos "
+        f"WHERE {row}.valor_centavos IS NOT NULL AND role = '{role}' AND moeda = {row}.moeda "
+        f"AND party IN (SELECT value FROM json_each({row}.{role})); "
+    )
+
+
+def total_statements(sign: str, row: str) -> str:
+    """
+    Instruções que somam (`sign="+"`) ou subtraem (`"-"`) o contrato `row`
+    ("new" ou "old" no gatilho) dos totais por moeda e por parte.
+    """
+    if sign == "+":
+        statements = (
+            "INSERT INTO contract_totals (moeda, contracts, valor_centavos) "
+            f"SELECT {row}.moeda, 1, {row}.valor_centavos WHERE {row}.valor_centavos IS NOT NULL "
+            "ON CONFLICT (moeda) DO UPDATE SET "
+            "contracts = contracts + 1, valor_centavos = valor_centavos + excluded.valor_centavos; "
+        )
+    else:
+        statements = (
+            "UPDATE contract_totals SET contracts = contracts - 1, "
+            f"valor_centavos = valor_centavos - {row}.valor_centavos "
+            f"WHERE {row}.valor_centavos IS NOT NULL AND moeda = {row}.moeda; "
+        )
+    statements += "".join(party_statements(role, sign, row) for role in PARTY_ROLES)
+    if sign == "-":
+        statements += (
+            "DELETE FROM contract_totals WHERE contracts <= 0; "
+            "DELETE FROM contract_party_totals WHERE contracts <= 0; "
+        )
+    return statements
+
+
+def create_totals_triggers(connection: Connection):
+    """
+    Cria os gatilhos que mantêm `contract_totals` e `contract_party_totals` a
+    cada inserção, atualização ou exclusão em `contracts`, sem recalcular a tabela
+    inteira. Somente no SQLite, como o índice de busca textual.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    watched = ", ".join(("valor_centavos", "moeda", *PARTY_ROLES))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS contracts_totals_insert AFTER INSERT ON contracts BEGIN "
+        f"{total_statements('+', 'new')}END"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS contracts_totals_delete AFTER DELETE ON contracts BEGIN "
+        f"{total_statements('-', 'old')}END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS contracts_totals_update AFTER UPDATE OF {watched} ON contracts BEGIN "
+        f"{total_statements('-', 'old')}{total_statements('+', 'new')}END"
+    ))
+
+
+def rebuild_totals(connection: Connection):
+    """
+    Recalcula os totais a partir de `contracts` (usado pela migração que os cria).
+    """
+    connection.execute(text("DELETE FROM contract_totals"))
+    connection.execute(text("DELETE FROM contract_party_totals"))
+    connection.execute(text(
+        "INSERT INTO contract_totals (moeda, contracts, valor_centavos) "
+        "SELECT moeda, count(*), sum(valor_centavos) FROM contracts "
+        "WHERE valor_centavos IS NOT NULL GROUP BY moeda"
+    ))
+    for role in PARTY_ROLES:
+        connection.execute(text(
+            "INSERT INTO contract_party_totals (role, party, moeda, contracts, valor_centavos) "
+            f"SELECT '{role}', party, moeda, count(*), sum(valor_centavos) FROM ("
+            f"SELECT DISTINCT contracts.id, json_each.value AS party, moeda, valor_centavos "
+            f"FROM contracts, json_each(contracts.{role}) WHERE valor_centavos IS NOT NULL"
+            ") GROUP BY party, moeda"
+        ))
+
+
+@event.listens_for(Contract.__table__, "after_create")
+def _create_totals_triggers(target, connection, **kw):
+    create_totals_triggers(connection)
+
+
+@router.get(
+    "/contracts/aggregates",
+    response_model=Aggregates,
+    tags=["contracts"],
+    summary="Totais da carteira de contratos",
+    description="""
+Quantidade e valor total (em centavos) dos contratos por moeda e, para o papel
+escolhido, os maiores totais por parte. Com `party`, apenas os totais dessa parte
+(nome exato, como extraído).\n
+Os totais são mantidos a cada gravação, e a consulta não percorre os contratos.
+""",
+)
+def get_aggregates(
+    role: str = Query("contratante", pattern="^(contratante|contratado)$"),
+    moeda: str = Query("BRL", min_length=3, max_length=3),
+    party: str | None = Query(None, description="Nome da parte."),
+    limit: int = Query(20, ge=1, le=MAX_PARTIES),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="Totais disponíveis apenas com SQLite.")
+
+    parties = select(ContractPartyTotal).where(
+        ContractPartyTotal.role == role, ContractPartyTotal.moeda == moeda.upper()
+    )
+    if party is not None:
+        parties = parties.where(ContractPartyTotal.party == party)
+
+    return {
+        "totals": db.scalars(select(ContractTotal).order_by(ContractTotal.moeda)).all(),
+        # `valor_centavos IS NULL` é resolvido pelo índice (moeda, valor_centavos)
+        "unvalued": db.scalar(
+            select(func.count()).select_from(Contract).where(
+                Contract.moeda.is_(None), Contract.valor_centavos.is_(None)
+            )
+        ),
+        "parties": db.scalars(
+            parties.order_by(ContractPartyTotal.valor_centavos.desc()).limit(limit)
+        ).all(),
+    }
@@ -1,12 +1,14 @@
-from dotenv import load_dotenv
 import os
-import json
-from google import genai
-from google.genai import types
-from pydantic import BaseModel
-from pprint import pprint
+from pydantic import BaseModel, create_model
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .chunking import LONG_DOCUMENT_TOKENS, estimate_tokens, merge_answers, split_into_chunks
+from .llm_backends import get_backend
+from .json_stream import ObjectFieldParser
+from .clauses import ClauseIndex
+import logging
+
+logger = logging.getLogger(__name__)
 
-load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 
@@ -30,16 +32,7 @@ class ModelAnswer(BaseModel):
     clausula_rescisao: str
 
 
-def extract_contract_info(contract_content: str) -> dict:
-    client = genai.Client()
-
-    response = client.models.generate_content(
-        model="gemini-2.5-flash-lite",
-        contents=contract_content,
-        config={
-            "response_mime_type": "application/json",
-            "response_schema": list[ModelAnswer],
-            "system_instruction": """
+SYSTEM_INSTRUCTION = """
             Você está recebendo um contrato.
             Sua tarefa é identificar dados importantes neste documento.
             São considerados dados importantes:
@@ -51,21 +44,209 @@ def extract_contract_info(contract_content: str) -> dict:
             7. A descrição do objeto do contrato;
             8. A vigência do contrato;
             9. A descrição da(s) cláusula(s) de rescisão;
-            """,
-        },
-    )
+            """
+
+# Complemento da instrução quando o modelo recebe apenas um trecho do contrato
+CHUNK_INSTRUCTION = """
+            Este é apenas um trecho de um contrato maior.
+            Extraia somente as informações presentes neste trecho e
+            deixe vazios os campos que não aparecem nele.
+            """
+
+# Chamadas simultâneas ao modelo na análise de um único contrato longo
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "4"))
+
+# "full": o modelo lê o contrato inteiro em uma chamada.
+# "targeted": cada grupo de campos recebe apenas as cláusulas relevantes, em chamadas paralelas
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "full")
+# Acima desta fração do texto, as cláusulas de um grupo não compensam uma chamada própria
+# e o grupo é extraído do texto completo
+TARGETED_MAX_RATIO = float(os.getenv("TARGETED_MAX_RATIO", "0.5"))
+
+TARGETED_INSTRUCTION = """
+            Você está recebendo cláusulas selecionadas de um contrato.
+            Sua tarefa é identificar nelas apenas os seguintes dados:
+{fields}
+            Deixe vazios os campos que não aparecem nestas cláusulas.
+            """
+
+FIELD_DESCRIPTIONS = {
+    "contratante": "Nome da parte contratante",
+    "contratado": "Nome da parte contratada",
+    "valor_bens": "Valor dos bens",
+    "obrigacoes_contratante": "As obrigações que devem ser cumpridas pela parte contratante",
+    "obrigacoes_contratada": "As obrigações que devem ser cumpridas pela parte contratada",
+    "objeto": "A descrição do objeto do contrato",
+    "vigencia": "A vigência do contrato",
+    "clausula_rescisao": "A descrição da(s) cláusula(s) de rescisão",
+}
+
+
+class FieldGroup:
+    """
+    Campos extraídos juntos no modo "targeted" e os prefixos (sem acentos) das
+    palavras que identificam as cláusulas relevantes para eles.
+    """
 
-    response = response.model_dump().get("parsed")[0]  # -> dict
+    def __init__(self, name: str, fields: tuple[str, ...], prefixes: tuple[str, ...], preamble: bool = False):
+        self.name = name
+        self.fields = fields
+        self.prefixes = prefixes
+        # Inclui a qualificação das partes, antes da primeira cláusula
+        self.preamble = preamble
+        self.schema = create_model(
+            f"{name.capitalize()}Answer",
+            **{field: (ModelAnswer.model_fields[field].annotation, ...) for field in fields},
+        )
+        self.instruction = TARGETED_INSTRUCTION.format(
+            fields="\n".join(f"            - {FIELD_DESCRIPTIONS[field]};" for field in fields)
+        )
 
-    for field in [
-        "contratante",
-        "contratado",
-        "objeto",
-        "obrigacoes_contratante",
-        "obrigacoes_contratada",
-    ]:
-        response[field] = json.dumps(response[field])
 
-    pprint(response)
+FIELD_GROUPS = (
+    FieldGroup("partes", ("contratante", "contratado"), ("PARTES", "QUALIFICA"), preamble=True),
+    FieldGroup("objeto", ("objeto",), ("OBJETO", "ESCOPO", "FINALIDADE")),
+    FieldGroup("valor", ("valor_bens",), ("VALOR", "PRECO", "PAGAMENTO", "REMUNERA", "ALUGUE", "HONORARIO")),
+    FieldGroup("vigencia", ("vigencia",), ("VIGENCIA", "PRAZO", "DURACAO")),
+    FieldGroup(
+        "obrigacoes",
+        ("obrigacoes_contratante", "obrigacoes_contratada"),
+        ("OBRIGA", "RESPONSAB", "DEVERES", "ENCARGO", "COMPETE", "CABERA"),
+    ),
+    FieldGroup("rescisao", ("clausula_rescisao",), ("RESCIS", "RESCIN", "RESILI", "DISTRATO", "EXTINC", "DENUNCIA")),
+)
+
+
+def generate_answer(contract_content: str, system_instruction: str = SYSTEM_INSTRUCTION) -> dict:
+    return get_backend().generate_answer(contract_content, system_instruction, ModelAnswer)
+
+
+def extract_contract_info(contract_content: str) -> dict:
+    if EXTRACTION_MODE == "targeted":
+        return extract_targeted_contract_info(contract_content)
+    return extract_full_contract_info(contract_content)
+
+
+def extract_full_contract_info(contract_content: str) -> dict:
+    if estimate_tokens(contract_content) > LONG_DOCUMENT_TOKENS:
+        response = extract_long_contract_info(contract_content)
+    else:
+        response = generate_answer(contract_content)
 
     return response
+
+
+def stream_contract_info(contract_content: str, on_field) -> dict:
+    """
+    Versão de `extract_contract_info` que chama `on_field(campo, valor)` para cada
+    campo assim que o modelo termina de gerá-lo, e retorna a resposta completa.
+
+    Contratos longos são analisados por trechos (`extract_long_contract_info`),
+    e os campos só são conhecidos depois da combinação das respostas. No modo
+    "targeted", os campos de cada grupo são enviados quando a chamada do grupo termina.
+    """
+    if EXTRACTION_MODE == "targeted":
+        return extract_targeted_contract_info(contract_content, on_field)
+
+    if estimate_tokens(contract_content) > LONG_DOCUMENT_TOKENS:
+        response = extract_long_contract_info(contract_content)
+        for field, value in response.items():
+            on_field(field, value)
+        return response
+
+    parser = ObjectFieldParser()
+    fields = {}
+    for text in get_backend().stream_answer(contract_content, SYSTEM_INSTRUCTION, ModelAnswer):
+        for field, value in parser.feed(text):
+            if field in ModelAnswer.model_fields:
+                fields[field] = value
+                on_field(field, value)
+
+    # Garante o mesmo formato de `extract_contract_info` (falha se faltar algum campo)
+    return ModelAnswer.model_validate(fields).model_dump()
+
+
+def extract_long_contract_info(contract_content: str) -> dict:
+    """
+    Análise de contratos longos (map-reduce): cada trecho é enviado ao modelo
+    em paralelo e as respostas parciais são combinadas por `merge_answers`.
+    A latência fica limitada pelo trecho mais lento, e não pelo documento inteiro.
+    """
+    chunks = split_into_chunks(contract_content)
+    if len(chunks) == 1:
+        return generate_answer(chunks[0])
+
+    with ThreadPoolExecutor(max_workers=max(1, min(CHUNK_CONCURRENCY, len(chunks)))) as executor:
+        answers = list(
+            executor.map(
+                lambda chunk: generate_answer(chunk, SYSTEM_INSTRUCTION + CHUNK_INSTRUCTION),
+                chunks,
+            )
+        )
+
+    return merge_answers(answers)
+
+
+def select_clauses(index: ClauseIndex, group: FieldGroup, text_size: int) -> str | None:
+    """
+    Texto enviado ao modelo para um grupo de campos: as cláusulas cujo título
+    corresponde ao grupo ou, sem nenhuma, as que mencionam suas palavras-chave.
+    Retorna `None` quando o grupo deve ser extraído do texto completo.
+    """
+    clauses = index.find(group.prefixes)
+    # A qualificação das partes já basta para o grupo que a inclui
+    if not clauses and not (group.preamble and index.preamble):
+        clauses = index.find(group.prefixes, in_text=True)
+    parts = ([index.preamble] if group.preamble and index.preamble else []) + [c.text for c in clauses]
+    selected = "\n".join(parts)
+    if not selected or len(selected) > TARGETED_MAX_RATIO * text_size:
+        return None
+    return selected
+
+
+def extract_targeted_contract_info(contract_content: str, on_field=None) -> dict:
+    """
+    Extração por grupos de campos: cada grupo recebe apenas as cláusulas
+    relevantes (`ClauseIndex`), em chamadas paralelas e bem menores que o contrato.
+
+    Os grupos sem cláusulas correspondentes são extraídos juntos, em uma única
+    chamada com o texto completo (`extract_full_contract_info`).
+    """
+    index = ClauseIndex(contract_content)
+    targeted, fallback = [], []
+    for group in FIELD_GROUPS:
+        selected = select_clauses(index, group, len(contract_content))
+        if selected is None:
+            fallback.append(group)
+        else:
+            targeted.append((group, selected))
+
+    logger.info(
+        "Extração por cláusulas: %d grupos, ~%d tokens enviados (texto completo: ~%d); %s pelo texto completo",
+        len(targeted), sum(estimate_tokens(selected) for _, selected in targeted),
+        estimate_tokens(contract_content), ", ".join(group.name for group in fallback) or "nenhum",
+    )
+
+    def run(task):
+        if task is None:
+            answer = extract_full_contract_info(contract_content)
+            fields = [field for group in fallback for field in group.fields]
+        else:
+            group, selected = task
+            answer = get_backend().generate_answer(selected, group.instruction, group.schema)
+            fields = group.fields
+        return {field: answer.get(field) for field in fields}
+
+    tasks = targeted + ([None] if fallback else [])
+    response = {}
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        # Na ordem em que as chamadas terminam, para que `on_field` receba cada grupo assim que pronto
+        for future in as_completed([executor.submit(run, task) for task in tasks]):
+            answer = future.result()
+            response.update(answer)
+            if on_field is not None:
+                for field, value in answer.items():
+                    on_field(field, value)
+
+    # Mesmo formato (e ordem dos campos) de `extract_full_contract_info`
+    return ModelAnswer.model_validate(response).model_dump()
@@ -0,0 +1,174 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from .response_cache import etag_matches
+import brotli
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+router = APIRouter()
+
+
+STATIC_DIR = os.getenv("STATIC_DIR", "static")
+# Arquivos menores que isto são servidos sem compressão
+ASSET_MIN_COMPRESS_SIZE = int(os.getenv("ASSET_MIN_COMPRESS_SIZE", "256"))
+
+# URLs com o hash do conteúdo nunca mudam de conteúdo: o navegador e o proxy podem
+# guardá-las indefinidamente. As demais (index.html e nomes sem hash) são revalidadas
+# a cada uso, com resposta 304 enquanto o ETag não mudar.
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Codificações em ordem de preferência, quando o cliente aceita mais de uma
+ENCODINGS = ("br", "gzip")
+# Referências a arquivos estáticos dentro do HTML ("/static/app.js")
+STATIC_REFERENCE = re.compile(r"/static/([\w./-]+)")
+
+
+def accepted_encodings(accept_encoding: str | None) -> set[str]:
+    """
+    Codificações aceitas pelo cliente no cabeçalho `Accept-Encoding` (as com `q=0` são recusadas).
+    """
+    accepted = set()
+    for coding in (accept_encoding or "").split(","):
+        name, *params = coding.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    if "*" in accepted:
+        accepted.update(ENCODINGS)
+    return accepted
+
+
+class Asset:
+    """
+    Conteúdo de um arquivo estático, com as versões pré-comprimidas em gzip e
+    brotli (apenas as que ficam menores que o original).
+    """
+
+    def __init__(self, content: bytes, media_type: str):
+        self.media_type = media_type
+        self.digest = hashlib.sha256(content).hexdigest()[:16]
+        self.contents = {"identity": content}
+        if len(content) >= ASSET_MIN_COMPRESS_SIZE:
+            compressed = {
+                "br": brotli.compress(content, quality=11),
+                # mtime=0: a mesma entrada gera sempre os mesmos bytes
+                "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+            }
+            self.contents.update({e: data for e, data in compressed.items() if len(data) < len(content)})
+
+    def negotiate(self, accept_encoding: str | None) -> str:
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in accepted and encoding in self.contents:
+                return encoding
+        return "identity"
+
+    def etag(self, encoding: str) -> str:
+        # Cada codificação é uma representação diferente e tem o seu próprio ETag
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+
+def hashed_name(name: str, digest: str) -> str:
+    # "js/app.js" -> "js/app.3f2a9c1b0d4e5f67.js"
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{digest}{extension}"
+
+
+class AssetStore:
+    """
+    Arquivos de `STATIC_DIR` carregados e comprimidos uma única vez (na
+    inicialização ou no primeiro acesso), servidos da memória.
+
+    Cada arquivo fica disponível pelo nome original e por um nome com o hash do
+    conteúdo. Nos arquivos HTML, as referências a "/static/<nome>" são trocadas
+    pelo nome com hash, então uma nova versão de um arquivo muda a URL usada pela página.
+    """
+
+    def __init__(self, directory: str = STATIC_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._assets = None
+
+    def build(self):
+        with self._lock:
+            if self._assets is not None:
+                return
+            files = {}
+            for root, _, filenames in os.walk(self.directory):
+                for filename in filenames:
+                    path = os.path.join(root, filename)
+                    with open(path, "rb") as f:
+                        files[os.path.relpath(path, self.directory).replace(os.sep, "/")] = f.read()
+
+            assets, urls = {}, {}
+            # HTML por último, depois de conhecidos os nomes com hash dos demais arquivos
+            for name in sorted(files, key=lambda name: name.endswith(".html")):
+                content = files[name]
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if media_type == "text/html":
+                    content = STATIC_REFERENCE.sub(
+                        lambda match: urls.get(match.group(1), match.group(0)), content.decode("utf-8")
+                    ).encode("utf-8")
+                if media_type.startswith("text/") or media_type in ("application/javascript", "image/svg+xml"):
+                    media_type += "; charset=utf-8"
+                asset = Asset(content, media_type)
+                assets[name] = (asset, False)
+                assets[hashed_name(name, asset.digest)] = (asset, True)
+                urls[name] = f"/static/{hashed_name(name, asset.digest)}"
+            self._assets = assets
+
+    def get(self, name: str) -> tuple[Asset, bool] | None:
+        """
+        Retorna o arquivo e se o nome usado tem o hash do conteúdo (pode ser armazenado como imutável).
+        """
+        if self._assets is None:
+            self.build()
+        return self._assets.get(name)
+
+
+static_assets = AssetStore()
+
+
+def asset_response(request: Request, asset: Asset, immutable: bool) -> Response:
+    encoding = asset.negotiate(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": asset.etag(encoding),
+        "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+        "Vary": "Accept-Encoding",
+    }
+
+    # O cliente (ou o proxy) já tem esta versão
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(asset.contents[encoding], media_type=asset.media_type, headers=headers)
+
+
+# This route serves your index.html file as the main page
+@router.api_route("/", methods=["GET", "HEAD"], include_in_schema=False)
+def read_index(request: Request):
+    asset, _ = static_assets.get("index.html")
+    return asset_response(request, asset, immutable=False)
+
+
+# Arquivos do diretório 'static', pelo nome original ou com o hash do conteúdo
+@router.api_route("/static/{name:path}", methods=["GET", "HEAD"], include_in_schema=False)
+def read_static(name: str, request: Request):
+    found = static_assets.get(name)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    return asset_response(request, *found)
@@ -0,0 +1,221 @@
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
+from .auth import get_current_user
+from .models import Contract
+from .schemas import BatchResult, BatchItemResult
+from .ai_service import extract_contract_info
+from .cache import extraction_cache, file_key, hash_text
+from .contracts import EMPTY_TEXT_DETAIL, admit_analysis, get_db
+from .chunking import estimate_tokens
+from .parsing import PARSE_WORKERS, parse
+from .scheduler import BULK, llm_scheduler
+from .uploads import SpooledUpload, spool_stream
+from .text_store import save_texts
+import os
+import zipfile
+
+router = APIRouter()
+
+# Documentos de um lote extraídos ao mesmo tempo no pool de extração (`parsing.parse`),
+# dividido com os demais envios
+BATCH_PARSE_WORKERS = int(os.getenv("BATCH_PARSE_WORKERS", str(max(1, PARSE_WORKERS))))
+# Chamadas simultâneas ao modelo durante o processamento de um lote
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+# Quantidade máxima de documentos aceitos em um único lote
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "1000"))
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
+
+def collect_documents(files: list[UploadFile]) -> list[tuple[str, SpooledUpload | str]]:
+    """
+    Copia os arquivos enviados para disco, expandindo arquivos .zip em seus documentos.
+
+    Cada item é `(nome, documento)` ou `(nome, mensagem de erro)` quando o
+    documento não pode ser aceito, sem interromper o restante do lote.
+    """
+    documents = []
+    try:
+        for file in files:
+            if file.filename.endswith(".zip"):
+                try:
+                    with zipfile.ZipFile(file.file) as archive:
+                        for entry in archive.infolist():
+                            name = os.path.basename(entry.filename)
+                            # Ignora diretórios e metadados do macOS (__MACOSX/._arquivo.pdf)
+                            if entry.is_dir() or name.startswith("."):
+                                continue
+                            with archive.open(entry) as stream:
+                                documents.append((name, spool_document(name, stream)))
+                except zipfile.BadZipFile as e:
+                    raise HTTPException(
+                        status_code=400, detail=f"Arquivo ZIP inválido ({file.filename}): {e}"
+                    )
+            else:
+                documents.append((file.filename, spool_document(file.filename, file.file)))
+
+            if len(documents) > BATCH_MAX_FILES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"O lote excede o limite de {BATCH_MAX_FILES} documentos.",
+                )
+    except BaseException:
+        close_documents(documents)
+        raise
+    return documents
+
+
+def spool_document(filename: str, stream) -> SpooledUpload | str:
+    if not filename.endswith(SUPPORTED_EXTENSIONS):
+        return "Formato de arquivo inválido. Somente arquivos .pdf e .docx são aceitos."
+    try:
+        return spool_stream(filename, stream)
+    except HTTPException as e:
+        return e.detail
+
+
+def close_documents(documents: list[tuple[str, SpooledUpload | str]]):
+    for _, document in documents:
+        if isinstance(document, SpooledUpload):
+            document.close()
+
+
+def parse_document_or_error(filename: str, path: str) -> str | Exception:
+    try:
+        return parse(filename, path)
+    except Exception as e:
+        return e
+
+
+def parse_documents(documents: list[tuple[str, str]]) -> list[str | Exception]:
+    """
+    Extrai o texto de vários documentos `(nome, caminho)` em paralelo pelo pool
+    de extração compartilhado com os envios individuais (`parsing.parse`), com o
+    mesmo limite de tempo por documento. Apenas os caminhos são enviados aos
+    processos, não o conteúdo dos arquivos.
+    """
+    workers = max(1, min(BATCH_PARSE_WORKERS, len(documents)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-parse") as executor:
+        return list(executor.map(lambda document: parse_document_or_error(*document), documents))
+
+
+@router.post(
+    "/contracts/upload/batch",
+    response_model=BatchResult,
+    tags=["contracts"],
+    summary="Envio de contratos em lote",
+    description="""
+Aceita vários documentos *.pdf e *.docx, ou arquivos *.zip contendo esses documentos.\n
+A extração de texto é feita em paralelo no pool de processos de extração, com o limite de tempo
+`PARSE_TIMEOUT_SECONDS` por documento, e as chamadas à Gemini respeitam o limite de concorrência `BATCH_LLM_CONCURRENCY`.\n
+Todos os contratos analisados são gravados em uma única transação.
+Retorna o resultado individual de cada documento, sem interromper o lote em caso de falha.
+""",
+)
+def upload_batch(
+    files: list[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    with admit_analysis(user, BULK):
+        documents = collect_documents(files)
+        try:
+            return process_documents(documents, db, user)
+        finally:
+            close_documents(documents)
+
+
+def scheduled_extraction(text: str, user) -> dict:
+    # Lotes aguardam atrás das análises interativas e dividem a vez com os lotes de outros usuários
+    with llm_scheduler.slot(user, BULK, cost=estimate_tokens(text)):
+        return extract_contract_info(text)
+
+
+def process_documents(documents: list[tuple[str, SpooledUpload | str]], db: Session, user=None) -> BatchResult:
+    results = [BatchItemResult(filename=filename, status="ok") for filename, _ in documents]
+    infos: list[dict | None] = [None] * len(documents)
+    new_keys: dict[int, list[str]] = {}
+
+    # 1. Documentos já analisados são recuperados pelo hash dos bytes
+    to_parse = []
+    for i, (_, document) in enumerate(documents):
+        if isinstance(document, str):
+            results[i].status = "error"
+            results[i].error = document
+            continue
+        key = file_key(document.sha256)
+        infos[i] = extraction_cache.get(db, key)
+        if infos[i] is None:
+            new_keys[i] = [key]
+            to_parse.append(i)
+
+    # 2. Extração de texto em paralelo
+    texts = parse_documents([(documents[i][0], documents[i][1].path) for i in to_parse])
+
+    # 3. Uma chamada ao modelo por texto distinto, com concorrência limitada
+    pending: dict[str, tuple[str, list[int]]] = {}
+    extracted: dict[int, tuple[str, str]] = {}
+    for i, text in zip(to_parse, texts):
+        if isinstance(text, Exception):
+            results[i].status = "error"
+            results[i].error = f"Erro ao processar o arquivo: {text}"
+            continue
+        if not text.strip():
+            results[i].status = "error"
+            results[i].error = EMPTY_TEXT_DETAIL
+            continue
+        text_key = hash_text(text)
+        new_keys[i].append(text_key)
+        extracted[i] = (text_key, text)
+        info = extraction_cache.get(db, text_key)
+        if info is not None:
+            infos[i] = info
+        else:
+            pending.setdefault(text_key, (text, []))[1].append(i)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, BATCH_LLM_CONCURRENCY)) as executor:
+            futures = {
+                text_key: executor.submit(
+                    extraction_cache.compute_once, text_key,
+                    lambda text=text: scheduled_extraction(text, user),
+                )
+                for text_key, (text, _) in pending.items()
+            }
+            for text_key, future in futures.items():
+                indexes = pending[text_key][1]
+                try:
+                    info = future.result()
+                except Exception as e:
+                    for i in indexes:
+                        results[i].status = "error"
+                        results[i].error = f"Erro durante a análise do contrato: {e}"
+                    continue
+                for i in indexes:
+                    infos[i] = info
+
+    # 4. Gravação em lote: uma transação para os textos extraídos, outra para o
+    #    cache e outra para os contratos
+    save_texts(db, {text_key: text for i, (text_key, text) in extracted.items() if infos[i] is not None})
+    for i, (text_key, _) in extracted.items():
+        if infos[i] is not None:
+            infos[i] = {**infos[i], "text_hash": text_key}
+
+    extraction_cache.set_many(
+        db, [(new_keys[i], infos[i]) for i in new_keys if infos[i] is not None]
+    )
+
+    contracts = {
+        i: Contract(filename=documents[i][0], **info)
+        for i, info in enumerate(infos)
+        if info is not None
+    }
+    db.add_all(contracts.values())
+    db.flush()
+    for i, contract in contracts.items():
+        results[i].contract_id = contract.id
+    db.commit()
+
+    failed = sum(1 for r in results if r.status == "error")
+    return BatchResult(succeeded=len(results) - failed, failed=failed, results=results)
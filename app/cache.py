@@ -0,0 +1,179 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .models import ExtractionCacheEntry
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+
+
+# Quantidade máxima de extrações mantidas em memória por processo.
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "256"))
+# Desativa as duas camadas do cache quando "false" (ex.: benchmarks do pipeline completo)
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() != "false"
+
+
+def file_key(sha256: str) -> str:
+    return "file:" + sha256
+
+
+def hash_bytes(data: bytes) -> str:
+    return file_key(hashlib.sha256(data).hexdigest())
+
+
+def normalize_text(text: str) -> str:
+    # Diferenças de espaçamento e de composição Unicode não alteram o conteúdo
+    # do contrato, então não devem gerar uma nova chamada ao modelo
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def hash_text(text: str) -> str:
+    return "text:" + hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def revision_key(key: str, previous_id: int) -> str:
+    # A análise de uma nova versão parte dos dados da anterior: o mesmo documento
+    # enviado de forma independente (ou como revisão de outro contrato) tem outra resposta
+    return f"{key}@{previous_id}"
+
+
+class LRUCache:
+    """
+    Cache em memória com descarte do item menos recentemente utilizado.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ExtractionCache:
+    """
+    Cache das respostas do modelo, endereçado pelo conteúdo do contrato.
+
+    Possui duas camadas:
+    1. LRU em memória, limitada a `maxsize` entradas;
+    2. Tabela `extraction_cache` no banco de dados, compartilhada entre workers
+       e preservada entre reinicializações.
+
+    Chamadas simultâneas para a mesma chave compartilham uma única execução
+    (apenas a primeira requisição consulta o modelo; as demais aguardam o resultado).
+    """
+
+    def __init__(self, maxsize: int = EXTRACTION_CACHE_SIZE):
+        self._memory = LRUCache(maxsize)
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, key: str) -> dict | None:
+        if not EXTRACTION_CACHE_ENABLED:
+            return None
+
+        value = self._memory.get(key)
+        if value is not None:
+            return dict(value)
+
+        entry = db.get(ExtractionCacheEntry, key)
+        if entry is None:
+            return None
+
+        value = json.loads(entry.result)
+        self._memory.set(key, value)
+        return dict(value)
+
+    def set(self, db: Session, keys, value: dict):
+        self.set_many(db, [(keys, value)])
+
+    def set_many(self, db: Session, items):
+        """
+        Grava vários pares `(chaves, valor)` em uma única transação.
+        """
+        if not EXTRACTION_CACHE_ENABLED:
+            return
+        for keys, value in items:
+            value = dict(value)
+            payload = json.dumps(value)
+            for key in keys:
+                self._memory.set(key, value)
+                if db.get(ExtractionCacheEntry, key) is None:
+                    db.add(ExtractionCacheEntry(key=key, result=payload))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Outro worker gravou a mesma chave ao mesmo tempo; o conteúdo é equivalente
+            db.rollback()
+
+    def get_or_compute(self, db: Session, key: str, compute) -> dict:
+        value = self.get(db, key)
+        if value is not None:
+            return value
+
+        value = self.compute_once(key, compute)
+        self.set(db, (key,), value)
+        return value
+
+    def compute_once(self, key: str, compute) -> dict:
+        """
+        Executa `compute()` garantindo uma única execução simultânea por chave.
+        Não acessa o banco de dados, podendo ser chamado de qualquer thread.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            return dict(future.result())
+
+        try:
+            value = compute()
+            future.set_result(value)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        return dict(value)
+
+    def clear(self):
+        self._memory.clear()
+
+
+extraction_cache = ExtractionCache()
@@ -0,0 +1,108 @@
+import os
+import re
+
+
+# Estimativa de caracteres por token para textos em português.
+# Evita uma chamada extra à API apenas para contar tokens.
+CHARS_PER_TOKEN = 4
+# Tamanho máximo, em tokens estimados, de cada trecho enviado ao modelo
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "8000"))
+# Contratos acima deste tamanho são processados em trechos paralelos
+LONG_DOCUMENT_TOKENS = int(os.getenv("LONG_DOCUMENT_TOKENS", "16000"))
+
+LIST_FIELDS = (
+    "contratante",
+    "contratado",
+    "objeto",
+    "obrigacoes_contratante",
+    "obrigacoes_contratada",
+)
+TEXT_FIELDS = ("valor_bens", "vigencia", "clausula_rescisao")
+
+# Respostas que o modelo costuma dar quando o trecho não contém a informação
+EMPTY_ANSWERS = {"", "n/a", "na", "-", "não informado", "nao informado", "não especificado", "não consta"}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_into_chunks(text: str, budget: int | None = None) -> list[str]:
+    """
+    Divide o texto em trechos de até `budget` tokens estimados.
+
+    Os cortes respeitam as quebras de página (\\f) e de parágrafo (\\n) produzidas
+    por `extract_text_from_file`; um parágrafo só é dividido quando sozinho
+    excede o orçamento.
+    """
+    budget = budget or CHUNK_TOKEN_BUDGET
+    max_chars = budget * CHARS_PER_TOKEN
+
+    paragraphs = []
+    for paragraph in re.split(r"[\f\n]", text):
+        paragraph = paragraph.strip()
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            paragraphs.append(paragraph[:cut])
+            paragraph = paragraph[cut:].strip()
+        if paragraph:
+            paragraphs.append(paragraph)
+
+    chunks, current, size = [], [], 0
+    for paragraph in paragraphs:
+        if current and size + len(paragraph) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _normalize(value: str) -> str:
+    return re.sub(r"\s+", " ", value).strip().casefold()
+
+
+def is_empty_answer(value: str) -> bool:
+    return _normalize(value).strip(".") in EMPTY_ANSWERS
+
+
+def _score(field: str, value: str) -> tuple:
+    # Valores e prazos com números ("R$ 1.500,00", "12 meses") são mais úteis
+    # do que menções genéricas ("conforme cláusula quinta")
+    has_digits = bool(re.search(r"\d", value)) if field != "clausula_rescisao" else True
+    return (has_digits, len(_normalize(value)))
+
+
+def merge_answers(answers: list[dict]) -> dict:
+    """
+    Combina as respostas parciais de cada trecho em uma única resposta.
+
+    - Campos de lista: união na ordem em que aparecem, sem repetições
+      (comparação sem diferenciar maiúsculas e espaços);
+    - Campos de texto: o melhor candidato não vazio; em caso de empate,
+      prevalece o trecho que aparece primeiro no contrato.
+    """
+    merged = {}
+    for field in LIST_FIELDS:
+        seen, values = set(), []
+        for answer in answers:
+            for value in answer.get(field) or []:
+                key = _normalize(value)
+                if key and key not in seen:
+                    seen.add(key)
+                    values.append(value.strip())
+        merged[field] = values
+
+    for field in TEXT_FIELDS:
+        candidates = [
+            answer[field].strip()
+            for answer in answers
+            if answer.get(field) and not is_empty_answer(answer[field])
+        ]
+        # max() devolve o primeiro entre os empatados, mantendo o resultado determinístico
+        merged[field] = max(candidates, key=lambda v: _score(field, v), default="")
+
+    return merged
@@ -0,0 +1,98 @@
+import re
+import unicodedata
+
+
+# Início de uma cláusula ou item numerado em contratos brasileiros:
+# "CLÁUSULA PRIMEIRA", "Cláusula 2ª", "3. DO PRAZO", "4.1 O pagamento...", "§ 1º", "Parágrafo único"
+CLAUSE_HEADING = re.compile(
+    r"^(?:CL[ÁA]USULA\b|Cl[áa]usula\b|§|PAR[ÁA]GRAFO\b|Par[áa]grafo\b"
+    r"|\d+(?:\.\d+)+\.?\s+\S|\d+\s*[.)º°ª]\s*[–-]?\s*\S)"
+)
+
+
+def split_clauses(text: str) -> list[str]:
+    """
+    Divide o texto extraído em cláusulas, cada uma iniciada por um cabeçalho
+    reconhecido por `CLAUSE_HEADING` e seguida dos parágrafos até o próximo.
+
+    O texto antes da primeira cláusula (qualificação das partes) forma o primeiro
+    segmento. Documentos sem nenhum cabeçalho são divididos por parágrafo.
+    """
+    paragraphs = [line.strip() for line in re.split(r"[\f\n]", text) if line.strip()]
+
+    clauses, current = [], []
+    for paragraph in paragraphs:
+        if current and CLAUSE_HEADING.match(paragraph):
+            clauses.append("\n".join(current))
+            current = []
+        current.append(paragraph)
+    if current:
+        clauses.append("\n".join(current))
+
+    if len(clauses) <= 1:
+        return paragraphs
+    return clauses
+
+
+# Subdivisões de uma cláusula ("PARÁGRAFO ÚNICO", "§ 2º", "4.1"), que herdam o assunto dela
+SUBCLAUSE_HEADING = re.compile(r"^(?:§|PAR[ÁA]GRAFO\b|Par[áa]grafo\b|\d+(?:\.\d+)+\.?\s)")
+# Caracteres iniciais considerados como título quando a cláusula não tem uma linha própria
+# de título (ex.: "CLÁUSULA SEGUNDA: O prazo da locação é de 18 meses...")
+HEADING_CHARS = 120
+
+
+def normalize_words(text: str) -> list[str]:
+    # Sem acentos e em maiúsculas: "Rescisão" e "RESCISAO" são a mesma palavra
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().upper()
+    return re.findall(r"[A-Z]{3,}", text)
+
+
+class Clause:
+    def __init__(self, text: str, heading: str, topic: str):
+        self.text = text
+        self.heading = heading
+        # Título da cláusula principal, para parágrafos e subitens
+        self.topic = topic
+
+
+class ClauseIndex:
+    """
+    Índice das cláusulas do contrato: pelas palavras do título do assunto e
+    pelas palavras do texto de cada cláusula.
+
+    O primeiro segmento (qualificação das partes, antes da primeira cláusula)
+    fica em `preamble`. `find(["RESCIS", "DISTRATO"])` retorna, na ordem do
+    documento, as cláusulas cujo título tem uma palavra iniciada por um dos
+    prefixos, incluindo seus parágrafos; com `in_text=True`, a busca é feita
+    no texto das cláusulas.
+    """
+
+    def __init__(self, text: str):
+        self.clauses = []
+        self.preamble = None
+        self._headings = {}
+        self._keywords = {}
+
+        topic = ""
+        for position, segment in enumerate(split_clauses(text)):
+            heading = segment.split("\n", 1)[0][:HEADING_CHARS]
+            if position == 0 and not CLAUSE_HEADING.match(segment):
+                self.preamble = segment
+                continue
+            if not SUBCLAUSE_HEADING.match(segment) or not topic:
+                topic = heading
+            number = len(self.clauses)
+            self.clauses.append(Clause(segment, heading, topic))
+            for word in set(normalize_words(topic)):
+                self._headings.setdefault(word, set()).add(number)
+            for word in set(normalize_words(segment)):
+                self._keywords.setdefault(word, set()).add(number)
+
+    def find(self, prefixes, in_text: bool = False) -> list[Clause]:
+        prefixes = tuple(prefixes)
+        index = self._keywords if in_text else self._headings
+        positions = set()
+        for word, clauses in index.items():
+            if word.startswith(prefixes):
+                positions |= clauses
+        return [self.clauses[i] for i in sorted(positions)]
@@ -1,17 +1,40 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import or_, update
 from sqlalchemy.orm import Session
 from .database import SessionLocal
 from .auth import get_current_user
-from .models import Contract
-from .schemas import ContractData
+from .models import Contract, AnalysisJob
+from .schemas import ContractData, JobStatus
 from .ai_service import extract_contract_info
+from .llm_gateway import LLMGatewayError
+from .chunking import estimate_tokens
+from .cache import extraction_cache, file_key, hash_text, revision_key
+from .jobs import job_pool, JOBS_LEASE_SECONDS, JOBS_SPOOL_DIR, JOB_PENDING, JOB_RUNNING, JOB_DONE, JOB_FAILED
+from .scheduler import BULK, INTERACTIVE, Reservation, SchedulerFullError, llm_scheduler
+from .uploads import SpooledUpload, open_spooled, spool_upload
+from .parsing import ParseTimeoutError, parse
+from .writer import contract_writer
+from .metrics import PAGE_CHARS, record_error, timed
+from .response_cache import CONTRACT_CACHE_CONTROL, contract_responses, etag_matches
+from .text_store import save_texts
+from .revisions import revision_analyzer
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import logging
 import os
-from docx import Document
-import pymupdf
-import io
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+EMPTY_TEXT_DETAIL = "Nenhum texto encontrado no documento. Verifique se o arquivo não está vazio ou ilegível."
+QUEUE_FULL_DETAIL = "Fila de análise cheia. Tente novamente em instantes."
+INVALID_FORMAT_DETAIL = "Formato de arquivo inválido. Somente arquivos .pdf e .docx são aceitos."
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
 
 def get_db():
     db = SessionLocal()
@@ -21,65 +44,47 @@ def get_db():
         db.close()
 
 
-def extract_text_from_file(file: UploadFile):
+def check_file_type(filename: str):
+    """
+    Recusa extensões não suportadas antes de qualquer consulta ao cache: um arquivo
+    com os mesmos bytes de um PDF já analisado não pode ser aceito por isso.
+    """
+    if not filename.endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail=INVALID_FORMAT_DETAIL)
+
+
+def extract_text_from_file(file: UploadFile | SpooledUpload, on_page=None):
     if file.filename.endswith(".pdf"):
-        try:
-            file_bytes = file.file.read()
-            reader = pymupdf.open(stream=file_bytes, filetype="pdf")
-            pdf_content = []
-
-            for page in reader.pages():
-                for block in page.get_text(option="blocks"):
-                    _, _, _, _, content, _, block_type = block
-                    if block_type == 0:
-                        # https://pymupdf.readthedocs.io/en/latest/textpage.html#TextPage.extractBLOCKS
-                        #
-                        # Blocks do tipo 0 são aqueles identificados como sendo de texto puro
-                        # Desta forma eliminamos a necessidade de consumir blocos de imagens
-                        # -- e a possibilidade de passar metadados delas -- como conteúdo
-                        # de texto para o modelo avaliar
-                        #
-                        # A abordagem de iterar sobre os blocos também pode se mostrar útil para facilitar o
-                        # descarte de pedaços do documento, como páginas e metadados de rodapé e de assinatura digital
-                        #
-                        # Essas decisões de projeto devem resultar em um consumo menor de tokens e
-                        # aumentar a qualidade da resposta
-
-                        pdf_content.append(content.strip())
-            reader.close()
-
-            ## TO-DO : Implementar solução de OCR
-
-            # Criar funções separadas para processar contratos em PDF:
-            # 1. Firmados em texto puro ✔
-            # 2. Escaneados
-            # 2.1 O PyMuPDF tem suporte de compatibilidade com o PyTesseract
-            #     https://pymupdf.readthedocs.io/en/latest/installation.html#installation-ocr
-
-            return "\n".join(pdf_content)
-        except Exception as e:
-            # Retorna erro caso o PDF esteja corrompido
-            raise HTTPException(
-                status_code=500,
-                detail=f"Erro ao processar o arquivo PDF: {e}"
-            )
+        kind = "PDF"
     elif file.filename.endswith(".docx"):
-        try:
-            doc = Document(file.file)
-
-            return "\n".join([p.text for p in doc.paragraphs])
-        except Exception as e:
-            # Retorna erro caso o PDF esteja corrompido
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Erro ao processar o arquivo DOCX: {e}"
-                    )
+        kind = "DOCX"
     else:
+        raise HTTPException(status_code=400, detail=INVALID_FORMAT_DETAIL)
+
+    # Arquivos já copiados para disco (`SpooledUpload`) são enviados ao pool de extração pelo caminho
+    source = getattr(file, "path", None) or file.file.read()
+    try:
+        text = parse(file.filename, source, on_page)
+    except ParseTimeoutError as e:
+        if e.queued:
+            raise HTTPException(
+                status_code=503,
+                detail="Fila de extração de texto cheia. Tente novamente em instantes.",
+            )
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        # Retorna erro caso o arquivo esteja corrompido
         raise HTTPException(
-            status_code=400,
-            detail="Formato de arquivo inválido. Somente arquivos .pdf e .docx são aceitos.",
+            status_code=500,
+            detail=f"Erro ao processar o arquivo {kind}: {e}"
         )
 
+    if kind == "PDF":
+        # Medido aqui, e não nos processos de extração, cujas métricas não chegam ao /metrics
+        for page in text.split("\f"):
+            PAGE_CHARS.observe(len(page.strip()))
+    return text
+
 
 @router.post(
     "/contracts/upload",
@@ -99,32 +104,401 @@ Retorna dados considerados críticos em uma análise de contratos, como:
 - Objeto negociado
 - Vigência do contrato
 - Cláusulas de rescisão previstas
+
+Com `revises=<id>`, o documento é gravado como nova versão do contrato indicado:
+apenas as cláusulas alteradas (e suas vizinhas) são enviadas ao modelo, e os
+dados não afetados são mantidos da versão anterior.
 """,
 )
 def upload_contract(
     file: UploadFile = File(...),
+    async_mode: bool = Query(
+        False,
+        alias="async",
+        description="Quando verdadeiro, retorna imediatamente (202) o identificador de um job de análise.",
+    ),
+    revises: int | None = Query(
+        None,
+        description="Identificador do contrato do qual o documento é uma nova versão.",
+    ),
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
+    check_file_type(file.filename)
+    # Envios assíncronos são tratados como análises em lote, atrás das interativas
+    with admit_analysis(user, BULK if async_mode else INTERACTIVE):
+        previous = get_previous_version(revises, db)
+
+        if async_mode:
+            return submit_analysis_job(file, db, user, previous)
+
+        return analyze_upload(file, db, previous, user)
+
+
+def admit_analysis(user, priority: str) -> Reservation:
+    """
+    Reserva o lugar do envio na fila de análises, a ser devolvido no fim do envio.
+    Recusa o envio com 429 (e a espera sugerida em Retry-After) quando a fila
+    da classe, ou a do usuário, está cheia.
+    """
     try:
-        text = extract_text_from_file(file)
-    except HTTPException as e:
-        # Caso o extrator resulte em um erro
-        raise e
-    except Exception as e:
-        # Captura todos os outros erros para tratamento
+        return llm_scheduler.admit(user, priority)
+    except SchedulerFullError as e:
+        record_error("queue_full")
         raise HTTPException(
-            status_code=500,
-            detail=f"Erro inesperado durante a extração de texto: {str(e)}"
+            status_code=429, detail=QUEUE_FULL_DETAIL, headers={"Retry-After": str(e.retry_after)}
         )
-    
-    info = extract_contract_info(text)
 
-    contract = Contract(filename=file.filename, **info)
-    db.add(contract)
+
+def get_previous_version(contract_id: int | None, db: Session) -> Contract | None:
+    if contract_id is None:
+        return None
+    previous = db.get(Contract, contract_id)
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Contrato a ser revisado não encontrado")
+    return previous
+
+
+def analyze_upload(
+    file: UploadFile, db: Session, previous: Contract | None = None, user=None, priority: str = INTERACTIVE
+) -> Contract:
+    """
+    Extrai o texto do arquivo, consulta o modelo e armazena o contrato analisado
+    (como nova versão de `previous`, se informado).
+    """
+    check_file_type(file.filename)
+    with timed("upload_read"):
+        spooled = spool_upload(file)
+    with spooled:
+        return store_analysis(spooled, db, previous, user, priority)
+
+
+def store_analysis(
+    spooled: SpooledUpload, db: Session, previous: Contract | None = None, user=None, priority: str = INTERACTIVE
+) -> Contract:
+    info = analyze_spooled(spooled, db, previous=previous, user=user, priority=priority)
+
+    if previous is not None:
+        info = {**info, "version": previous.version + 1, "previous_id": previous.id}
+
+    # A gravação é agrupada com a de outros uploads simultâneos em uma só transação
+    with timed("db_commit"):
+        return contract_writer.write(filename=spooled.filename, **info)
+
+
+def file_type(filename: str) -> str:
+    # Rótulo das métricas; extensões não suportadas são agrupadas para limitar as séries
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    return extension if extension in ("pdf", "docx") else "other"
+
+
+def analyze_spooled(
+    spooled: SpooledUpload,
+    db: Session,
+    on_page=None,
+    analyze=None,
+    previous: Contract | None = None,
+    user=None,
+    priority: str = INTERACTIVE,
+) -> dict:
+    """
+    Retorna os dados analisados do documento, do cache ou consultando o modelo.
+
+    `on_page` acompanha a extração de texto dos PDFs e `analyze(texto)` substitui
+    `extract_contract_info` na consulta ao modelo (ex.: versão em streaming).
+    Com `previous`, o documento é analisado como nova versão desse contrato.
+    A consulta ao modelo aguarda a vez do `user` na classe `priority` do `llm_scheduler`.
+    """
+    analyze = analyze or extract_contract_info
+    if previous is not None:
+        analyze = revision_analyzer(db, previous, analyze)
+
+    # Contratos reenviados são identificados pelo hash dos bytes do arquivo,
+    # evitando tanto a extração de texto quanto a chamada ao modelo
+    key = file_key(spooled.sha256)
+    if previous is not None:
+        key = revision_key(key, previous.id)
+
+    info = extraction_cache.get(db, key)
+    if info is None:
+        stage = f"extract_{file_type(spooled.filename)}"
+        try:
+            with timed(stage):
+                text = extract_text_from_file(spooled, on_page)
+        except HTTPException as e:
+            # Caso o extrator resulte em um erro
+            record_error(stage)
+            raise e
+        except Exception as e:
+            # Captura todos os outros erros para tratamento
+            record_error(stage)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro inesperado durante a extração de texto: {str(e)}"
+            )
+
+        # Sem texto (ex.: PDF escaneado sem OCR disponível) não há o que analisar,
+        # e a chamada ao modelo seria cobrada mesmo assim
+        if not text.strip():
+            record_error("empty_text")
+            raise HTTPException(status_code=422, detail=EMPTY_TEXT_DETAIL)
+
+        # Arquivos diferentes com o mesmo texto (ex.: PDF reexportado) compartilham
+        # a mesma resposta, e envios simultâneos aguardam uma única chamada ao modelo
+        text_key = hash_text(text)
+        cache_key = revision_key(text_key, previous.id) if previous is not None else text_key
+        try:
+            info = extraction_cache.get_or_compute(
+                db, cache_key, lambda: timed_llm_call(text, analyze, user, priority)
+            )
+        except LLMGatewayError as e:
+            # Cota esgotada, falhas repetidas ou circuito aberto no serviço de IA
+            record_error("llm_unavailable")
+            raise HTTPException(status_code=503, detail=str(e))
+        except SchedulerFullError as e:
+            # A vez na fila de análises não chegou a tempo
+            record_error("queue_timeout")
+            raise HTTPException(
+                status_code=429, detail=QUEUE_FULL_DETAIL, headers={"Retry-After": str(e.retry_after)}
+            )
+
+        # O texto é guardado (comprimido) para permitir reanalisar o contrato sem
+        # o arquivo original; a entrada do cache por arquivo aponta para ele
+        save_texts(db, {text_key: text})
+        info = {**info, "text_hash": text_key}
+        extraction_cache.set(db, (key,), info)
+
+    return info
+
+
+def timed_llm_call(text: str, analyze, user=None, priority: str = INTERACTIVE) -> dict:
+    with llm_scheduler.slot(user, priority, cost=estimate_tokens(text)):
+        with timed("llm"):
+            return analyze(text)
+
+
+def submit_analysis_job(file: UploadFile, db: Session, user, previous: Contract | None = None) -> JSONResponse:
+    check_file_type(file.filename)
+
+    # O arquivo fica em disco até o fim do job; o worker o abre pelo caminho
+    os.makedirs(JOBS_SPOOL_DIR, exist_ok=True)
+    with timed("upload_read"):
+        spooled = spool_upload(file, directory=JOBS_SPOOL_DIR)
+    spooled.file.close()
+
+    job = AnalysisJob(
+        id=uuid.uuid4().hex,
+        owner=user,
+        filename=file.filename,
+        status=JOB_PENDING,
+        payload_path=spooled.path,
+        revises_id=previous.id if previous is not None else None,
+    )
+    try:
+        db.add(job)
+        db.commit()
+    except BaseException:
+        remove_job_file(spooled.path)
+        raise
+
+    if not job_pool.submit(run_analysis_job, job.id, owner=user):
+        db.delete(job)
+        db.commit()
+        remove_job_file(spooled.path)
+        record_error("queue_full")
+        raise HTTPException(
+            status_code=429,
+            detail=QUEUE_FULL_DETAIL,
+            headers={"Retry-After": str(llm_scheduler.retry_after(BULK, job_pool.queued))},
+        )
+
+    return JSONResponse(
+        status_code=202,
+        content=JobStatus.model_validate(job, from_attributes=True).model_dump(mode="json"),
+        headers={"Location": f"/contracts/jobs/{job.id}"},
+    )
+
+
+def remove_job_file(path: str | None):
+    if path is None:
+        return
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def claim_job(db: Session, job_id: str) -> str | None:
+    """
+    Reserva um job pendente para esta execução, em uma única instrução UPDATE:
+    com vários workers (ou processos) tentando o mesmo job, apenas um o obtém.
+    Retorna o identificador da reserva, ou `None` se o job já foi reservado.
+    """
+    claim = uuid.uuid4().hex
+    result = db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.id == job_id, AnalysisJob.status == JOB_PENDING)
+        .values(status=JOB_RUNNING, claimed_by=claim, heartbeat_at=datetime.utcnow())
+    )
     db.commit()
-    db.refresh(contract)
-    return contract
+    return claim if result.rowcount == 1 else None
+
+
+@contextmanager
+def job_heartbeat(job_id: str, claim: str):
+    """
+    Renova o sinal de vida do job enquanto ele é executado, em uma thread com
+    sessão própria, para que outros workers não o considerem abandonado.
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(JOBS_LEASE_SECONDS / 3):
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == job_id, AnalysisJob.claimed_by == claim)
+                    .values(heartbeat_at=datetime.utcnow())
+                )
+                db.commit()
+            except Exception as e:
+                logger.warning("Falha ao renovar o job %s: %s", job_id, e)
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, name="job-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_analysis_job(job_id: str):
+    """
+    Executa um job de análise em um worker do `job_pool`, com sessão própria.
+    """
+    db = SessionLocal()
+    try:
+        claim = claim_job(db, job_id)
+        if claim is None:
+            return
+        job = db.get(AnalysisJob, job_id)
+        path = job.payload_path
+
+        result = {}
+        with job_heartbeat(job_id, claim):
+            spooled = None
+            try:
+                spooled = open_spooled(job.filename, path)
+                previous = db.get(Contract, job.revises_id) if job.revises_id is not None else None
+                contract = store_analysis(spooled, db, previous, job.owner, BULK)
+            except FileNotFoundError:
+                db.rollback()
+                result = {"status": JOB_FAILED, "error": "O arquivo enviado não está mais disponível."}
+            except HTTPException as e:
+                db.rollback()
+                result = {"status": JOB_FAILED, "error": str(e.detail)}
+            except Exception as e:
+                db.rollback()
+                result = {"status": JOB_FAILED, "error": f"Erro inesperado durante a análise: {e}"}
+            else:
+                result = {"status": JOB_DONE, "contract_id": contract.id}
+            finally:
+                if spooled is not None:
+                    spooled.file.close()
+
+        # Só grava o resultado se a reserva ainda for desta execução
+        finished = db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, AnalysisJob.claimed_by == claim)
+            .values(**result, payload_path=None, finished_at=datetime.utcnow())
+        )
+        db.commit()
+        if finished.rowcount != 1:
+            # O arquivo agora pertence à execução que retomou o job
+            logger.warning("O job %s foi retomado por outra execução; resultado descartado", job_id)
+        else:
+            remove_job_file(path)
+    finally:
+        db.close()
+
+
+def resume_pending_jobs():
+    """
+    Reagenda jobs interrompidos por uma reinicialização do serviço.
+
+    Jobs em execução só voltam para a fila quando o sinal de vida expira: com
+    vários workers, os que estão sendo analisados por outro processo continuam
+    com ele. Os pendentes podem ser agendados por mais de um worker, mas
+    apenas um consegue reservá-los (`claim_job`).
+    """
+    db = SessionLocal()
+    try:
+        expired = datetime.utcnow() - timedelta(seconds=JOBS_LEASE_SECONDS)
+        db.execute(
+            update(AnalysisJob)
+            .where(
+                AnalysisJob.status == JOB_RUNNING,
+                or_(AnalysisJob.heartbeat_at.is_(None), AnalysisJob.heartbeat_at < expired),
+            )
+            .values(status=JOB_PENDING, claimed_by=None)
+        )
+        db.commit()
+        jobs = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.status == JOB_PENDING)
+            .order_by(AnalysisJob.created_at)
+            .all()
+        )
+        job_ids = [(job.id, job.owner) for job in jobs]
+    finally:
+        db.close()
+
+    for job_id, owner in job_ids:
+        # Os que não couberem na fila continuam pendentes até a próxima inicialização
+        job_pool.submit(run_analysis_job, job_id, owner=owner)
+
+
+def get_owned_job(job_id: str, db: Session, user) -> AnalysisJob:
+    job = db.get(AnalysisJob, job_id)
+    if job is None or job.owner != user:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+@router.get(
+    "/contracts/jobs/{job_id}",
+    response_model=JobStatus,
+    tags=["contracts"],
+    summary="Situação de uma análise assíncrona",
+    description="""
+Retorna o estado (`pending`, `running`, `done` ou `failed`) de um job criado por `POST /contracts/upload?async=true`.
+""",
+)
+def get_job_status(job_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    return get_owned_job(job_id, db, user)
+
+
+@router.get(
+    "/contracts/jobs/{job_id}/result",
+    response_model=ContractData,
+    tags=["contracts"],
+    summary="Resultado de uma análise assíncrona",
+    description="""
+Retorna os dados analisados de um job concluído. Responde 409 enquanto o job não estiver em `done`.
+""",
+)
+def get_job_result(job_id: str, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    job = get_owned_job(job_id, db, user)
+    if job.status != JOB_DONE:
+        raise HTTPException(
+            status_code=409,
+            detail=job.error or f"Análise ainda não concluída (status: {job.status})",
+        )
+    return db.get(Contract, job.contract_id)
 
 
 @router.get(
@@ -133,11 +507,12 @@ def upload_contract(
     tags=["contracts"],
     summary="Recuperação de dados analisados",
     description="""
-Recupera os dados de contratos submetidos para análise pelo serviço de inteligência artificial.
+Recupera os dados de contratos submetidos para análise pelo serviço de inteligência artificial.\n
+Retorna o cabeçalho `ETag`; envie-o em `If-None-Match` para receber `304 Not Modified` enquanto o contrato não mudar.
 """,
 )
 def get_contract(
-    filename: str, db: Session = Depends(get_db), user=Depends(get_current_user)
+    filename: str, request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)
 ):
     # Para fins de teste de aplicação, a verificação através do nome e UUID é suficiente
     # para recuperar o contrato correto.
@@ -145,7 +520,19 @@ def get_contract(
     # É necessário, porém, criar validação também para que o usuário possa recuperar
     # somente os contratos enviados por ele próprio, por questões de privacidade e negócio
 
-    contract = db.query(Contract).filter(Contract.filename == filename).first()
-    if not contract:
-        raise HTTPException(status_code=404, detail="Contrato não encontrado")
-    return contract
+    # Leituras repetidas são servidas da resposta já serializada, sem consultar o banco
+    cached = contract_responses.get(filename)
+    if cached is None:
+        # Obtida antes da consulta: uma gravação confirmada durante a leitura impede
+        # que a resposta, talvez já desatualizada, seja armazenada
+        generation = contract_responses.generation(filename)
+        contract = db.query(Contract).filter(Contract.filename == filename).first()
+        if not contract:
+            raise HTTPException(status_code=404, detail="Contrato não encontrado")
+        body = ContractData.model_validate(contract, from_attributes=True).model_dump_json().encode()
+        cached = contract_responses.set(filename, body, generation)
+
+    headers = {"ETag": cached.etag, "Cache-Control": CONTRACT_CACHE_CONTROL, "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -1,5 +1,7 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+import json
 import os
 
 
@@ -7,8 +9,67 @@ import os
 # Se não for definida, usa o 'sqlite:///./contracts.db' como fallback.
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./contracts.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Ajustes do SQLite para vários workers gravando no mesmo arquivo.
+# Com "false", o SQLite é usado com a configuração padrão.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() != "false"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Aplicado a cada nova conexão do pool:
+    - WAL: leituras não bloqueiam a escrita, e vice-versa;
+    - synchronous=NORMAL: seguro com WAL, sem um fsync a cada commit;
+    - busy_timeout: espera o lock de escrita em vez de falhar com "database is locked";
+    - mmap_size e cache_size: leituras servidas da memória.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def json_serializer(value) -> str:
+    """
+    Grava as colunas JSON com os acentos como texto (e não como "\\u00e7"),
+    o que permite indexá-las na busca textual.
+    """
+    return json.dumps(value, ensure_ascii=False)
+
+
+def create_database_engine(url: str, tuning: bool = SQLITE_TUNING):
+    url = make_url(url)
+    if not url.drivername.startswith("sqlite"):
+        return create_engine(
+            url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, json_serializer=json_serializer
+        )
+
+    if url.database in (None, "", ":memory:"):
+        # Bancos em memória não usam WAL nem pool de conexões
+        return create_engine(
+            url, connect_args={"check_same_thread": False}, json_serializer=json_serializer
+        )
+
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        json_serializer=json_serializer,
+    )
+    if tuning:
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
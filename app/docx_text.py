@@ -0,0 +1,90 @@
+from collections.abc import Iterator
+from xml.etree.ElementTree import iterparse
+import zipfile
+
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+PARAGRAPH = W + "p"
+TEXT = W + "t"
+TABLE_ROW = W + "tr"
+TABLE_CELL = W + "tc"
+BODY = W + "body"
+# Conteúdo alternativo (versão "antiga" de caixas de texto e formas), que
+# repetiria o texto já lido em mc:Choice
+FALLBACK = MC + "Fallback"
+# Elementos de texto que não estão em w:t
+SPECIAL_CHARACTERS = {W + "tab": "\t", W + "br": "\n", W + "cr": "\n", W + "noBreakHyphen": "-"}
+
+# Separador das células de uma mesma linha de tabela
+CELL_SEPARATOR = " | "
+
+
+def iter_docx_text(source) -> Iterator[str]:
+    """
+    Lê `word/document.xml` de um .docx (caminho ou arquivo aberto) com um parser
+    incremental e produz o texto de cada parágrafo e de cada linha de tabela,
+    na ordem do documento, sem montar o modelo de objetos do python-docx.
+
+    As células de uma linha são unidas por " | ", mantendo juntos rótulo e valor
+    (ex.: "Valor do aluguel | R$ 1.500,00"). Os elementos já lidos são descartados,
+    então o consumo de memória não cresce com o tamanho do documento.
+    """
+    with zipfile.ZipFile(source) as archive, archive.open("word/document.xml") as xml:
+        body = None
+        paragraphs = []  # Trechos de texto dos parágrafos abertos (caixas de texto ficam aninhadas)
+        rows = []        # Células das linhas de tabela abertas (tabelas podem estar aninhadas)
+        cells = []       # Conteúdo das células abertas
+        skipping = 0     # Profundidade dentro de mc:Fallback
+
+        for event, element in iterparse(xml, events=("start", "end")):
+            tag = element.tag
+
+            if event == "start":
+                if tag == FALLBACK:
+                    skipping += 1
+                elif skipping:
+                    continue
+                elif tag == BODY:
+                    body = element
+                elif tag == PARAGRAPH:
+                    paragraphs.append([])
+                elif tag == TABLE_ROW:
+                    rows.append([])
+                elif tag == TABLE_CELL:
+                    cells.append([])
+                continue
+
+            if tag == FALLBACK:
+                skipping -= 1
+            elif skipping:
+                pass
+            elif tag == TEXT:
+                if paragraphs:
+                    paragraphs[-1].append(element.text or "")
+            elif tag in SPECIAL_CHARACTERS:
+                if paragraphs:
+                    paragraphs[-1].append(SPECIAL_CHARACTERS[tag])
+            elif tag == PARAGRAPH:
+                text = "".join(paragraphs.pop())
+                # Dentro de uma célula, o texto compõe a célula; fora, é uma linha do documento
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+                element.clear()
+            elif tag == TABLE_CELL:
+                content = cells.pop()
+                rows[-1].append(" ".join(part.strip() for part in content if part.strip()))
+            elif tag == TABLE_ROW:
+                row = rows.pop()
+                if cells:
+                    cells[-1].append(CELL_SEPARATOR.join(row))
+                elif any(row):
+                    yield CELL_SEPARATOR.join(row)
+                element.clear()
+
+            # Descarta os elementos de primeiro nível já processados
+            if body is not None and not paragraphs and not rows:
+                body.clear()
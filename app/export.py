@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from .database import SessionLocal
+from .assets import accepted_encodings
+from .auth import get_current_user
+from .models import Contract
+from .schemas import ContractData
+from .search import has_party
+from datetime import datetime, timezone
+import csv
+import io
+import json
+import os
+import zlib
+
+router = APIRouter()
+
+
+# Linhas lidas do banco por vez: o consumo de memória não depende do tamanho da tabela
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+# Tamanho aproximado de cada trecho enviado ao cliente
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", str(64 * 1024)))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+EXPORT_FIELDS = (*ContractData.model_fields, "updated_at")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@router.get(
+    "/contracts/export",
+    response_class=StreamingResponse,
+    tags=["contracts"],
+    summary="Exportação em massa dos contratos analisados",
+    description="""
+Transmite todos os contratos (ou os filtrados) em um único download, em ordem de `id`:\n
+- `format=ndjson`: um objeto JSON por linha;
+- `format=csv`: uma linha por contrato, com as listas codificadas em JSON.\n
+Com `changed_since`, apenas os contratos gravados ou reanalisados a partir desse instante (UTC).
+A resposta é comprimida com gzip quando o cliente envia `Accept-Encoding: gzip`.
+""",
+)
+def export_contracts(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    changed_since: datetime | None = Query(None, description="Data e hora (UTC, ISO 8601)."),
+    contratante: str | None = Query(None, description="Uma das partes contratantes."),
+    contratado: str | None = Query(None, description="Uma das partes contratadas."),
+    user=Depends(get_current_user),
+):
+    statement = select(*(Contract.__table__.c[field] for field in EXPORT_FIELDS)).order_by(Contract.id)
+    if changed_since is not None:
+        # `updated_at` é gravado em UTC sem fuso: instantes com deslocamento são convertidos
+        if changed_since.tzinfo is not None:
+            changed_since = changed_since.astimezone(timezone.utc).replace(tzinfo=None)
+        statement = statement.where(Contract.updated_at >= changed_since)
+    if contratante is not None:
+        statement = statement.where(has_party("contratante", contratante))
+    if contratado is not None:
+        statement = statement.where(has_party("contratado", contratado))
+
+    compress = "gzip" in accepted_encodings(request.headers.get("accept-encoding"))
+    headers = {
+        "Content-Disposition": f'attachment; filename="contracts.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        stream_export(statement, export_format, compress),
+        media_type=MEDIA_TYPES[export_format],
+        headers=headers,
+    )
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_export(statement, export_format: str, compress: bool):
+    """
+    Lê os contratos em lotes de `EXPORT_BATCH_SIZE` (`yield_per`, com cursor no
+    servidor quando o driver suporta) e os entrega em trechos de cerca de
+    `EXPORT_CHUNK_BYTES`, comprimidos incrementalmente quando `compress`.
+
+    A sessão é própria: a da dependência `get_db` é fechada antes do fim da resposta.
+    """
+    # wbits=31: formato gzip (cabeçalho e CRC), e não zlib puro
+    encoder = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n") if export_format == "csv" else None
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return encoder.compress(data) if encoder is not None else data
+
+    if writer is not None:
+        writer.writerow(EXPORT_FIELDS)
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in rows:
+            values = [export_value(value) for value in row]
+            if writer is not None:
+                writer.writerow(
+                    json.dumps(value, ensure_ascii=False) if isinstance(value, list) else value
+                    for value in values
+                )
+            else:
+                buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, values)), ensure_ascii=False))
+                buffer.write("\n")
+
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                chunk = flush()
+                if chunk:
+                    yield chunk
+    finally:
+        db.close()
+
+    chunk = flush() + (encoder.flush() if encoder is not None else b"")
+    if chunk:
+        yield chunk
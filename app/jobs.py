@@ -0,0 +1,110 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+
+# Número de análises executadas simultaneamente em segundo plano
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "4"))
+# Número de análises aguardando execução antes de recusar novos envios
+JOBS_MAX_PENDING = int(os.getenv("JOBS_MAX_PENDING", "100"))
+# Análises aguardando de um mesmo usuário, para que um único lote não ocupe a fila inteira
+JOBS_MAX_PENDING_PER_OWNER = int(os.getenv("JOBS_MAX_PENDING_PER_OWNER", "50"))
+# Tempo sem sinal de vida (heartbeat) após o qual um job em execução é considerado
+# abandonado por um worker que parou, e pode ser retomado por outro
+JOBS_LEASE_SECONDS = float(os.getenv("JOBS_LEASE_SECONDS", "300"))
+# Diretório dos arquivos enviados para análise assíncrona, mantidos até o fim do job
+# para que análises interrompidas possam ser retomadas (compartilhado entre os workers)
+JOBS_SPOOL_DIR = os.getenv("JOBS_SPOOL_DIR", "jobs_spool")
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class JobPool:
+    """
+    Pool limitado de workers para análises assíncronas.
+
+    Diferente do threadpool do servidor, que atende também logins e consultas,
+    este pool só executa análises de contratos e aceita no máximo
+    `max_workers + max_pending` tarefas ao mesmo tempo.
+
+    As tarefas aguardam em uma fila por usuário (`owner`), atendidas em rodízio:
+    um usuário com centenas de jobs pendentes não atrasa o primeiro job de outro.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = JOBS_MAX_WORKERS,
+        max_pending: int = JOBS_MAX_PENDING,
+        max_pending_per_owner: int = JOBS_MAX_PENDING_PER_OWNER,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_pending_per_owner = max_pending_per_owner
+        self._executor = None
+        # Reentrante: o callback de uma tarefa já concluída roda dentro de `submit`
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = {}
+        self._owners = deque()
+        self._running = 0
+
+    @property
+    def queued(self) -> int:
+        with self._lock:
+            return sum(len(tasks) for tasks in self._pending.values())
+
+    def submit(self, fn, *args, owner=None) -> bool:
+        """
+        Agenda `fn(*args)`. Retorna False se a fila (ou a do `owner`) estiver cheia.
+        """
+        with self._lock:
+            tasks = self._pending.get(owner)
+            if self._running + self.queued >= self.max_workers + self.max_pending or (
+                tasks is not None and len(tasks) >= self.max_pending_per_owner
+            ):
+                return False
+            if tasks is None:
+                tasks = self._pending[owner] = deque()
+                self._owners.append(owner)
+            tasks.append((fn, args))
+            self._start_next()
+        return True
+
+    def _start_next(self):
+        while self._running < self.max_workers and self._owners:
+            owner = self._owners.popleft()
+            tasks = self._pending[owner]
+            fn, args = tasks.popleft()
+            # O usuário volta para o fim do rodízio se ainda tiver tarefas
+            if tasks:
+                self._owners.append(owner)
+            else:
+                del self._pending[owner]
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="analysis-job"
+                )
+            self._running += 1
+            self._executor.submit(fn, *args).add_done_callback(self._finished)
+
+    def _finished(self, _):
+        with self._lock:
+            self._running -= 1
+            self._start_next()
+            self._idle.notify_all()
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if wait:
+                self._idle.wait_for(lambda: not self._running and not self._pending)
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+job_pool = JobPool()
@@ -0,0 +1,60 @@
+import json
+
+
+class ObjectFieldParser:
+    """
+    Lê um objeto JSON recebido em trechos e entrega cada campo de primeiro nível
+    assim que seu valor termina, sem esperar o fechamento do objeto.
+
+    Ex.: `feed('{"vigencia": "12 meses", "obje')` retorna `[("vigencia", "12 meses")]`
+    e o campo `objeto` é entregue pelo `feed` que completar o seu valor.
+    Um colchete antes do objeto (resposta no formato de lista) é ignorado.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._field_start = None
+
+    def feed(self, text: str) -> list[tuple[str, object]]:
+        self._buffer += text
+        fields = []
+
+        for i in range(self._position, len(self._buffer)):
+            char = self._buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if char == "{" and self._field_start is None:
+                    # Início do objeto principal
+                    self._depth = 1
+                    self._field_start = i + 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._depth == 0 and self._field_start is not None:
+                    fields += self._close_field(i)
+            elif char == "," and self._depth == 1 and self._field_start is not None:
+                fields += self._close_field(i)
+
+        self._position = len(self._buffer)
+        return fields
+
+    def _close_field(self, end: int) -> list[tuple[str, object]]:
+        segment = self._buffer[self._field_start:end]
+        self._field_start = end + 1
+        if not segment.strip():
+            return []
+        return list(json.loads("{" + segment + "}").items())
@@ -0,0 +1,248 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pydantic import BaseModel
+from types import SimpleNamespace
+from .llm_gateway import gateway, LLMGateway, LLMGatewayError
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import typing
+
+
+# Implementação usada para analisar os contratos: "gemini" (padrão) ou "fake"
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
+
+# Parâmetros do backend "fake", usado em testes de carga e benchmarks sem acesso à internet
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))
+FAKE_LLM_JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "200"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+# Faz as respostas do backend "fake" passarem por um gateway (cota, concorrência, novas
+# tentativas e circuit breaker), como as da Gemini; "false" chama a simulação diretamente
+FAKE_LLM_GATEWAY = os.getenv("FAKE_LLM_GATEWAY", "true").lower() != "false"
+
+
+class LLMBackend(ABC):
+    """
+    Interface dos backends de IA usados por `extract_contract_info`.
+
+    `generate_answer` recebe o texto do contrato, a instrução de sistema e o
+    modelo Pydantic da resposta, e devolve um dicionário no formato desse modelo.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def generate_answer(
+        self, contract_content: str, system_instruction: str, response_schema: type[BaseModel]
+    ) -> dict:
+        ...
+
+    def stream_answer(
+        self, contract_content: str, system_instruction: str, response_schema: type[BaseModel]
+    ) -> Iterator[str]:
+        """
+        Produz o JSON da resposta (um objeto no formato de `response_schema`) em
+        trechos de texto, à medida que são gerados. Sem suporte a streaming,
+        entrega a resposta completa em um único trecho.
+        """
+        yield json.dumps(
+            self.generate_answer(contract_content, system_instruction, response_schema),
+            ensure_ascii=False,
+        )
+
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, model: str = GEMINI_MODEL, llm_gateway: LLMGateway | None = None):
+        self.model = model
+        self.gateway = llm_gateway or gateway
+
+    def generate_answer(self, contract_content, system_instruction, response_schema):
+        # Todas as chamadas ao modelo passam pelo gateway, que compartilha o cliente
+        # e aplica os limites de cota, as novas tentativas e o circuit breaker
+        response = self.gateway.generate(
+            model=self.model,
+            contents=contract_content,
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": list[response_schema],
+                "system_instruction": system_instruction,
+            },
+        )
+
+        return response.model_dump().get("parsed")[0]  # -> dict
+
+    def stream_answer(self, contract_content, system_instruction, response_schema):
+        # Em streaming o esquema é um único objeto (e não uma lista), para que
+        # os campos possam ser lidos à medida que o JSON é gerado
+        for chunk in self.gateway.stream(
+            model=self.model,
+            contents=contract_content,
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": response_schema,
+                "system_instruction": system_instruction,
+            },
+        ):
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackend(LLMBackend):
+    """
+    Backend local que simula a Gemini sem acesso à rede.
+
+    Aguarda `latency_ms` (± `jitter_ms`) por chamada, falha com a probabilidade
+    `error_rate` e devolve uma resposta determinística, derivada do hash do texto,
+    no formato de `response_schema`.
+
+    Com `through_gateway`, as chamadas passam por um `LLMGateway` próprio, com um
+    cliente simulado (`FakeClient`) no lugar do da Gemini: a cota, a concorrência,
+    as novas tentativas e o circuit breaker se comportam como em produção, e as
+    falhas simuladas são erros de rede refeitos pelo gateway. Sem ele, as falhas
+    chegam como `LLMGatewayError`, como se as tentativas já estivessem esgotadas.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = FAKE_LLM_LATENCY_MS,
+        jitter_ms: float = FAKE_LLM_JITTER_MS,
+        error_rate: float = FAKE_LLM_ERROR_RATE,
+        seed: int | None = None,
+        through_gateway: bool = FAKE_LLM_GATEWAY,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.gateway = LLMGateway(client=FakeClient(self)) if through_gateway else None
+        self._gateway_backend = GeminiBackend("fake", self.gateway) if through_gateway else None
+
+    def _delay(self) -> float:
+        delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, delay) / 1000
+
+    def _check_error(self, error: type[Exception] = LLMGatewayError):
+        if self._random.random() < self.error_rate:
+            raise error("Falha simulada pelo backend fake.")
+
+    def _chunks(self, text: str, chunks: int) -> list[str]:
+        size = -(-len(text) // chunks)
+        return [text[start:start + size] for start in range(0, len(text), size)]
+
+    def generate_answer(self, contract_content, system_instruction, response_schema):
+        if self._gateway_backend is not None:
+            return self._gateway_backend.generate_answer(contract_content, system_instruction, response_schema)
+        time.sleep(self._delay())
+        self._check_error()
+        return self._answer(contract_content, response_schema)
+
+    def stream_answer(self, contract_content, system_instruction, response_schema, chunks: int = 10):
+        if self._gateway_backend is not None:
+            yield from self._gateway_backend.stream_answer(contract_content, system_instruction, response_schema)
+            return
+        # A latência é distribuída entre os trechos, como em uma resposta gerada aos poucos
+        delay = self._delay() / chunks
+        self._check_error()
+        text = json.dumps(self._answer(contract_content, response_schema), ensure_ascii=False)
+        for chunk in self._chunks(text, chunks):
+            time.sleep(delay)
+            yield chunk
+
+    def _answer(self, contract_content, response_schema) -> dict:
+        digest = hashlib.sha256(contract_content.encode("utf-8")).hexdigest()[:8]
+        answer = {}
+        for field, info in response_schema.model_fields.items():
+            if typing.get_origin(info.annotation) is list:
+                answer[field] = [f"{field} {digest} #{i}" for i in range(1, 3)]
+            else:
+                answer[field] = f"{field} {digest}"
+        return answer
+
+
+class FakeResponse:
+    """
+    Resposta no formato usado de `GenerateContentResponse` (`parsed`, `text`).
+    """
+
+    usage_metadata = None
+
+    def __init__(self, parsed=None, text: str | None = None):
+        self.parsed = parsed
+        self.text = text
+
+    def model_dump(self) -> dict:
+        return {"parsed": self.parsed, "text": self.text}
+
+
+class FakeModels:
+    def __init__(self, backend: FakeBackend):
+        self.backend = backend
+
+    def _answer(self, contents: str, config: dict):
+        # Sem streaming, o esquema é uma lista de respostas (ver `GeminiBackend`)
+        schema = config["response_schema"]
+        if typing.get_origin(schema) is list:
+            return [self.backend._answer(contents, typing.get_args(schema)[0])]
+        return self.backend._answer(contents, schema)
+
+    async def generate_content(self, *, model: str, contents: str, config: dict) -> FakeResponse:
+        await asyncio.sleep(self.backend._delay())
+        # Erros de rede são transitórios para o gateway, que refaz a chamada
+        self.backend._check_error(ConnectionError)
+        return FakeResponse(parsed=self._answer(contents, config))
+
+    async def generate_content_stream(self, *, model: str, contents: str, config: dict, chunks: int = 10):
+        delay = self.backend._delay() / chunks
+        self.backend._check_error(ConnectionError)
+        text = json.dumps(self._answer(contents, config), ensure_ascii=False)
+
+        async def stream():
+            for chunk in self.backend._chunks(text, chunks):
+                await asyncio.sleep(delay)
+                yield FakeResponse(text=chunk)
+
+        return stream()
+
+
+class FakeClient:
+    """
+    Substituto de `genai.Client` para o `LLMGateway`, com as respostas do `FakeBackend`.
+    """
+
+    def __init__(self, backend: FakeBackend):
+        self.aio = SimpleNamespace(models=FakeModels(backend))
+
+
+BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+_backend = None
+
+
+def get_backend() -> LLMBackend:
+    global _backend
+    if _backend is None:
+        if LLM_BACKEND not in BACKENDS:
+            raise ValueError(
+                f"LLM_BACKEND inválido: {LLM_BACKEND!r}. Opções: {', '.join(BACKENDS)}"
+            )
+        _backend = BACKENDS[LLM_BACKEND]()
+    return _backend
+
+
+def set_backend(backend: LLMBackend | None):
+    """
+    Substitui o backend do processo (ou restaura o configurado, com `None`).
+    """
+    global _backend
+    _backend = backend
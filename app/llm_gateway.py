@@ -0,0 +1,380 @@
+from .chunking import estimate_tokens
+from .metrics import record_error, record_llm_usage
+import asyncio
+import os
+import queue
+import random
+import threading
+import time
+
+
+# Limites da cota da API Gemini compartilhados por todas as requisições do processo
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+# Chamadas simultâneas ao modelo
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Tempo máximo de cada tentativa, em segundos
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+# Novas tentativas em erros transitórios (429, 5xx e timeouts)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "30"))
+# Falhas consecutivas que abrem o circuito, e por quanto tempo ele fica aberto
+LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMGatewayError(Exception):
+    """
+    Falha ao obter resposta do modelo depois de esgotadas as tentativas.
+    """
+
+
+class CircuitOpenError(LLMGatewayError):
+    """
+    O circuito está aberto: o modelo falhou repetidamente e as chamadas
+    são recusadas imediatamente até o fim do período de espera.
+    """
+
+
+class TokenBucket:
+    """
+    Balde de fichas recarregado continuamente a `rate_per_minute` por minuto.
+    Um limite igual a zero desativa o controle.
+    """
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60
+        self.tokens = float(rate_per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        if self.capacity <= 0:
+            return
+        # Pedidos maiores que a capacidade nunca seriam atendidos
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def consume(self, amount: float):
+        """
+        Desconta fichas sem esperar (o saldo pode ficar negativo),
+        usado para corrigir a estimativa com o consumo real de tokens.
+        """
+        if self.capacity <= 0:
+            return
+        self._refill()
+        self.tokens -= amount
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def check(self):
+        if self.state == "open":
+            raise CircuitOpenError(
+                "Serviço de IA temporariamente indisponível após falhas consecutivas."
+            )
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        # Uma falha na tentativa de teste (meio-aberto) reabre o circuito
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if type(error).__module__ == "google.genai.errors":
+        from google.genai import errors
+
+        if isinstance(error, errors.APIError):
+            return error.code in TRANSIENT_STATUS_CODES
+    # Erros de rede do httpx (conexão recusada, reset, etc.)
+    return type(error).__module__.startswith(("httpx", "httpcore"))
+
+
+class LLMGateway:
+    """
+    Ponto único de acesso ao modelo para todo o processo.
+
+    - Mantém um único cliente assíncrono da Gemini, reaproveitando conexões;
+    - Limita requisições e tokens por minuto (token bucket) e chamadas simultâneas;
+    - Refaz chamadas com falhas transitórias, com espera exponencial e jitter;
+    - Aplica timeout por tentativa e um circuit breaker.
+
+    As chamadas rodam em um event loop próprio, em uma thread dedicada, para que
+    rotas síncronas (`generate`) e assíncronas (`agenerate`) compartilhem os mesmos limites.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base: float = LLM_RETRY_BASE_SECONDS,
+        retry_max: float = LLM_RETRY_MAX_SECONDS,
+        circuit_failures: int = LLM_CIRCUIT_FAILURES,
+        circuit_reset: float = LLM_CIRCUIT_RESET_SECONDS,
+    ):
+        self._client = client
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.circuit = CircuitBreaker(circuit_failures, circuit_reset)
+
+        self._loop = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_wait_seconds = 0.0
+        self.last_wait_seconds = 0.0
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Importado no primeiro uso: o SDK leva centenas de milissegundos para carregar
+            from google import genai
+
+            self._client = genai.Client()
+        return self._client
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="llm-gateway", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    def generate(self, **kwargs):
+        """
+        Versão síncrona de `agenerate`, para uso a partir de threads.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.agenerate(**kwargs), self._ensure_loop())
+        return future.result()
+
+    async def _acquire(self, estimated: int):
+        """
+        Aguarda a cota (requisições e tokens) e uma vaga de concorrência.
+        """
+        self.circuit.check()
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        started = time.monotonic()
+        self.queue_depth += 1
+        try:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated)
+            await self._semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+        self.last_wait_seconds = time.monotonic() - started
+        self.total_wait_seconds += self.last_wait_seconds
+
+        self.calls += 1
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def _record_failure(self):
+        self.failures += 1
+        self.circuit.record_failure()
+
+    async def _backoff(self, attempt: int):
+        self.retries += 1
+        # Espera exponencial com "full jitter", evitando que requisições
+        # que falharam juntas tentem novamente ao mesmo tempo
+        await asyncio.sleep(
+            random.uniform(0, min(self.retry_max, self.retry_base * 2 ** attempt))
+        )
+
+    async def agenerate(self, *, model: str, contents: str, config: dict):
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is not loop:
+            return await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(
+                    self.agenerate(model=model, contents=contents, config=config), loop
+                )
+            )
+
+        estimated = estimate_tokens(contents) + estimate_tokens(str(config.get("system_instruction", "")))
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(estimated)
+            try:
+                response = await asyncio.wait_for(
+                    self.client.aio.models.generate_content(
+                        model=model, contents=contents, config=config
+                    ),
+                    timeout=self.timeout,
+                )
+            except Exception as e:
+                record_error(f"llm_{type(e).__name__}")
+                if not is_transient(e):
+                    raise
+                last_error = e
+                self._record_failure()
+            else:
+                self.circuit.record_success()
+                self._record_usage(response, estimated)
+                return response
+            finally:
+                self._release()
+
+            if attempt < self.max_retries:
+                await self._backoff(attempt)
+
+        raise LLMGatewayError(f"Falha ao consultar o modelo: {last_error}") from last_error
+
+    async def astream(self, *, model: str, contents: str, config: dict):
+        """
+        Versão em streaming de `agenerate`: produz os trechos da resposta à medida
+        que o modelo os gera. Deve ser consumida no event loop do gateway (ver `stream`).
+
+        Novas tentativas só acontecem antes do primeiro trecho; depois dele, uma
+        falha interrompe a resposta com `LLMGatewayError`. O timeout vale para a
+        espera de cada trecho, e não para a resposta inteira.
+        """
+        estimated = estimate_tokens(contents) + estimate_tokens(str(config.get("system_instruction", "")))
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(estimated)
+            received = False
+            last_chunk = None
+            try:
+                stream = await asyncio.wait_for(
+                    self.client.aio.models.generate_content_stream(
+                        model=model, contents=contents, config=config
+                    ),
+                    timeout=self.timeout,
+                )
+                iterator = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), timeout=self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    received = True
+                    last_chunk = chunk
+                    yield chunk
+            except Exception as e:
+                record_error(f"llm_{type(e).__name__}")
+                if not is_transient(e):
+                    raise
+                last_error = e
+                self._record_failure()
+                if received:
+                    raise LLMGatewayError(f"Resposta do modelo interrompida: {e}") from e
+            else:
+                self.circuit.record_success()
+                # Os metadados de uso acompanham o último trecho
+                self._record_usage(last_chunk, estimated)
+                return
+            finally:
+                self._release()
+
+            if attempt < self.max_retries:
+                await self._backoff(attempt)
+
+        raise LLMGatewayError(f"Falha ao consultar o modelo: {last_error}") from last_error
+
+    def stream(self, **kwargs):
+        """
+        Versão síncrona de `astream`, para uso a partir de threads: os trechos
+        produzidos no event loop do gateway são repassados por uma fila.
+        """
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for chunk in self.astream(**kwargs):
+                    items.put((chunk, None))
+            except Exception as e:
+                items.put((None, e))
+            else:
+                items.put((None, None))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._ensure_loop())
+        try:
+            while True:
+                chunk, error = items.get()
+                if error is not None:
+                    raise error
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            # Quem consome desistiu da resposta (ex.: cliente desconectado)
+            future.cancel()
+
+    def _record_usage(self, response, estimated: int):
+        usage = getattr(response, "usage_metadata", None)
+        record_llm_usage(usage)
+        total = getattr(usage, "total_token_count", None)
+        if isinstance(total, int) and total > estimated:
+            self.tokens.consume(total - estimated)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "last_wait_seconds": round(self.last_wait_seconds, 4),
+            "avg_wait_seconds": round(self.total_wait_seconds / self.calls, 4) if self.calls else 0.0,
+            "circuit": self.circuit.state,
+        }
+
+
+gateway = LLMGateway()
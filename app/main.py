@@ -1,19 +1,40 @@
-from .auth import authenticate_user, create_access_token
-from .contracts import router as contracts_router
-from .database import Base, engine
+from .assets import router as assets_router, static_assets
+from .auth import authenticate_user, create_access_token, get_current_user
+from .aggregates import router as aggregates_router
+from .batch import router as batch_router
+from .export import router as export_router
+from .search import router as search_router
+from .streaming import router as streaming_router
+from .contracts import router as contracts_router, resume_pending_jobs
+from .jobs import job_pool
+from .ocr import shutdown as shutdown_ocr
+from .parsing import shutdown as shutdown_parsing
+from .llm_gateway import gateway
+from .scheduler import llm_scheduler
+from .llm_backends import LLM_BACKEND
+from .writer import contract_writer
 from .schemas import Token
-from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException
+from .metrics import IN_FLIGHT, record_error, render_metrics, request_timings, server_timing
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.staticfiles import StaticFiles
 import os
+import threading
+import time
 
-load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-Base.metadata.create_all(bind=engine)
+# Com "true", as bibliotecas pesadas (carregadas sob demanda) são importadas em
+# segundo plano assim que o worker sobe, para que a primeira análise não espere por elas
+WARMUP_IMPORTS = os.getenv("WARMUP_IMPORTS", "true").lower() != "false"
+# Respostas a partir deste tamanho (em bytes) são comprimidas com gzip, quando o
+# cliente aceita e a rota ainda não as comprimiu
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
 
 application_description = """
 Esta aplicação facilita a análise de contratos jurídicos utilizando o auxílio de inteligência artificial generativa.
@@ -28,9 +49,34 @@ São retornados detalhes críticos dos contratos como:
 - Cláusulas de rescisão;
 """
 
+def warm_up():
+    import pymupdf  # noqa: F401
+    if LLM_BACKEND == "gemini":
+        from google import genai  # noqa: F401
+
+
+# As tabelas não são criadas aqui: o esquema é preparado antes de subir os
+# workers, com `python -m app.migrations`
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_IMPORTS:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    # Arquivos estáticos comprimidos antes da primeira requisição
+    static_assets.build()
+    # Análises assíncronas interrompidas pela última parada do serviço voltam para a fila
+    resume_pending_jobs()
+    yield
+    job_pool.shutdown(wait=True)
+    shutdown_parsing()
+    shutdown_ocr()
+    contract_writer.close()
+
+
 tags_metadata = [
     {"name": "login", "description": "Interface para login na aplicação."},
     {"name": "contracts", "description": "Operações de envio e retorno de contratos."},
+    {"name": "llm", "description": "Situação do acesso ao serviço de IA."},
+    {"name": "metrics", "description": "Métricas no formato do Prometheus."},
 ]
 
 app = FastAPI(
@@ -43,10 +89,15 @@ app = FastAPI(
         "url": "https://www.apache.org/licenses/LICENSE-2.0.html",
     },
     openapi_tags=tags_metadata,
+    lifespan=lifespan,
 )
 
 origins = ["*"]  # For development.
 
+# Os arquivos estáticos já são servidos pré-comprimidos, e as respostas com
+# `Content-Encoding` (ou em SSE) passam sem alteração
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -56,6 +107,37 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    # As etapas medidas com `timed` durante a requisição são somadas neste
+    # dicionário, compartilhado com a thread que executa a rota
+    timings = {}
+    token = request_timings.set(timings)
+    IN_FLIGHT.inc()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception as e:
+        record_error(type(e).__name__)
+        raise
+    finally:
+        IN_FLIGHT.dec()
+        request_timings.reset(token)
+
+    if response.status_code >= 400:
+        record_error(f"http_{response.status_code}")
+    response.headers["Server-Timing"] = server_timing(timings, time.perf_counter() - started)
+    return response
+
+
+app.include_router(assets_router)
+app.include_router(batch_router)
+app.include_router(streaming_router)
+# Antes de `contracts_router`, para que `/contracts/search`, `/contracts/export` e
+# `/contracts/aggregates` não sejam lidos como `/contracts/{filename}`
+app.include_router(search_router)
+app.include_router(export_router)
+app.include_router(aggregates_router)
 app.include_router(contracts_router)
 
 
@@ -66,11 +148,10 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
     token = create_access_token(data={"sub": form_data.username})
     return {"access_token": token, "token_type": "bearer"}
 
-# This route serves your index.html file as the main page
-@app.get("/", response_class=FileResponse, include_in_schema=False)
-async def read_index():
-    return FileResponse("static/index.html")
+@app.get("/llm/stats", tags=["llm"], summary="Fila e limites das chamadas à IA")
+def llm_stats(user=Depends(get_current_user)):
+    return {**gateway.stats(), "scheduler": llm_scheduler.stats(), "jobs_queued": job_pool.queued}
 
-# Mounts the 'static' directory.
-# FastAPI will look for files in the 'static' folder if no other API route matches.
-app.mount("/static", StaticFiles(directory="static"), name="static")
\ No newline at end of file
+@app.get("/metrics", tags=["metrics"], summary="Métricas de latência, tokens e erros")
+def metrics():
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
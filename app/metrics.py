@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+import os
+import time
+
+
+# Etapas do upload: "upload_read", "extract_pdf", "extract_docx", "llm" e "db_commit"
+STAGE_SECONDS = Histogram(
+    "contract_api_stage_seconds",
+    "Duração de cada etapa do processamento de um contrato.",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+LLM_TOKENS = Counter(
+    "contract_api_llm_tokens",
+    "Tokens consumidos nas chamadas ao modelo, segundo os metadados de uso da resposta.",
+    ["direction"],
+)
+PAGE_CHARS = Histogram(
+    "contract_api_extracted_chars_per_page",
+    "Caracteres extraídos por página de PDF, após a remoção de blocos repetidos.",
+    buckets=(0, 50, 200, 500, 1000, 2000, 4000, 8000, 16000),
+)
+ERRORS = Counter(
+    "contract_api_errors",
+    "Erros por tipo (etapa do processamento, falha do modelo ou status HTTP).",
+    ["type"],
+)
+IN_FLIGHT = Gauge(
+    "contract_api_requests_in_flight",
+    "Requisições HTTP em andamento.",
+    multiprocess_mode="livesum",
+)
+
+# Tempo acumulado por etapa na requisição atual, exposto no cabeçalho Server-Timing
+request_timings: ContextVar[dict | None] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Mede a etapa no histograma e a soma ao Server-Timing da requisição atual, se houver.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        timings = request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def record_error(kind: str):
+    ERRORS.labels(kind).inc()
+
+
+def record_llm_usage(usage):
+    """
+    Contabiliza os tokens de entrada e saída de `usage_metadata` de uma resposta da Gemini.
+    """
+    for direction, attribute in (("input", "prompt_token_count"), ("output", "candidates_token_count")):
+        count = getattr(usage, attribute, None)
+        if isinstance(count, int) and count > 0:
+            LLM_TOKENS.labels(direction).inc(count)
+
+
+def server_timing(timings: dict, total: float) -> str:
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def render_metrics() -> bytes:
+    # Com vários workers do uvicorn, cada processo grava suas métricas em
+    # PROMETHEUS_MULTIPROC_DIR e qualquer um deles responde pelo conjunto
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
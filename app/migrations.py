@@ -0,0 +1,323 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from .database import Base, engine, json_serializer
+from .models import SchemaMigration
+from .money import parse_amount
+from .aggregates import create_totals_triggers, rebuild_totals
+from .search import create_party_index, create_search_index, rebuild_party_index
+from .jobs import JOBS_SPOOL_DIR
+from datetime import datetime
+import json
+import os
+import tempfile
+
+
+LIST_COLUMNS = (
+    "contratante",
+    "contratado",
+    "objeto",
+    "obrigacoes_contratante",
+    "obrigacoes_contratada",
+)
+
+
+def as_json_list(value) -> list[str]:
+    """
+    Converte o formato antigo das colunas de lista (texto gerado por `json.dumps`)
+    para uma lista. Textos que não são JSON viram uma lista de um item.
+    """
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    try:
+        decoded = json.loads(value)
+    except (TypeError, ValueError):
+        return [value] if str(value).strip() else []
+    if isinstance(decoded, str):
+        # Valor codificado duas vezes
+        return as_json_list(decoded)
+    if isinstance(decoded, list):
+        return [str(item) for item in decoded]
+    return [str(decoded)]
+
+
+def migrate_json_list_columns(connection: Connection):
+    """
+    As colunas de lista de `contracts` passam de texto (JSON serializado pela
+    aplicação) para o tipo JSON. Também corrige as respostas já armazenadas no
+    cache de extrações, que guardavam essas listas como texto.
+    """
+    columns = ", ".join(LIST_COLUMNS)
+    rows = connection.execute(text(f"SELECT id, {columns} FROM contracts")).mappings().all()
+    for row in rows:
+        values = {column: json.dumps(as_json_list(row[column])) for column in LIST_COLUMNS}
+        if any(values[column] != row[column] for column in LIST_COLUMNS):
+            assignments = ", ".join(f"{column} = :{column}" for column in LIST_COLUMNS)
+            connection.execute(
+                text(f"UPDATE contracts SET {assignments} WHERE id = :id"), {**values, "id": row["id"]}
+            )
+
+    # No SQLite o tipo JSON é armazenado como texto; nos demais bancos a coluna é convertida
+    if connection.dialect.name != "sqlite":
+        for column in LIST_COLUMNS:
+            connection.execute(
+                text(f"ALTER TABLE contracts ALTER COLUMN {column} TYPE JSON USING {column}::json")
+            )
+
+    entries = connection.execute(text("SELECT key, result FROM extraction_cache")).mappings().all()
+    for entry in entries:
+        result = json.loads(entry["result"])
+        if any(isinstance(result.get(column), str) for column in LIST_COLUMNS):
+            for column in LIST_COLUMNS:
+                if column in result:
+                    result[column] = as_json_list(result[column])
+            connection.execute(
+                text("UPDATE extraction_cache SET result = :result WHERE key = :key"),
+                {"result": json.dumps(result), "key": entry["key"]},
+            )
+
+
+def migrate_search_index(connection: Connection):
+    """
+    Cria o índice de busca textual em bancos existentes e indexa os contratos
+    já gravados. Antes, regrava as listas que foram serializadas com os acentos
+    escapados ("\\u00e7"), que o índice não reconheceria como texto.
+
+    As linhas são regravadas antes de o índice e os gatilhos existirem: o gatilho
+    de atualização enviaria ao FTS5 um 'delete' de linhas nunca indexadas, o que
+    corrompe um índice de conteúdo externo.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    connection.execute(text("DROP TRIGGER IF EXISTS contracts_fts_update"))
+    columns = ", ".join(LIST_COLUMNS)
+    rows = connection.execute(text(f"SELECT id, {columns} FROM contracts")).mappings().all()
+    for row in rows:
+        values = {
+            column: json_serializer(json.loads(row[column])) if row[column] is not None else None
+            for column in LIST_COLUMNS
+        }
+        if any(values[column] != row[column] for column in LIST_COLUMNS):
+            assignments = ", ".join(f"{column} = :{column}" for column in LIST_COLUMNS)
+            connection.execute(
+                text(f"UPDATE contracts SET {assignments} WHERE id = :id"), {**values, "id": row["id"]}
+            )
+
+    create_search_index(connection)
+    connection.execute(text("INSERT INTO contracts_fts(contracts_fts) VALUES ('rebuild')"))
+
+
+def migrate_contract_text_hash(connection: Connection):
+    """
+    Adiciona a referência ao texto extraído (`contract_texts`) em `contracts`.
+    A tabela `contract_texts` é criada por `create_all`; contratos anteriores
+    ficam sem texto armazenado.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("contracts")}
+    if "text_hash" not in columns:
+        connection.execute(text(
+            "ALTER TABLE contracts ADD COLUMN text_hash VARCHAR REFERENCES contract_texts (hash)"
+        ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_contracts_text_hash ON contracts (text_hash)"
+    ))
+
+
+def migrate_contract_versions(connection: Connection):
+    """
+    Adiciona o versionamento de contratos: `version` e `previous_id` em `contracts`
+    e o contrato revisado (`revises_id`) em `analysis_jobs`. Contratos anteriores
+    ficam na versão 1.
+    """
+    inspector = inspect(connection)
+    columns = {column["name"] for column in inspector.get_columns("contracts")}
+    if "version" not in columns:
+        connection.execute(text("ALTER TABLE contracts ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+    if "previous_id" not in columns:
+        connection.execute(text(
+            "ALTER TABLE contracts ADD COLUMN previous_id INTEGER REFERENCES contracts (id)"
+        ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_contracts_previous_id ON contracts (previous_id)"
+    ))
+
+    job_columns = {column["name"] for column in inspector.get_columns("analysis_jobs")}
+    if "revises_id" not in job_columns:
+        connection.execute(text(
+            "ALTER TABLE analysis_jobs ADD COLUMN revises_id INTEGER REFERENCES contracts (id)"
+        ))
+
+
+def migrate_contract_updated_at(connection: Connection):
+    """
+    Adiciona `updated_at` em `contracts`. Contratos anteriores recebem o horário
+    da migração, entrando na próxima exportação incremental.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("contracts")}
+    if "updated_at" not in columns:
+        connection.execute(text("ALTER TABLE contracts ADD COLUMN updated_at DATETIME"))
+    connection.execute(
+        text("UPDATE contracts SET updated_at = :now WHERE updated_at IS NULL"),
+        {"now": datetime.utcnow().isoformat(sep=" ")},
+    )
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_contracts_updated_at ON contracts (updated_at)"
+    ))
+
+
+def migrate_contract_values(connection: Connection):
+    """
+    Adiciona o valor normalizado (`valor_centavos` e `moeda`) em `contracts`,
+    calculado a partir do `valor_bens` dos contratos existentes, e calcula os
+    totais por moeda e por parte, mantidos a partir daqui pelos gatilhos.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("contracts")}
+    if "valor_centavos" not in columns:
+        connection.execute(text("ALTER TABLE contracts ADD COLUMN valor_centavos BIGINT"))
+    if "moeda" not in columns:
+        connection.execute(text("ALTER TABLE contracts ADD COLUMN moeda VARCHAR(3)"))
+
+    rows = connection.execute(text("SELECT id, valor_bens FROM contracts")).all()
+    values = []
+    for row in rows:
+        cents, currency = parse_amount(row.valor_bens)
+        if cents is not None:
+            values.append({"id": row.id, "cents": cents, "currency": currency})
+    if values:
+        connection.execute(
+            text("UPDATE contracts SET valor_centavos = :cents, moeda = :currency WHERE id = :id"), values
+        )
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_contracts_moeda_valor ON contracts (moeda, valor_centavos)"
+    ))
+
+    create_totals_triggers(connection)
+    if connection.dialect.name == "sqlite":
+        rebuild_totals(connection)
+
+
+def migrate_job_leases(connection: Connection):
+    """
+    Adiciona a reserva de jobs (`claimed_by`) e o sinal de vida (`heartbeat_at`)
+    em `analysis_jobs`. Jobs em execução antes da migração não têm sinal de vida
+    e são retomados na próxima inicialização.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("analysis_jobs")}
+    if "claimed_by" not in columns:
+        connection.execute(text("ALTER TABLE analysis_jobs ADD COLUMN claimed_by VARCHAR"))
+    if "heartbeat_at" not in columns:
+        connection.execute(text("ALTER TABLE analysis_jobs ADD COLUMN heartbeat_at DATETIME"))
+
+
+def migrate_job_files(connection: Connection):
+    """
+    Os arquivos dos jobs assíncronos passam do banco (`payload`) para
+    `JOBS_SPOOL_DIR`, referenciados por `payload_path`. Os jobs ainda não
+    concluídos têm o conteúdo copiado para disco antes da remoção da coluna.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("analysis_jobs")}
+    if "payload_path" not in columns:
+        connection.execute(text("ALTER TABLE analysis_jobs ADD COLUMN payload_path VARCHAR"))
+    if "payload" not in columns:
+        return
+
+    rows = connection.execute(
+        text("SELECT id, filename, payload FROM analysis_jobs WHERE payload IS NOT NULL")
+    ).all()
+    if rows:
+        os.makedirs(JOBS_SPOOL_DIR, exist_ok=True)
+    for job_id, filename, payload in rows:
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename or "")[1], dir=JOBS_SPOOL_DIR)
+        with os.fdopen(fd, "wb") as out:
+            out.write(payload)
+        connection.execute(
+            text("UPDATE analysis_jobs SET payload_path = :path WHERE id = :id"), {"path": path, "id": job_id}
+        )
+    connection.execute(text("ALTER TABLE analysis_jobs DROP COLUMN payload"))
+
+
+def migrate_contract_parties(connection: Connection):
+    """
+    Preenche `contract_parties` (criada por `create_all`) com as partes dos
+    contratos existentes e cria os gatilhos que a mantêm.
+    """
+    create_party_index(connection)
+    if connection.dialect.name == "sqlite":
+        rebuild_party_index(connection)
+
+
+def migrate_contract_values_reparse(connection: Connection):
+    """
+    Recalcula `valor_centavos` e `moeda` dos contratos cujo valor mudou com a
+    correção de `parse_amount` (valores em "€" eram lidos como reais). Os
+    gatilhos de `contracts` ajustam os totais de cada linha alterada.
+    """
+    rows = connection.execute(text("SELECT id, valor_bens, valor_centavos, moeda FROM contracts")).all()
+    values = []
+    for row in rows:
+        cents, currency = parse_amount(row.valor_bens)
+        if (cents, currency) != (row.valor_centavos, row.moeda):
+            values.append({"id": row.id, "cents": cents, "currency": currency})
+    if values:
+        connection.execute(
+            text("UPDATE contracts SET valor_centavos = :cents, moeda = :currency WHERE id = :id"), values
+        )
+
+
+# Migrações em ordem de aplicação: (versão, nome, função)
+MIGRATIONS = [
+    (1, "json_list_columns", migrate_json_list_columns),
+    (2, "contracts_search_index", migrate_search_index),
+    (3, "contract_text_hash", migrate_contract_text_hash),
+    (4, "contract_versions", migrate_contract_versions),
+    (5, "contract_updated_at", migrate_contract_updated_at),
+    (6, "contract_values", migrate_contract_values),
+    (7, "job_leases", migrate_job_leases),
+    (8, "job_files", migrate_job_files),
+    (9, "contract_parties", migrate_contract_parties),
+    (10, "contract_values_reparse", migrate_contract_values_reparse),
+]
+
+
+def run_migrations(bind: Engine = engine) -> list[str]:
+    """
+    Cria as tabelas ausentes e aplica as migrações ainda não registradas em
+    `schema_migrations`, cada uma em sua própria transação. Retorna os nomes
+    das migrações aplicadas.
+    """
+    Base.metadata.create_all(bind=bind)
+
+    with bind.connect() as connection:
+        applied = set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+    applied_now = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with bind.begin() as connection:
+            migrate(connection)
+            connection.execute(
+                SchemaMigration.__table__.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()
+                )
+            )
+        applied_now.append(name)
+
+    return applied_now
+
+
+def main():
+    """
+    Etapa de inicialização do banco, executada uma vez antes de subir os workers
+    (a aplicação não cria tabelas ao ser importada):
+
+        python -m app.migrations
+    """
+    applied = run_migrations()
+    print(f"Migrações aplicadas: {', '.join(applied)}" if applied else "Banco de dados já atualizado.")
+
+
+if __name__ == "__main__":
+    main()
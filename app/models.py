@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, LargeBinary, JSON, ForeignKey, Index, event
+from datetime import datetime
 from .database import Base
+from .money import parse_amount
 
 
 class Contract(Base):
@@ -7,11 +9,121 @@ class Contract(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, index=True)
-    contratante = Column(Text)
-    contratado = Column(Text)
+    # Listas armazenadas como JSON nativo do banco, consultáveis via SQL
+    # (ex.: json_each no SQLite) e sem serialização adicional na aplicação
+    contratante = Column(JSON)
+    contratado = Column(JSON)
     valor_bens = Column(Text)
-    obrigacoes_contratante = Column(Text)
-    obrigacoes_contratada = Column(Text)
-    objeto = Column(Text)
+    # Valor normalizado a partir de `valor_bens` (que mantém o texto extraído):
+    # centavos e código da moeda, nulos quando o texto não tem um valor reconhecível
+    valor_centavos = Column(BigInteger)
+    moeda = Column(String(3))
+    obrigacoes_contratante = Column(JSON)
+    obrigacoes_contratada = Column(JSON)
+    objeto = Column(JSON)
     vigencia = Column(Text)
     clausula_rescisao = Column(Text)
+    # Texto extraído do documento, usado para reanalisar o contrato sem o arquivo original
+    text_hash = Column(String, ForeignKey("contract_texts.hash"), index=True)
+    # Versões de um mesmo contrato: cada nova versão aponta para a anterior
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    previous_id = Column(Integer, ForeignKey("contracts.id"), index=True)
+    # Última gravação (inclusive reanálises), usada na exportação incremental
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    # Filtros por faixa de valor sempre informam a moeda
+    __table_args__ = (Index("ix_contracts_moeda_valor", "moeda", "valor_centavos"),)
+
+
+@event.listens_for(Contract, "before_insert")
+@event.listens_for(Contract, "before_update")
+def _normalize_value(mapper, connection, target):
+    target.valor_centavos, target.moeda = parse_amount(target.valor_bens)
+
+
+class ContractTotal(Base):
+    __tablename__ = "contract_totals"
+
+    # Totais dos contratos com valor normalizado, por moeda, mantidos por gatilhos
+    # em `contracts` (ver `aggregates.py`)
+    moeda = Column(String(3), primary_key=True)
+    contracts = Column(Integer, nullable=False, default=0)
+    valor_centavos = Column(BigInteger, nullable=False, default=0)
+
+
+class ContractParty(Base):
+    __tablename__ = "contract_parties"
+
+    # Partes de cada contrato, uma linha por nome (em minúsculas) e papel, mantidas
+    # por gatilhos em `contracts` (ver `search.py`). A chave primária é o índice
+    # usado pelos filtros `contratante` e `contratado` da listagem e da exportação
+    role = Column(String, primary_key=True)
+    party_lower = Column(String, primary_key=True)
+    contract_id = Column(Integer, primary_key=True)
+
+
+class ContractPartyTotal(Base):
+    __tablename__ = "contract_party_totals"
+
+    # Totais por parte: `role` é "contratante" ou "contratado", e cada contrato
+    # conta, com o valor inteiro, para todas as partes listadas naquele papel
+    role = Column(String, primary_key=True)
+    party = Column(String, primary_key=True)
+    moeda = Column(String(3), primary_key=True)
+    contracts = Column(Integer, nullable=False, default=0)
+    valor_centavos = Column(BigInteger, nullable=False, default=0)
+
+    # Maiores totais de um papel em uma moeda
+    __table_args__ = (Index("ix_contract_party_totals_ranking", "role", "moeda", "valor_centavos"),)
+
+
+class ContractText(Base):
+    __tablename__ = "contract_texts"
+
+    # Mesma chave do cache de extrações: "text:<sha256 do texto normalizado>"
+    hash = Column(String, primary_key=True)
+    # Texto comprimido com zlib
+    content = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+    compressed_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ExtractionCacheEntry(Base):
+    __tablename__ = "extraction_cache"
+
+    # Chave no formato "file:<sha256 dos bytes>" ou "text:<sha256 do texto normalizado>",
+    # seguida de "@<id do contrato anterior>" nas análises de novas versões
+    key = Column(String, primary_key=True)
+    result = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String, primary_key=True)
+    owner = Column(String, index=True)
+    filename = Column(String)
+    status = Column(String, index=True, nullable=False)
+    # Caminho do arquivo enviado (em `JOBS_SPOOL_DIR`), mantido apenas até o fim do
+    # processamento para que análises interrompidas possam ser retomadas após reinicialização
+    payload_path = Column(String)
+    # Contrato do qual o documento enviado é uma nova versão
+    revises_id = Column(Integer, ForeignKey("contracts.id"))
+    # Execução que reservou o job e o último sinal de vida dela: jobs em execução
+    # só são retomados depois que o sinal de vida expira
+    claimed_by = Column(String)
+    heartbeat_at = Column(DateTime)
+    error = Column(Text)
+    contract_id = Column(Integer, ForeignKey("contracts.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
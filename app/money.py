@@ -0,0 +1,84 @@
+from decimal import Decimal, InvalidOperation
+import re
+import unicodedata
+
+
+# Símbolos e códigos de moeda reconhecidos antes do número ("R$ 1.500,00", "USD 300")
+CURRENCY_PREFIXES = {"R$": "BRL", "BRL": "BRL", "US$": "USD", "U$": "USD", "USD": "USD", "€": "EUR", "EUR": "EUR"}
+# Nomes de moeda por extenso depois do número ("1.500 reais"), sem acentos
+CURRENCY_WORDS = {"REAL": "BRL", "REAIS": "BRL", "DOLAR": "USD", "DOLARES": "USD", "EURO": "EUR", "EUROS": "EUR"}
+# Multiplicadores por extenso ("R$ 2,5 milhões"), sem acentos
+MULTIPLIERS = {"MIL": 1_000, "MILHAO": 1_000_000, "MILHOES": 1_000_000, "BILHAO": 1_000_000_000, "BILHOES": 1_000_000_000}
+
+NUMBER = r"\d{1,3}(?:[.,\s]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?"
+AMOUNT = re.compile(
+    rf"(?P<prefix>R\$|US\$|U\$|€|\b(?:BRL|USD|EUR)\b)?\s*(?P<number>{NUMBER})"
+    rf"(?:\s+(?P<multiplier>{'|'.join(MULTIPLIERS)})\b)?"
+    rf"(?:\s+(?:DE\s+)?(?P<word>{'|'.join(CURRENCY_WORDS)})\b)?"
+)
+
+
+def strip_accents(text: str) -> str:
+    # Remove apenas os acentos (marcas combinantes), preservando símbolos como "€"
+    return "".join(
+        char for char in unicodedata.normalize("NFKD", text) if unicodedata.category(char) != "Mn"
+    )
+
+
+def parse_number(number: str) -> Decimal:
+    """
+    Interpreta o número no formato brasileiro ("1.500,00") ou internacional
+    ("1,500.00"): havendo os dois separadores, o último é o decimal; havendo
+    só um, é decimal apenas quando seguido de uma ou duas casas ("1.500" é mil e quinhentos).
+    """
+    number = re.sub(r"\s", "", number)
+    separators = [char for char in number if char in ".,"]
+    if not separators:
+        return Decimal(number)
+    decimal_separator = separators[-1]
+    integer, _, fraction = number.rpartition(decimal_separator)
+    if len(set(separators)) == 1 and (len(separators) > 1 or len(fraction) == 3):
+        # Apenas separadores de milhar
+        integer, fraction = number, ""
+    integer = re.sub(r"[.,]", "", integer)
+    return Decimal(f"{integer}.{fraction}" if fraction else integer)
+
+
+def parse_amount(text: str | None) -> tuple[int | None, str | None]:
+    """
+    Normaliza o valor extraído pelo modelo (texto livre) em centavos e código
+    da moeda: "R$ 1.500,00 (mil e quinhentos reais)" vira `(150000, "BRL")`.
+
+    Usa o primeiro valor acompanhado de uma moeda; sem nenhum, um número isolado
+    é considerado em reais. Retorna `(None, None)` quando não há valor reconhecível
+    ("Não especificado", "conforme tabela anexa"), e o texto original continua em `valor_bens`.
+    """
+    if not text:
+        return None, None
+    normalized = strip_accents(text).upper()
+
+    candidates = []
+    for match in AMOUNT.finditer(normalized):
+        prefix, word = match.group("prefix"), match.group("word")
+        currency = CURRENCY_PREFIXES.get(prefix) or CURRENCY_WORDS.get(word)
+        candidates.append((currency, match))
+        if currency:
+            break
+
+    if not candidates:
+        return None, None
+    currency, match = candidates[-1]
+    if currency is None:
+        # Sem moeda, apenas um número isolado é aceito: "50000" ou "50.000,00", mas não
+        # "24 meses" ou "cláusula 5"
+        if len(candidates) > 1 or match.group(0).strip() != normalized.strip(" .;"):
+            return None, None
+        currency = "BRL"
+
+    try:
+        value = parse_number(match.group("number"))
+    except InvalidOperation:
+        return None, None
+    if match.group("multiplier"):
+        value *= MULTIPLIERS[match.group("multiplier")]
+    return int((value * 100).to_integral_value()), currency
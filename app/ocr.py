@@ -0,0 +1,148 @@
+from concurrent.futures import ProcessPoolExecutor
+from .cache import LRUCache
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pymupdf
+
+logger = logging.getLogger(__name__)
+
+
+# Desativa o OCR de páginas escaneadas quando "false"
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() != "false"
+# Idioma(s) do Tesseract, no formato "por" ou "por+eng"
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "por")
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+# Diretório dos modelos do Tesseract; sem valor, usa a variável TESSDATA_PREFIX
+OCR_TESSDATA = os.getenv("OCR_TESSDATA") or None
+# Processos usados no OCR (0 ou 1 executa no próprio worker)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+# Páginas reconhecidas mantidas em memória por processo
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "1024"))
+
+_page_cache = LRUCache(OCR_CACHE_SIZE)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def needs_ocr(page: "pymupdf.Page", blocks: list[tuple]) -> bool:
+    """
+    Páginas sem nenhum bloco de texto (tipo 0), mas com imagens: provavelmente escaneadas.
+    """
+    return not any(block[4].strip() for block in blocks) and bool(page.get_images())
+
+
+def page_hash(reader: "pymupdf.Document", page: "pymupdf.Page") -> str:
+    """
+    Identifica a página pelo conteúdo desenhado e pelas imagens que ela usa,
+    sem renderizá-la. A mesma página escaneada em outro arquivo tem o mesmo hash.
+    """
+    digest = hashlib.sha256(page.read_contents())
+    for image in page.get_images():
+        digest.update(reader.xref_stream_raw(image[0]) or b"")
+    digest.update(f"{OCR_LANGUAGE}:{OCR_DPI}".encode())
+    return digest.hexdigest()
+
+
+def ocr_page_blocks(source: str | bytes, page_numbers: list[int]) -> list[list[tuple]]:
+    """
+    Reconhece o texto das páginas indicadas e retorna seus blocos `(x0, y0, x1, y1, conteúdo)`.
+
+    Executada nos processos do pool: recebe o caminho do arquivo (ou o conteúdo)
+    e abre o documento uma única vez para todas as páginas do grupo.
+    """
+    import pymupdf
+
+    if isinstance(source, str):
+        reader = pymupdf.open(source, filetype="pdf")
+    else:
+        reader = pymupdf.open(stream=source, filetype="pdf")
+
+    results = []
+    try:
+        for number in page_numbers:
+            page = reader[number]
+            textpage = page.get_textpage_ocr(
+                language=OCR_LANGUAGE, dpi=OCR_DPI, full=True, tessdata=OCR_TESSDATA
+            )
+            results.append([
+                (x0, y0, x1, y1, content)
+                for x0, y0, x1, y1, content, _, block_type in page.get_text("blocks", textpage=textpage)
+                if block_type == 0
+            ])
+    finally:
+        reader.close()
+    return results
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def ocr_pages(source: str | bytes, reader: "pymupdf.Document", page_numbers: list[int]) -> dict[int, list[tuple]]:
+    """
+    Executa o OCR das páginas indicadas e retorna `{número da página: blocos}`.
+
+    Páginas já reconhecidas são servidas do cache. As demais são divididas em
+    um grupo por processo, executados em paralelo: o tempo total é o do grupo
+    mais lento, e não a soma de todas as páginas. Falhas (ex.: Tesseract não
+    instalado) são registradas e deixam a página sem texto.
+    """
+    results, hashes, missing = {}, {}, []
+    for number in page_numbers:
+        hashes[number] = page_hash(reader, reader[number])
+        cached = _page_cache.get(hashes[number])
+        if cached is not None:
+            results[number] = cached
+        else:
+            missing.append(number)
+
+    if not missing:
+        return results
+
+    # Dentro de um processo do pool de extração em lote os documentos já são
+    # processados em paralelo; um segundo nível de processos só competiria pelos núcleos
+    workers = min(OCR_WORKERS, len(missing))
+    if multiprocessing.parent_process() is not None:
+        workers = 1
+
+    groups = [missing[i::workers] for i in range(workers)] if workers > 1 else [missing]
+    try:
+        if workers > 1:
+            executor = get_executor()
+            futures = [executor.submit(ocr_page_blocks, source, group) for group in groups]
+            recognized = [future.result() for future in futures]
+        else:
+            recognized = [ocr_page_blocks(source, missing)]
+    except Exception as e:
+        logger.warning("Falha no OCR de %d páginas: %s", len(missing), e)
+        return results
+
+    for group, blocks in zip(groups, recognized):
+        for number, page_blocks in zip(group, blocks):
+            _page_cache.set(hashes[number], page_blocks)
+            results[number] = page_blocks
+
+    logger.info("OCR: %d páginas reconhecidas, %d do cache", len(missing), len(page_numbers) - len(missing))
+    return results
+
+
+def clear_cache():
+    _page_cache.clear()
@@ -0,0 +1,259 @@
+"""
+Extração de texto dos documentos (PDF e DOCX), fora do processo do uvicorn.
+
+Cada documento é extraído em um processo próprio, que termina com ele: na
+prática, um pool que recicla os processos a cada documento, sem configuração
+para reaproveitá-los por mais de um. É intencional: um documento que excede o
+prazo, ou derruba o MuPDF, encerra apenas o seu processo, enquanto em um pool
+de processos de longa duração o timeout encerraria o pool inteiro e as demais
+extrações em andamento; e nenhuma memória do MuPDF acumula entre documentos.
+
+O custo é um fork por documento (alguns milissegundos com o "forkserver", que
+já tem este módulo e o PyMuPDF importados; algumas centenas com "spawn", onde
+não há forkserver) e a reabertura, a cada documento, do estado interno do
+MuPDF (fontes e caches), irrelevante diante do tempo de extração de um contrato.
+"""
+
+from .pruning import PRUNE_REPEATED_BLOCKS, prune_repeated_blocks
+from .ocr import OCR_ENABLED, needs_ocr, ocr_pages
+from .docx_text import iter_docx_text
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Documentos extraídos simultaneamente, cada um em um processo próprio (0 executa na
+# própria thread da requisição). A extração do PyMuPDF mantém o GIL; fora do processo
+# do uvicorn ela não atrasa as demais rotas
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+# Tempo máximo, em segundos, da extração de um documento, contado a partir do início
+# do seu processo (a espera por uma vaga não conta)
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "120"))
+# Tempo máximo de espera por uma vaga, com todos os processos ocupados
+PARSE_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PARSE_QUEUE_TIMEOUT_SECONDS", str(PARSE_TIMEOUT_SECONDS)))
+
+_context = None
+_slots = None
+_running = set()
+_lock = threading.Lock()
+
+
+class ParseTimeoutError(Exception):
+    """
+    A extração não terminou no prazo. `queued` indica que o documento ainda
+    aguardava uma vaga (todos os processos de extração estão ocupados).
+    """
+
+    def __init__(self, seconds: float, queued: bool):
+        self.seconds = seconds
+        self.queued = queued
+        super().__init__(f"A extração de texto excedeu o limite de {seconds:.0f} segundos.")
+
+
+def extract_pdf_text(source: str | bytes, on_page=None) -> str:
+    # `on_page(página, total)` é chamado após a leitura de cada página (progresso do upload)
+    # Abrir pelo caminho permite ao PyMuPDF ler o arquivo sob demanda,
+    # sem manter uma cópia completa do documento em memória
+    import pymupdf
+
+    if isinstance(source, str):
+        reader = pymupdf.open(source, filetype="pdf")
+    else:
+        reader = pymupdf.open(stream=source, filetype="pdf")
+    pages, sizes = [], []
+
+    for number, page in enumerate(reader.pages(), start=1):
+        sizes.append((page.rect.width, page.rect.height))
+        page_blocks = []
+        for block in page.get_text(option="blocks"):
+            x0, y0, x1, y1, content, _, block_type = block
+            if block_type == 0:
+                # https://pymupdf.readthedocs.io/en/latest/textpage.html#TextPage.extractBLOCKS
+                #
+                # Blocks do tipo 0 são aqueles identificados como sendo de texto puro
+                # Desta forma eliminamos a necessidade de consumir blocos de imagens
+                # -- e a possibilidade de passar metadados delas -- como conteúdo
+                # de texto para o modelo avaliar
+                #
+                # A abordagem de iterar sobre os blocos também pode se mostrar útil para facilitar o
+                # descarte de pedaços do documento, como páginas e metadados de rodapé e de assinatura digital
+                #
+                # Essas decisões de projeto devem resultar em um consumo menor de tokens e
+                # aumentar a qualidade da resposta
+
+                page_blocks.append((x0, y0, x1, y1, content))
+        pages.append(page_blocks)
+        if on_page is not None:
+            on_page(number, reader.page_count)
+
+    # Contratos em PDF:
+    # 1. Firmados em texto puro ✔
+    # 2. Escaneados ✔
+    # 2.1 O PyMuPDF tem suporte de compatibilidade com o Tesseract
+    #     https://pymupdf.readthedocs.io/en/latest/installation.html#installation-ocr
+    #
+    # Apenas as páginas sem nenhum bloco de texto passam pelo OCR, de modo que
+    # um contrato digital com um anexo escaneado não é reconhecido por inteiro
+    if OCR_ENABLED:
+        scanned = [i for i, page in enumerate(reader.pages()) if needs_ocr(page, pages[i])]
+        if scanned:
+            for number, blocks in ocr_pages(source, reader, scanned).items():
+                pages[number] = blocks
+    reader.close()
+
+    # Cabeçalhos, rodapés, numeração de páginas e carimbos de assinatura
+    # se repetem em todas as páginas e não trazem informação para a análise
+    if PRUNE_REPEATED_BLOCKS:
+        pages, stats = prune_repeated_blocks(pages, sizes)
+        logger.info(
+            "Poda de blocos repetidos: %d blocos, %d caracteres (~%d tokens) removidos",
+            stats["blocks"], stats["chars"], stats["tokens"],
+        )
+
+    # Quebra de página (\f) entre as páginas, usada como ponto de corte
+    # preferencial na divisão de contratos longos em trechos
+    return "\n\f\n".join(
+        "\n".join(block[4].strip() for block in page) for page in pages
+    )
+
+
+def extract_docx_text(stream) -> str:
+    # Leitura incremental do XML do documento, incluindo o texto das tabelas
+    # (valores e prazos costumam estar nelas), sem o modelo de objetos do python-docx
+    return "\n".join(iter_docx_text(stream))
+
+
+def parse_document(filename: str, source: str | bytes, on_page=None) -> str:
+    """
+    Versão de `extract_text_from_file` sem dependência de `UploadFile`,
+    com entradas (caminho ou conteúdo do arquivo) e saída serializáveis
+    para execução em outro processo.
+    """
+    if filename.endswith(".pdf"):
+        return extract_pdf_text(source, on_page)
+    elif filename.endswith(".docx"):
+        return extract_docx_text(source if isinstance(source, str) else io.BytesIO(source))
+    raise ValueError("Formato de arquivo inválido. Somente arquivos .pdf e .docx são aceitos.")
+
+
+def parse_in_child(connection, filename: str, source: str | bytes, report_progress: bool):
+    # Executada no processo do documento; progresso, resultado e erros voltam pelo `connection`
+    on_page = None
+    if report_progress:
+        on_page = lambda page, pages: connection.send(("page", (page, pages)))  # noqa: E731
+    try:
+        connection.send(("done", parse_document(filename, source, on_page)))
+    except Exception as e:
+        try:
+            connection.send(("error", e))
+        except Exception:
+            # Exceções que não podem ser serializadas
+            connection.send(("error", RuntimeError(str(e))))
+    finally:
+        connection.close()
+
+
+def get_context():
+    """
+    Contexto dos processos de extração. Com "forkserver", cada documento é um
+    fork de um servidor de processos de uma única thread, iniciado uma vez com
+    este módulo já importado: criar um processo por documento custa poucos
+    milissegundos, e o fork não copia o estado das threads do uvicorn.
+    """
+    global _context
+    with _lock:
+        if _context is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                _context = multiprocessing.get_context("forkserver")
+                _context.set_forkserver_preload([__name__, "pymupdf"])
+            else:
+                _context = multiprocessing.get_context("spawn")
+        return _context
+
+
+def get_slots() -> threading.BoundedSemaphore:
+    global _slots
+    with _lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(max(1, PARSE_WORKERS))
+        return _slots
+
+
+def shutdown():
+    """
+    Encerra as extrações em andamento (ex.: no desligamento do serviço).
+    """
+    global _slots
+    with _lock:
+        running = list(_running)
+        _slots = None
+    for process in running:
+        process.terminate()
+
+
+def parse(filename: str, source: str | bytes, on_page=None, timeout: float = PARSE_TIMEOUT_SECONDS) -> str:
+    """
+    Extrai o texto de um documento `(nome, caminho ou conteúdo)` em um processo
+    próprio, com no máximo `PARSE_WORKERS` extrações ao mesmo tempo.
+
+    Um documento que excede `timeout` (ex.: extração presa em um PDF malformado)
+    tem apenas o seu processo encerrado; os demais seguem normalmente. O mesmo
+    vale para uma falha do MuPDF que derrube o processo.
+    """
+    # Dentro de um processo filho (ex.: extração de outro documento) não se cria um segundo nível de processos
+    if PARSE_WORKERS <= 0 or multiprocessing.parent_process() is not None:
+        return parse_document(filename, source, on_page)
+
+    slots = get_slots()
+    if not slots.acquire(timeout=PARSE_QUEUE_TIMEOUT_SECONDS):
+        raise ParseTimeoutError(PARSE_QUEUE_TIMEOUT_SECONDS, queued=True)
+    try:
+        return parse_in_process(filename, source, on_page, timeout)
+    finally:
+        slots.release()
+
+
+def parse_in_process(filename: str, source: str | bytes, on_page, timeout: float) -> str:
+    context = get_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=parse_in_child, args=(sender, filename, source, on_page is not None), daemon=True
+    )
+    process.start()
+    sender.close()
+    with _lock:
+        _running.add(process)
+
+    # O prazo começa com o processo, e não com a chamada
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not receiver.poll(remaining):
+                raise ParseTimeoutError(timeout, queued=False)
+            try:
+                kind, value = receiver.recv()
+            except EOFError:
+                process.join()
+                raise RuntimeError(
+                    f"O processo de extração terminou inesperadamente (código {process.exitcode})."
+                )
+            if kind == "page":
+                on_page(*value)
+            elif kind == "error":
+                raise value
+            else:
+                return value
+    finally:
+        receiver.close()
+        # Com o resultado recebido o processo já está terminando; no timeout, é interrompido
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        with _lock:
+            _running.discard(process)
@@ -0,0 +1,112 @@
+from collections import Counter
+from .chunking import estimate_tokens
+import math
+import os
+import re
+
+
+# Desativa a remoção de cabeçalhos, rodapés e carimbos de assinatura quando "false"
+PRUNE_REPEATED_BLOCKS = os.getenv("PRUNE_REPEATED_BLOCKS", "true").lower() != "false"
+# Fração mínima das páginas em que um bloco precisa se repetir para ser descartado
+REPEATED_BLOCK_RATIO = float(os.getenv("REPEATED_BLOCK_RATIO", "0.5"))
+# Tolerância, em pontos, para considerar dois blocos na mesma posição
+POSITION_GRID = 10
+# Fração da página, a partir de cada borda, considerada margem
+PRUNE_MARGIN_RATIO = float(os.getenv("PRUNE_MARGIN_RATIO", "0.1"))
+# Tamanho máximo, em caracteres, de um carimbo ou numeração de página na margem
+MARGIN_BLOCK_MAX_CHARS = 300
+
+# Carimbos de assinatura eletrônica e de autenticação, que aparecem mesmo
+# em documentos de uma única página. Só são descartados na margem: no corpo
+# do contrato, uma cláusula pode citar a assinatura eletrônica
+SIGNATURE_PATTERNS = re.compile(
+    r"assinado (digitalmente|eletronicamente)"
+    r"|documento assinado"
+    r"|icp-brasil"
+    r"|autenticidade deste documento"
+    r"|identificador de autentica"
+    r"|c[óo]digo verificador"
+    r"|docusign envelope id"
+    r"|clicksign"
+    r"|^dn: ",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Numeração de página isolada: "3", "3 / 13", "Página 3 de 13", "- 3 -"
+PAGE_NUMBER_PATTERN = re.compile(
+    r"^[-–\s]*(p[áa]g(ina)?\.?\s*)?\d+(\s*(/|de)\s*\d+)?[-–\s]*$", re.IGNORECASE
+)
+
+
+def block_signature(block: tuple) -> tuple:
+    """
+    Identifica um bloco pela posição aproximada e pelo conteúdo, com dígitos
+    substituídos para que "1 / 13" e "2 / 13" sejam considerados o mesmo bloco.
+    """
+    x0, y0, x1, y1, content = block
+    content = re.sub(r"\d+", "#", re.sub(r"\s+", " ", content)).strip().casefold()
+    return (round(x0 / POSITION_GRID), round(y0 / POSITION_GRID), content)
+
+
+def in_margin(block: tuple, size: tuple[float, float]) -> bool:
+    # Bloco inteiramente dentro da margem superior, inferior ou lateral
+    x0, y0, x1, y1, _ = block
+    width, height = size
+    return (
+        y1 <= height * PRUNE_MARGIN_RATIO
+        or y0 >= height * (1 - PRUNE_MARGIN_RATIO)
+        or x1 <= width * PRUNE_MARGIN_RATIO
+        or x0 >= width * (1 - PRUNE_MARGIN_RATIO)
+    )
+
+
+def prune_repeated_blocks(
+    pages: list[list[tuple]], sizes: list[tuple[float, float]] | None = None
+) -> tuple[list[list[tuple]], dict]:
+    """
+    Remove dos blocos de texto `(x0, y0, x1, y1, conteúdo)` de cada página:
+    - blocos repetidos na mesma posição em boa parte das páginas (cabeçalhos e rodapés);
+    - numeração de página e carimbos de assinatura eletrônica e de autenticação,
+      quando são blocos curtos na margem da página.
+
+    `sizes` são a largura e a altura de cada página; sem elas, a página é
+    estimada pela extensão dos blocos do documento.
+
+    Retorna as páginas filtradas e um resumo do que foi removido.
+    """
+    if sizes is None:
+        blocks = [block for page in pages for block in page]
+        extent = (max((b[2] for b in blocks), default=0), max((b[3] for b in blocks), default=0))
+        sizes = [extent] * len(pages)
+
+    min_pages = max(2, math.ceil(len(pages) * REPEATED_BLOCK_RATIO))
+    counts = Counter(
+        signature
+        for page in pages
+        for signature in {block_signature(block) for block in page}
+    )
+
+    pruned, removed = [], []
+    for page, size in zip(pages, sizes):
+        kept = []
+        for block in page:
+            content = block[4].strip()
+            if not content:
+                continue
+            if (len(pages) >= 2 and counts[block_signature(block)] >= min_pages) or (
+                len(content) <= MARGIN_BLOCK_MAX_CHARS
+                and in_margin(block, size)
+                and (PAGE_NUMBER_PATTERN.match(content) or SIGNATURE_PATTERNS.search(content))
+            ):
+                removed.append(content)
+            else:
+                kept.append(block)
+        pruned.append(kept)
+
+    removed_text = "\n".join(removed)
+    stats = {
+        "blocks": len(removed),
+        "chars": len(removed_text),
+        "tokens": estimate_tokens(removed_text) if removed else 0,
+    }
+    return pruned, stats
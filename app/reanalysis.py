@@ -0,0 +1,156 @@
+"""
+Reanálise dos contratos a partir do texto armazenado em `contract_texts`.
+
+Depois de uma mudança na instrução ou no modelo de `extract_contract_info`,
+executa novamente apenas a etapa de IA: os documentos originais não são
+necessários e nenhum PDF ou DOCX é lido. Os textos são percorridos em lotes,
+e cada lote atualiza todos os contratos com o mesmo texto em uma transação.
+
+Uso:
+    python -m app.reanalysis --batch-size 50 --concurrency 8
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+from .ai_service import ModelAnswer, extract_contract_info
+from .cache import extraction_cache
+from .models import Contract, ContractText, ExtractionCacheEntry
+from .money import parse_amount
+from .response_cache import contract_responses
+from .text_store import decompress_text
+import argparse
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Textos analisados (e contratos atualizados) por transação
+REANALYSIS_BATCH_SIZE = int(os.getenv("REANALYSIS_BATCH_SIZE", "50"))
+# Chamadas simultâneas ao modelo durante a reanálise
+REANALYSIS_CONCURRENCY = int(os.getenv("REANALYSIS_CONCURRENCY", "8"))
+
+ANSWER_FIELDS = tuple(ModelAnswer.model_fields)
+# O UPDATE em massa não passa pelo evento do ORM que normaliza `valor_bens`
+UPDATED_FIELDS = (*ANSWER_FIELDS, "valor_centavos", "moeda")
+
+
+def iter_text_batches(db: Session, batch_size: int):
+    """
+    Percorre `contract_texts` em lotes, paginando pela chave primária, sem
+    carregar a tabela inteira nem manter um cursor aberto entre os commits.
+    """
+    last_hash = ""
+    while True:
+        rows = db.execute(
+            select(ContractText.hash, ContractText.content)
+            .where(ContractText.hash > last_hash)
+            .order_by(ContractText.hash)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_hash = rows[-1].hash
+
+
+def reanalyze_contracts(
+    db: Session,
+    batch_size: int = REANALYSIS_BATCH_SIZE,
+    concurrency: int = REANALYSIS_CONCURRENCY,
+) -> dict:
+    """
+    Reanalisa todos os textos armazenados e atualiza os contratos correspondentes.
+    Textos cuja análise falha mantêm os dados anteriores e são contabilizados em `failed`.
+    """
+    stats = {
+        "texts": 0,
+        "contracts": 0,
+        "failed": 0,
+        # Contratos gravados antes do armazenamento de texto não podem ser reanalisados
+        "skipped": db.scalar(select(func.count(Contract.id)).where(Contract.text_hash.is_(None))),
+    }
+
+    # As respostas em cache foram geradas com a instrução ou o modelo anterior
+    db.query(ExtractionCacheEntry).delete()
+    db.commit()
+    extraction_cache.clear()
+
+    statement = (
+        update(Contract.__table__)
+        .where(Contract.__table__.c.text_hash == bindparam("key"))
+        .values({field: bindparam(f"new_{field}") for field in UPDATED_FIELDS})
+    )
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for rows in iter_text_batches(db, batch_size):
+            futures = [
+                (row.hash, executor.submit(
+                    lambda content=row.content: extract_contract_info(decompress_text(content))
+                ))
+                for row in rows
+            ]
+
+            updates, answers = [], []
+            for key, future in futures:
+                try:
+                    info = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.warning("Falha ao reanalisar o texto %s: %s", key, e)
+                    continue
+                values = {**info}
+                values["valor_centavos"], values["moeda"] = parse_amount(info["valor_bens"])
+                updates.append({"key": key, **{f"new_{field}": values[field] for field in UPDATED_FIELDS}})
+                answers.append(((key,), info))
+
+            # Uma única instrução UPDATE, executada para todos os textos do lote
+            if updates:
+                result = db.connection().execute(statement, updates)
+                stats["contracts"] += result.rowcount
+            db.commit()
+            # O UPDATE em massa não passa pelos eventos do ORM que invalidam as respostas
+            contract_responses.clear()
+            extraction_cache.set_many(db, answers)
+
+            stats["texts"] += len(rows)
+            logger.info(
+                "Reanálise: %d textos, %d contratos atualizados, %d falhas",
+                stats["texts"], stats["contracts"], stats["failed"],
+            )
+
+    return stats
+
+
+def main():
+    from .database import SessionLocal
+    from .migrations import run_migrations
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=REANALYSIS_BATCH_SIZE, help="textos por transação")
+    parser.add_argument("--concurrency", type=int, default=REANALYSIS_CONCURRENCY, help="chamadas simultâneas à IA")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    run_migrations()
+
+    db = SessionLocal()
+    try:
+        original, compressed = db.execute(select(
+            func.coalesce(func.sum(ContractText.size), 0),
+            func.coalesce(func.sum(ContractText.compressed_size), 0),
+        )).one()
+        logger.info("Textos armazenados: %d bytes, %d comprimidos", original, compressed)
+
+        stats = reanalyze_contracts(db, args.batch_size, args.concurrency)
+    finally:
+        db.close()
+
+    print(
+        f"{stats['texts']} textos reanalisados, {stats['contracts']} contratos atualizados, "
+        f"{stats['failed']} falhas, {stats['skipped']} contratos sem texto armazenado"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from .cache import LRUCache
+from .models import Contract
+import hashlib
+import os
+import threading
+import time
+
+
+# Respostas de `GET /contracts/{filename}` mantidas em memória por processo
+CONTRACT_RESPONSE_CACHE_SIZE = int(os.getenv("CONTRACT_RESPONSE_CACHE_SIZE", "1024"))
+# Validade, em segundos, de uma resposta em cache. A invalidação após uma gravação
+# é imediata apenas no processo que gravou; nos demais workers vale este prazo
+CONTRACT_RESPONSE_CACHE_TTL = float(os.getenv("CONTRACT_RESPONSE_CACHE_TTL", "30"))
+# Com "no-cache" o cliente pode guardar a resposta, mas revalida (If-None-Match) a cada uso
+CONTRACT_CACHE_CONTROL = os.getenv("CONTRACT_CACHE_CONTROL", "private, no-cache")
+
+
+class CachedResponse:
+    def __init__(self, body: bytes, etag: str, stored_at: float):
+        self.body = body
+        self.etag = etag
+        self.stored_at = stored_at
+
+
+def make_etag(body: bytes) -> str:
+    # ETag forte: derivado dos bytes exatos da resposta
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Compara o cabeçalho If-None-Match (lista de ETags ou "*") com o ETag atual.
+    Em If-None-Match a comparação é fraca: o prefixo "W/" é ignorado.
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ResponseCache:
+    """
+    Respostas já serializadas, indexadas pelo nome do arquivo. Leituras repetidas
+    não consultam o banco nem serializam o modelo Pydantic novamente.
+
+    Cada nome tem uma geração, incrementada a cada invalidação (e todas de uma vez
+    por `clear`). Quem lê o banco obtém a geração antes da consulta e a informa em
+    `set`: se uma gravação foi confirmada no meio tempo, a resposta lida (talvez
+    anterior a ela) é devolvida, mas não armazenada.
+    """
+
+    def __init__(self, maxsize: int = CONTRACT_RESPONSE_CACHE_SIZE, ttl: float = CONTRACT_RESPONSE_CACHE_TTL):
+        self._entries = LRUCache(maxsize)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._generations = {}
+
+    def get(self, filename: str) -> CachedResponse | None:
+        entry = self._entries.get(filename)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at > self.ttl:
+            self._entries.pop(filename)
+            return None
+        return entry
+
+    def generation(self, filename: str) -> tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._generations.get(filename, 0)
+
+    def set(self, filename: str, body: bytes, generation: tuple[int, int] | None = None) -> CachedResponse:
+        entry = CachedResponse(body=body, etag=make_etag(body), stored_at=time.monotonic())
+        with self._lock:
+            if generation is None or generation == (self._epoch, self._generations.get(filename, 0)):
+                self._entries.set(filename, entry)
+        return entry
+
+    def invalidate(self, filenames):
+        with self._lock:
+            for filename in filenames:
+                self._generations[filename] = self._generations.get(filename, 0) + 1
+                self._entries.pop(filename)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._generations.clear()
+            self._entries.clear()
+
+
+contract_responses = ResponseCache()
+
+
+# Invalidação: os nomes dos contratos gravados em uma sessão são descartados do
+# cache somente após o commit, para que uma leitura simultânea não volte a
+# armazenar os dados anteriores. Atualizações em massa pelo Core (sem o ORM),
+# como a reanálise, devem chamar `contract_responses.clear()`.
+@event.listens_for(Contract, "after_insert")
+@event.listens_for(Contract, "after_update")
+@event.listens_for(Contract, "after_delete")
+def _track_contract_write(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    names = session.info.setdefault("written_contract_filenames", set())
+    names.add(target.filename)
+    # Contrato renomeado: o nome anterior também deixa de ser válido
+    names.update(inspect(target).attrs.filename.history.deleted or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_contracts(session):
+    names = session.info.pop("written_contract_filenames", None)
+    if names:
+        contract_responses.invalidate(names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_contracts(session):
+    session.info.pop("written_contract_filenames", None)
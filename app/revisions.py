@@ -0,0 +1,149 @@
+from difflib import SequenceMatcher
+from sqlalchemy.orm import Session
+from .ai_service import ModelAnswer, generate_answer
+from .cache import normalize_text
+from .chunking import LIST_FIELDS, estimate_tokens, is_empty_answer
+from .clauses import split_clauses
+from .models import Contract
+from .text_store import load_text
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+# Cláusulas vizinhas (antes e depois) enviadas junto com cada cláusula alterada
+REVISION_CONTEXT_CLAUSES = int(os.getenv("REVISION_CONTEXT_CLAUSES", "1"))
+# Acima desta fração do texto alterada, a nova versão é analisada por inteiro
+REVISION_MAX_CHANGED_RATIO = float(os.getenv("REVISION_MAX_CHANGED_RATIO", "0.5"))
+
+REVISION_INSTRUCTION = """
+            Você está recebendo as cláusulas alteradas de uma nova versão de um contrato,
+            o texto anterior dessas cláusulas e os dados extraídos da versão anterior.
+            Sua tarefa é atualizar somente os dados afetados pelas alterações:
+            1. Nome da parte contratante;
+            2. Nome da parte contratada;
+            3. Valor dos bens;
+            4. As obrigações que devem ser cumpridas pela parte contratante;
+            6. As obrigações que devem ser cumpridas pela parte contratada;
+            7. A descrição do objeto do contrato;
+            8. A vigência do contrato;
+            9. A descrição da(s) cláusula(s) de rescisão;
+            Para cada campo afetado, retorne o valor completo e atualizado (listas inteiras,
+            considerando os dados da versão anterior). Deixe vazios os campos não afetados.
+            """
+
+
+def diff_clauses(previous: list[str], current: list[str]) -> tuple[list[int], list[int]]:
+    """
+    Compara as cláusulas das duas versões (ignorando diferenças de espaçamento)
+    e retorna os índices das cláusulas removidas ou alteradas na versão anterior
+    e das incluídas ou alteradas na versão atual.
+    """
+    matcher = SequenceMatcher(
+        None, [normalize_text(c) for c in previous], [normalize_text(c) for c in current], autojunk=False
+    )
+    removed, added = [], []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            removed.extend(range(i1, i2))
+            added.extend(range(j1, j2))
+    return removed, added
+
+
+def with_neighbors(indexes: list[int], count: int, context: int) -> list[int]:
+    selected = set()
+    for index in indexes:
+        selected.update(range(max(0, index - context), min(count, index + context + 1)))
+    return sorted(selected)
+
+
+def build_revision_prompt(
+    previous_info: dict, previous: list[str], current: list[str], removed: list[int], added: list[int]
+) -> str:
+    # Cláusulas apenas removidas não têm índice na versão atual: as vizinhas
+    # do ponto de remoção são enviadas para situá-las
+    anchors = added or [min(len(current) - 1, index) for index in removed]
+    sections = [
+        "CLÁUSULAS ALTERADAS OU INCLUÍDAS NA NOVA VERSÃO (com as cláusulas vizinhas):",
+        *(current[i] for i in with_neighbors(anchors, len(current), REVISION_CONTEXT_CLAUSES)),
+    ]
+    if removed:
+        sections += [
+            "TEXTO NA VERSÃO ANTERIOR DAS CLÁUSULAS ALTERADAS OU REMOVIDAS:",
+            *(previous[i] for i in removed),
+        ]
+    sections += [
+        "DADOS EXTRAÍDOS DA VERSÃO ANTERIOR:",
+        json.dumps(previous_info, ensure_ascii=False, indent=1),
+    ]
+    return "\n\n".join(sections)
+
+
+def merge_revision(previous_info: dict, partial: dict) -> dict:
+    """
+    Aplica a resposta parcial sobre os dados da versão anterior: cada campo
+    preenchido na resposta substitui o anterior, e os vazios são mantidos.
+    """
+    merged = dict(previous_info)
+    for field in ModelAnswer.model_fields:
+        value = partial.get(field)
+        if field in LIST_FIELDS:
+            values = [item.strip() for item in value or [] if item and not is_empty_answer(item)]
+            if values:
+                merged[field] = values
+        elif value and not is_empty_answer(value):
+            merged[field] = value.strip()
+    return merged
+
+
+def analyze_revision(previous_text: str, previous_info: dict, text: str) -> dict | None:
+    """
+    Analisa uma nova versão de um contrato a partir da anterior, enviando ao modelo
+    apenas as cláusulas alteradas e suas vizinhas.
+
+    Retorna `None` quando a análise incremental não compensa (mudança grande
+    demais), e a nova versão deve ser analisada por inteiro.
+    """
+    previous, current = split_clauses(previous_text), split_clauses(text)
+    removed, added = diff_clauses(previous, current)
+    if not removed and not added:
+        return dict(previous_info)
+
+    changed = sum(len(current[i]) for i in added) + sum(len(previous[i]) for i in removed)
+    if changed > REVISION_MAX_CHANGED_RATIO * max(len(text), 1):
+        return None
+
+    prompt = build_revision_prompt(previous_info, previous, current, removed, added)
+    logger.info(
+        "Revisão: %d cláusulas alteradas de %d, ~%d tokens enviados (texto completo: ~%d)",
+        max(len(removed), len(added)), len(current), estimate_tokens(prompt), estimate_tokens(text),
+    )
+    partial = generate_answer(prompt, REVISION_INSTRUCTION)
+    return merge_revision(previous_info, partial)
+
+
+def revision_analyzer(db: Session, previous: Contract, analyze):
+    """
+    Envolve a função de análise `analyze(texto)` para que uma nova versão de
+    `previous` seja analisada de forma incremental, quando possível.
+
+    Sem o texto da versão anterior armazenado (contratos antigos), ou com uma
+    mudança grande, a nova versão é analisada por inteiro com `analyze`.
+
+    O texto anterior só é carregado (e descomprimido) quando a análise é de fato
+    executada, e não quando a resposta vem do cache.
+    """
+    text_hash = previous.text_hash
+    previous_info = {field: getattr(previous, field) for field in ModelAnswer.model_fields}
+
+    def run(text: str) -> dict:
+        previous_text = load_text(db, text_hash) if text_hash else None
+        if previous_text is not None:
+            info = analyze_revision(previous_text, previous_info, text)
+            if info is not None:
+                return info
+        return analyze(text)
+
+    return run
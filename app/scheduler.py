@@ -0,0 +1,298 @@
+from collections import deque
+from contextlib import contextmanager
+from .llm_gateway import LLM_MAX_CONCURRENCY
+from .metrics import timed
+import itertools
+import math
+import os
+import threading
+import time
+
+
+# Classes de prioridade, na ordem em que são atendidas
+INTERACTIVE = "interactive"  # Envios pela interface, com o usuário aguardando a resposta
+BULK = "bulk"                # Jobs assíncronos e lotes
+PRIORITIES = (INTERACTIVE, BULK)
+
+
+def parse_weights(value: str) -> dict[str, float]:
+    # "admin=2,parceiro=0.5"
+    weights = {}
+    for item in value.split(","):
+        user, _, weight = item.partition("=")
+        if user.strip() and weight.strip():
+            weights[user.strip()] = float(weight)
+    return weights
+
+
+# Análises de contrato executadas simultaneamente no processo. Por padrão, igual
+# ao limite do gateway: as que passam pelo escalonador não esperam de novo em FIFO
+SCHEDULER_MAX_CONCURRENCY = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", str(LLM_MAX_CONCURRENCY)))
+# Vagas que as análises em lote não ocupam, para que uma interativa nunca espere
+# o fim de uma análise longa de um lote
+SCHEDULER_INTERACTIVE_RESERVED = int(os.getenv("SCHEDULER_INTERACTIVE_RESERVED", "2"))
+# Análises simultâneas de um mesmo usuário, em cada classe
+SCHEDULER_USER_CONCURRENCY = int(os.getenv("SCHEDULER_USER_CONCURRENCY", "4"))
+# Análises aguardando em cada classe (no total e por usuário) antes de recusar novos envios.
+# Cada envio aguardando ocupa uma thread do pool do AnyIO (40 por padrão), então o
+# limite fica abaixo dele para que a fila não trave as demais rotas
+SCHEDULER_MAX_QUEUED = int(os.getenv("SCHEDULER_MAX_QUEUED", "32"))
+SCHEDULER_MAX_QUEUED_PER_USER = int(os.getenv("SCHEDULER_MAX_QUEUED_PER_USER", "20"))
+# Espera máxima por uma vaga, em segundos, antes de desistir com `SchedulerFullError`
+SCHEDULER_QUEUE_TIMEOUT_SECONDS = float(os.getenv("SCHEDULER_QUEUE_TIMEOUT_SECONDS", "120"))
+# Peso de cada usuário na divisão da capacidade; os não listados têm peso 1
+SCHEDULER_USER_WEIGHTS = parse_weights(os.getenv("SCHEDULER_USER_WEIGHTS", ""))
+# Limite da espera sugerida no cabeçalho Retry-After, em segundos
+SCHEDULER_MAX_RETRY_AFTER = int(os.getenv("SCHEDULER_MAX_RETRY_AFTER", "120"))
+
+
+class SchedulerFullError(Exception):
+    """
+    A fila de análises está cheia; `retry_after` é a espera sugerida, em segundos.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Fila de análise cheia. Tente novamente em instantes.")
+        self.retry_after = retry_after
+
+
+class Reservation:
+    """
+    Lugar na fila reservado por `admit` para um envio ainda em leitura ou
+    extração de texto. É consumido quando o envio chega à fila de análise e
+    deve ser devolvido com `release` (ou ao sair do bloco `with`) no fim do envio.
+    """
+
+    def __init__(self, scheduler: "FairScheduler", user: str | None, priority: str):
+        self.scheduler = scheduler
+        self.user = user
+        self.priority = priority
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.scheduler._release_reservation(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class Ticket:
+    def __init__(self, user: str | None, priority: str, start: float, sequence: int):
+        self.user = user
+        self.priority = priority
+        # Etiqueta de início no tempo virtual da classe
+        self.start = start
+        self.sequence = sequence
+        self.event = threading.Event()
+        self.started_at = None
+
+
+class FairScheduler:
+    """
+    Ordena as análises de contrato (chamadas a `extract_contract_info`) que
+    disputam a capacidade do modelo, em vez de atendê-las na ordem de chegada:
+
+    - Prioridade: análises interativas são atendidas antes das em lote, e
+      `reserved` vagas ficam disponíveis apenas para elas;
+    - Entre usuários de uma mesma classe, enfileiramento justo ponderado
+      (start-time fair queuing): cada análise recebe uma etiqueta de início
+      virtual, que avança em `custo / peso` a cada análise do usuário, e é
+      atendida a menor etiqueta. O custo é o tamanho estimado do texto, então
+      um usuário com um lote grande não atrasa os demais por mais do que a
+      sua parte;
+    - Cada usuário executa no máximo `user_concurrency` análises por classe;
+    - `admit` recusa novos envios (`SchedulerFullError`) com a fila cheia,
+      contando também os envios admitidos que ainda não chegaram a ela, e
+      `acquire` desiste após `queue_timeout` segundos de espera.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = SCHEDULER_MAX_CONCURRENCY,
+        reserved: int = SCHEDULER_INTERACTIVE_RESERVED,
+        user_concurrency: int = SCHEDULER_USER_CONCURRENCY,
+        max_queued: int = SCHEDULER_MAX_QUEUED,
+        max_queued_per_user: int = SCHEDULER_MAX_QUEUED_PER_USER,
+        weights: dict[str, float] | None = None,
+        queue_timeout: float | None = SCHEDULER_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        # Ao menos uma vaga sempre disponível para análises em lote
+        self.reserved = min(max(0, reserved), self.max_concurrency - 1)
+        self.user_concurrency = max(1, user_concurrency)
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.weights = SCHEDULER_USER_WEIGHTS if weights is None else weights
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        # Por classe: análises aguardando de cada usuário, tempo virtual e etiqueta
+        # final da última análise de cada usuário
+        self._queues = {priority: {} for priority in PRIORITIES}
+        self._virtual_time = {priority: 0.0 for priority in PRIORITIES}
+        self._last_finish = {priority: {} for priority in PRIORITIES}
+        self._queued = {priority: 0 for priority in PRIORITIES}
+        self._running = {priority: 0 for priority in PRIORITIES}
+        self._running_per_user = {}
+        # Reservas de `admit` ainda não consumidas, por classe e por (classe, usuário),
+        # e as já consumidas por um `acquire`, a descontar quando forem devolvidas
+        self._admitted = {priority: 0 for priority in PRIORITIES}
+        self._admitted_per_user = {}
+        self._consumed = {}
+        # Média móvel da duração das análises, usada para estimar o Retry-After
+        self._service_time = None
+
+    def admit(self, user: str | None, priority: str = INTERACTIVE) -> Reservation:
+        """
+        Reserva um lugar na fila para uma nova análise do usuário, antes de ler e
+        extrair o documento. Levanta `SchedulerFullError` com a fila cheia.
+        """
+        with self._lock:
+            key = (priority, user)
+            waiting = self._queued[priority] + self._admitted[priority]
+            waiting_user = len(self._queues[priority].get(user, ())) + self._admitted_per_user.get(key, 0)
+            if waiting >= self.max_queued or waiting_user >= self.max_queued_per_user:
+                raise SchedulerFullError(self._retry_after(priority, waiting))
+
+            self._admitted[priority] += 1
+            self._admitted_per_user[key] = self._admitted_per_user.get(key, 0) + 1
+        return Reservation(self, user, priority)
+
+    def _release_reservation(self, reservation: Reservation):
+        with self._lock:
+            key = (reservation.priority, reservation.user)
+            # As reservas de um mesmo usuário e classe são equivalentes: a devolvida
+            # pode ter sido consumida pelo `acquire` de outro envio dele
+            if key in self._consumed:
+                decrement(self._consumed, key)
+            else:
+                self._admitted[reservation.priority] -= 1
+                decrement(self._admitted_per_user, key)
+
+    def retry_after(self, priority: str = BULK, ahead: int = 0) -> int:
+        """
+        Espera sugerida, em segundos, para uma análise com `ahead` outras à sua frente.
+        """
+        with self._lock:
+            return self._retry_after(priority, ahead)
+
+    def _retry_after(self, priority: str, ahead: int) -> int:
+        slots = self.max_concurrency if priority == INTERACTIVE else self.max_concurrency - self.reserved
+        if priority == BULK:
+            ahead += self._queued[INTERACTIVE]
+        service_time = self._service_time or 1.0
+        return max(1, min(SCHEDULER_MAX_RETRY_AFTER, math.ceil(service_time * (ahead + 1) / slots)))
+
+    def acquire(self, user: str | None, priority: str = INTERACTIVE, cost: float = 1.0) -> Ticket:
+        """
+        Aguarda a vez da análise e retorna o `Ticket`, a ser devolvido com `release`.
+        Levanta `SchedulerFullError` se a vez não chegar em `queue_timeout` segundos.
+        """
+        with self._lock:
+            key = (priority, user)
+            if key in self._admitted_per_user:
+                # O envio deixa de contar como admitido e passa a contar como enfileirado
+                decrement(self._admitted_per_user, key)
+                self._admitted[priority] -= 1
+                self._consumed[key] = self._consumed.get(key, 0) + 1
+
+            last_finish = self._last_finish[priority].get(user, 0.0)
+            start = max(self._virtual_time[priority], last_finish)
+            self._last_finish[priority][user] = start + max(cost, 1.0) / self.weights.get(user, 1.0)
+
+            ticket = Ticket(user, priority, start, next(self._sequence))
+            self._queues[priority].setdefault(user, deque()).append(ticket)
+            self._queued[priority] += 1
+            self._dispatch()
+
+        with timed(f"llm_queue_{priority}"):
+            dispatched = ticket.event.wait(self.queue_timeout)
+        if not dispatched:
+            with self._lock:
+                # A vaga pode ter sido liberada entre o fim da espera e o lock
+                if not ticket.event.is_set():
+                    queue = self._queues[priority][user]
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[priority][user]
+                    self._queued[priority] -= 1
+                    raise SchedulerFullError(self._retry_after(priority, self._queued[priority]))
+        return ticket
+
+    def release(self, ticket: Ticket):
+        with self._lock:
+            self._running[ticket.priority] -= 1
+            decrement(self._running_per_user, (ticket.priority, ticket.user))
+
+            elapsed = time.monotonic() - ticket.started_at
+            self._service_time = elapsed if self._service_time is None else 0.8 * self._service_time + 0.2 * elapsed
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, user: str | None, priority: str = INTERACTIVE, cost: float = 1.0):
+        ticket = self.acquire(user, priority, cost)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def _dispatch(self):
+        # Chamado com o lock: libera as próximas análises enquanto houver vagas
+        while True:
+            ticket = self._next()
+            if ticket is None:
+                return
+            queue = self._queues[ticket.priority][ticket.user]
+            queue.popleft()
+            if not queue:
+                del self._queues[ticket.priority][ticket.user]
+
+            self._queued[ticket.priority] -= 1
+            self._running[ticket.priority] += 1
+            key = (ticket.priority, ticket.user)
+            self._running_per_user[key] = self._running_per_user.get(key, 0) + 1
+            self._virtual_time[ticket.priority] = ticket.start
+            ticket.started_at = time.monotonic()
+            ticket.event.set()
+
+    def _next(self) -> Ticket | None:
+        if sum(self._running.values()) >= self.max_concurrency:
+            return None
+        for priority in PRIORITIES:
+            if priority == BULK and self._running[BULK] >= self.max_concurrency - self.reserved:
+                continue
+            candidates = [
+                queue[0]
+                for user, queue in self._queues[priority].items()
+                if self._running_per_user.get((priority, user), 0) < self.user_concurrency
+            ]
+            if candidates:
+                return min(candidates, key=lambda ticket: (ticket.start, ticket.sequence))
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                priority: {
+                    "queued": self._queued[priority],
+                    "admitted": self._admitted[priority],
+                    "running": self._running[priority],
+                    "users_waiting": len(self._queues[priority]),
+                }
+                for priority in PRIORITIES
+            }
+
+
+def decrement(counts: dict, key):
+    counts[key] -= 1
+    if not counts[key]:
+        del counts[key]
+
+
+llm_scheduler = FairScheduler()
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel
 
 
@@ -14,22 +15,73 @@ class UserLogin(BaseModel):
 class ContractData(BaseModel):
     # O valor dos bens é um dado particularmente delicado em razão da sua natureza.
     #
-    # É possível armazenar definir esta coluna no banco de dados como INTEGER
-    # (com valores devidamente convertidos para centavos)
-    # mas para tanto seria necessário ter certeza de que o processamento
-    # do LLM retorna valores coesos.
-    #
-    # Há possibilidade de manter o valor como STRING e garantir que a conversão
-    # obedeça regras mais explícitas via aplicação, e não ocorra no banco de dados.
+    # O texto retornado pelo LLM nem sempre é coeso, então é mantido como STRING
+    # em `valor_bens`. A conversão para centavos obedece regras explícitas na
+    # aplicação (`money.parse_amount`), e não ocorre no banco de dados: o resultado
+    # fica em `valor_centavos` e `moeda`, nulos quando o texto não tem um valor reconhecível.
 
     id: int
     filename: str
-    contratante: str
-    contratado: str
+    contratante: list[str]
+    contratado: list[str]
     valor_bens: str
-    obrigacoes_contratante: str
-    obrigacoes_contratada: str
-    objeto: str
+    valor_centavos: int | None = None
+    moeda: str | None = None
+    obrigacoes_contratante: list[str]
+    obrigacoes_contratada: list[str]
+    objeto: list[str]
     vigencia: str
     clausula_rescisao: str
+    version: int = 1
+    # Versão anterior do mesmo contrato, quando enviado com `revises`
+    previous_id: int | None = None
+
+
+class ContractPage(BaseModel):
+    items: list[ContractData]
+    # Valor a enviar no parâmetro `cursor` para obter a próxima página; nulo na última
+    next_cursor: str | None = None
+
+
+class JobStatus(BaseModel):
+    id: str
+    filename: str
+    status: str
+    error: str | None = None
+    contract_id: int | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+
+class BatchItemResult(BaseModel):
+    filename: str
+    status: str
+    contract_id: int | None = None
+    error: str | None = None
+
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[BatchItemResult]
+
+
+class CurrencyTotal(BaseModel):
+    moeda: str
+    contracts: int
+    valor_centavos: int
+
+
+class PartyTotal(BaseModel):
+    role: str
+    party: str
+    moeda: str
+    contracts: int
+    valor_centavos: int
+
 
+class Aggregates(BaseModel):
+    totals: list[CurrencyTotal]
+    # Contratos cujo `valor_bens` não pôde ser normalizado
+    unvalued: int
+    parties: list[PartyTotal]
@@ -0,0 +1,254 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from .auth import get_current_user
+from .contracts import get_db
+from .models import Contract, ContractParty
+from .schemas import ContractPage
+import re
+
+router = APIRouter()
+
+
+# Colunas de `contracts` indexadas pela busca textual
+SEARCH_COLUMNS = (
+    "contratante",
+    "contratado",
+    "objeto",
+    "obrigacoes_contratante",
+    "obrigacoes_contratada",
+    "clausula_rescisao",
+)
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def create_search_index(connection: Connection):
+    """
+    Cria o índice FTS5 de `contracts` e os gatilhos que o mantêm sincronizado
+    com inserções, atualizações e exclusões. Somente no SQLite.
+
+    O índice é uma tabela de conteúdo externo: guarda apenas os termos, e o
+    texto continua em `contracts`. As colunas JSON são indexadas como texto;
+    colchetes e aspas são tratados como separadores pelo tokenizador.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+    # `remove_diacritics` permite encontrar "rescisão" buscando por "rescisao"
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS contracts_fts USING fts5({columns}, "
+        "content='contracts', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS contracts_fts_insert AFTER INSERT ON contracts BEGIN "
+        f"INSERT INTO contracts_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS contracts_fts_delete AFTER DELETE ON contracts BEGIN "
+        f"INSERT INTO contracts_fts(contracts_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS contracts_fts_update AFTER UPDATE ON contracts BEGIN "
+        f"INSERT INTO contracts_fts(contracts_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO contracts_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+
+
+# Papéis indexados em `contract_parties`
+PARTY_ROLES = ("contratante", "contratado")
+
+
+def party_inserts(row: str) -> str:
+    return "".join(
+        "INSERT OR IGNORE INTO contract_parties (role, party_lower, contract_id) "
+        f"SELECT '{role}', lower(value), {row}.id FROM json_each({row}.{role}); "
+        for role in PARTY_ROLES
+    )
+
+
+def create_party_index(connection: Connection):
+    """
+    Cria os gatilhos que mantêm `contract_parties` (as partes de cada contrato)
+    a cada inserção, atualização ou exclusão em `contracts`. Somente no SQLite.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS contracts_parties_insert AFTER INSERT ON contracts BEGIN "
+        f"{party_inserts('new')}END"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS contracts_parties_delete AFTER DELETE ON contracts BEGIN "
+        "DELETE FROM contract_parties WHERE contract_id = old.id; END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS contracts_parties_update AFTER UPDATE OF {', '.join(PARTY_ROLES)} "
+        "ON contracts BEGIN DELETE FROM contract_parties WHERE contract_id = old.id; "
+        f"{party_inserts('new')}END"
+    ))
+
+
+def rebuild_party_index(connection: Connection):
+    """
+    Recalcula `contract_parties` a partir de `contracts` (usado pela migração que a cria).
+    """
+    connection.execute(text("DELETE FROM contract_parties"))
+    for role in PARTY_ROLES:
+        connection.execute(text(
+            "INSERT OR IGNORE INTO contract_parties (role, party_lower, contract_id) "
+            f"SELECT '{role}', lower(json_each.value), contracts.id FROM contracts, json_each(contracts.{role})"
+        ))
+
+
+@event.listens_for(Contract.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    create_search_index(connection)
+    create_party_index(connection)
+
+
+@event.listens_for(Contract.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    # Os gatilhos são removidos junto com `contracts`
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS contracts_fts"))
+
+
+def build_match_query(query: str) -> str:
+    """
+    Converte o texto digitado em uma expressão FTS5 segura: cada palavra vira
+    um termo entre aspas, com busca por prefixo, e todos devem estar presentes.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Informe ao menos uma palavra para a busca.")
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def has_party(role: str, value: str):
+    """
+    Condição "`value` é uma das partes do contrato no papel `role`" (sem diferenciar
+    maiúsculas), resolvida pelo índice de `contract_parties`. Os dois lados usam o
+    `lower` do SQLite, para que a comparação seja a mesma dos gatilhos.
+    """
+    return Contract.id.in_(
+        select(ContractParty.contract_id).where(
+            ContractParty.role == role, ContractParty.party_lower == func.lower(value)
+        )
+    )
+
+
+def parse_cursor(cursor: str, parts: int) -> list[str]:
+    values = cursor.split(":")
+    if len(values) != parts:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return values
+
+
+@router.get(
+    "/contracts",
+    response_model=ContractPage,
+    tags=["contracts"],
+    summary="Listagem de contratos analisados",
+    description="""
+Lista os contratos do mais recente para o mais antigo, com paginação por cursor.\n
+Para obter a página seguinte, envie o `next_cursor` da resposta no parâmetro `cursor`.
+O campo é nulo na última página.
+""",
+)
+def list_contracts(
+    cursor: str | None = Query(None, description="Cursor retornado pela página anterior."),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    filename: str | None = Query(None, description="Nome exato do arquivo."),
+    contratante: str | None = Query(None, description="Uma das partes contratantes."),
+    contratado: str | None = Query(None, description="Uma das partes contratadas."),
+    valor_min: int | None = Query(None, ge=0, description="Valor mínimo, em centavos."),
+    valor_max: int | None = Query(None, ge=0, description="Valor máximo, em centavos."),
+    moeda: str = Query("BRL", min_length=3, max_length=3, description="Moeda dos filtros de valor."),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    query = db.query(Contract)
+    if cursor is not None:
+        # A página seguinte começa depois do último `id` entregue, usando a chave
+        # primária em vez de OFFSET: o custo não cresce com o número da página
+        (last_id,) = parse_cursor(cursor, 1)
+        if not last_id.isdigit():
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        query = query.filter(Contract.id < int(last_id))
+    if filename is not None:
+        query = query.filter(Contract.filename == filename)
+    if contratante is not None:
+        query = query.filter(has_party("contratante", contratante))
+    if contratado is not None:
+        query = query.filter(has_party("contratado", contratado))
+    # Faixa de valor na moeda informada, resolvida pelo índice (moeda, valor_centavos)
+    if valor_min is not None or valor_max is not None:
+        query = query.filter(Contract.moeda == moeda.upper())
+        if valor_min is not None:
+            query = query.filter(Contract.valor_centavos >= valor_min)
+        if valor_max is not None:
+            query = query.filter(Contract.valor_centavos <= valor_max)
+
+    # Um item a mais indica se existe uma próxima página
+    contracts = query.order_by(Contract.id.desc()).limit(limit + 1).all()
+    items = contracts[:limit]
+    next_cursor = str(items[-1].id) if len(contracts) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/contracts/search",
+    response_model=ContractPage,
+    tags=["contracts"],
+    summary="Busca textual em contratos analisados",
+    description="""
+Busca por palavras (ou inícios de palavras) nas partes, no objeto, nas obrigações e na cláusula de rescisão.
+Acentos e maiúsculas são ignorados e todas as palavras precisam estar presentes.\n
+Os resultados são ordenados por relevância e paginados por cursor, como em `GET /contracts`.
+""",
+)
+def search_contracts(
+    q: str = Query(..., min_length=1, description="Palavras buscadas."),
+    cursor: str | None = Query(None, description="Cursor retornado pela página anterior."),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="Busca textual disponível apenas com SQLite.")
+
+    params = {"match": build_match_query(q), "limit": limit + 1}
+    after = ""
+    if cursor is not None:
+        # Cursor composto (relevância, id): o `id` desempata resultados de mesma relevância
+        last_rank, last_id = parse_cursor(cursor, 2)
+        try:
+            params["rank"], params["id"] = float(last_rank), int(last_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        after = "AND (rank > :rank OR (rank = :rank AND rowid > :id))"
+
+    rows = db.execute(
+        text(
+            "SELECT rowid, rank FROM contracts_fts WHERE contracts_fts MATCH :match "
+            f"{after} ORDER BY rank, rowid LIMIT :limit"
+        ),
+        params,
+    ).all()
+
+    page = rows[:limit]
+    contracts = {
+        contract.id: contract
+        for contract in db.query(Contract).filter(Contract.id.in_([row.rowid for row in page]))
+    }
+    items = [contracts[row.rowid] for row in page if row.rowid in contracts]
+    next_cursor = f"{page[-1].rank!r}:{page[-1].rowid}" if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
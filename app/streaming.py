@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
+from .database import SessionLocal
+from .auth import get_current_user
+from .schemas import ContractData
+from .ai_service import ModelAnswer, stream_contract_info
+from .contracts import admit_analysis, analyze_spooled, check_file_type
+from .metrics import timed
+from .scheduler import INTERACTIVE, Reservation
+from .uploads import SpooledUpload, spool_upload
+from .writer import contract_writer
+import json
+import queue
+import threading
+
+router = APIRouter()
+
+
+def sse(event: str, data) -> str:
+    """
+    Formata um evento no padrão Server-Sent Events.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post(
+    "/contracts/upload/stream",
+    response_class=StreamingResponse,
+    tags=["contracts"],
+    summary="Envio de contratos com resultado em streaming (SSE)",
+    description="""
+Versão de `POST /contracts/upload` que responde imediatamente com um fluxo `text/event-stream`:\n
+- `progress`: etapa atual (`upload`, `extract` com a página lida e o total de páginas, `llm`);
+- `field`: um campo da análise (`{"field": ..., "value": ...}`), enviado assim que o modelo termina de gerá-lo;
+- `done`: o contrato gravado, no mesmo formato de `POST /contracts/upload`;
+- `error`: falha na análise (`{"status": ..., "detail": ...}`), encerrando o fluxo.
+""",
+)
+def upload_contract_stream(file: UploadFile = File(...), user=Depends(get_current_user)):
+    check_file_type(file.filename)
+    reservation = admit_analysis(user, INTERACTIVE)
+
+    # O arquivo é copiado antes da resposta: depois dela o `UploadFile` é fechado
+    try:
+        with timed("upload_read"):
+            spooled = spool_upload(file)
+    except BaseException:
+        reservation.release()
+        raise
+
+    return StreamingResponse(
+        stream_analysis(spooled, user, reservation),
+        media_type="text/event-stream",
+        # Evita que proxies acumulem o fluxo antes de repassá-lo ao navegador
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def stream_analysis(spooled: SpooledUpload, user=None, reservation: Reservation | None = None):
+    """
+    Executa a análise em uma thread própria e repassa os eventos ao cliente
+    à medida que são produzidos. Se o cliente desconectar, a análise continua
+    e o contrato é gravado normalmente; o lugar `reservation` na fila é
+    devolvido ao fim da análise.
+    """
+    events = queue.Queue()
+    threading.Thread(
+        target=run_streaming_analysis,
+        args=(spooled, events.put, user, reservation),
+        name="contract-stream",
+        daemon=True,
+    ).start()
+
+    while True:
+        event = events.get()
+        if event is None:
+            return
+        yield event
+
+
+def run_streaming_analysis(spooled: SpooledUpload, put, user=None, reservation: Reservation | None = None):
+    sent = set()
+
+    def on_page(page: int, pages: int):
+        put(sse("progress", {"stage": "extract", "page": page, "pages": pages}))
+
+    def on_field(field: str, value):
+        sent.add(field)
+        put(sse("field", {"field": field, "value": value}))
+
+    def analyze(text: str) -> dict:
+        put(sse("progress", {"stage": "llm"}))
+        return stream_contract_info(text, on_field)
+
+    db = SessionLocal()
+    try:
+        put(sse("progress", {"stage": "upload", "filename": spooled.filename, "size": spooled.size}))
+        info = analyze_spooled(spooled, db, on_page=on_page, analyze=analyze, user=user)
+
+        # Respostas do cache não passam pelo modelo: os campos são enviados de uma vez
+        for field in ModelAnswer.model_fields:
+            if field not in sent:
+                on_field(field, info[field])
+
+        with timed("db_commit"):
+            contract = contract_writer.write(filename=spooled.filename, **info)
+        put(sse("done", ContractData.model_validate(contract, from_attributes=True).model_dump(mode="json")))
+    except HTTPException as e:
+        put(sse("error", {"status": e.status_code, "detail": e.detail}))
+    except Exception as e:
+        put(sse("error", {"status": 500, "detail": f"Erro inesperado durante a análise: {e}"}))
+    finally:
+        db.close()
+        spooled.close()
+        if reservation is not None:
+            reservation.release()
+        put(None)
@@ -0,0 +1,48 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .models import ContractText
+import os
+import zlib
+
+
+# Nível de compressão do zlib (1 a 9). O texto é gravado uma vez e lido raramente,
+# então o padrão privilegia o tamanho em vez da velocidade
+TEXT_COMPRESSION_LEVEL = int(os.getenv("TEXT_COMPRESSION_LEVEL", "9"))
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), TEXT_COMPRESSION_LEVEL)
+
+
+def decompress_text(content: bytes) -> str:
+    return zlib.decompress(content).decode("utf-8")
+
+
+def save_texts(db: Session, texts: dict[str, str]):
+    """
+    Grava os textos extraídos `{chave: texto}` ainda não armazenados, em uma
+    única transação. Textos iguais (mesma chave) são armazenados uma só vez.
+    """
+    for key, text in texts.items():
+        if db.get(ContractText, key) is not None:
+            continue
+        content = compress_text(text)
+        db.add(ContractText(
+            hash=key,
+            content=content,
+            size=len(text.encode("utf-8")),
+            compressed_size=len(content),
+        ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Outro worker gravou um dos textos ao mesmo tempo; os demais são gravados um a um
+        db.rollback()
+        if len(texts) > 1:
+            for key, text in texts.items():
+                save_texts(db, {key: text})
+
+
+def load_text(db: Session, key: str) -> str | None:
+    entry = db.get(ContractText, key)
+    return decompress_text(entry.content) if entry is not None else None
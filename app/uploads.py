@@ -0,0 +1,94 @@
+from fastapi import UploadFile, HTTPException
+import hashlib
+import os
+import tempfile
+
+
+# Tamanho máximo, em bytes, de cada documento enviado (padrão: 100 MB)
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(100 * 1024 * 1024)))
+# Diretório dos arquivos temporários (padrão: diretório temporário do sistema)
+SPOOL_DIR = os.getenv("SPOOL_DIR") or None
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+class SpooledUpload:
+    """
+    Documento copiado em blocos para um arquivo temporário em disco.
+
+    Permite que o PyMuPDF e o leitor de .docx abram o documento pelo caminho,
+    sem que o conteúdo inteiro seja carregado em um objeto `bytes`.
+    Expõe `filename` e `file` como um `UploadFile`.
+    """
+
+    def __init__(self, filename: str, path: str, size: int, sha256: str):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.file = open(path, "rb")
+
+    def close(self):
+        self.file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def file_too_large(filename: str, max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"O arquivo {filename} excede o tamanho máximo de {max_size // (1024 * 1024)} MB.",
+    )
+
+
+def spool_stream(filename: str, stream, max_size: int | None = None, directory: str | None = None) -> SpooledUpload:
+    """
+    Copia `stream` para disco em blocos de `SPOOL_CHUNK_SIZE`, calculando o hash
+    do conteúdo durante a cópia e interrompendo-a assim que `max_size` é excedido.
+    """
+    max_size = max_size or MAX_UPLOAD_SIZE
+    hasher = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1], dir=directory or SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := stream.read(SPOOL_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise file_too_large(filename, max_size)
+                hasher.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return SpooledUpload(filename, path, size, hasher.hexdigest())
+
+
+def spool_upload(file: UploadFile, max_size: int | None = None, directory: str | None = None) -> SpooledUpload:
+    # O Starlette informa o tamanho do arquivo recebido, permitindo recusar
+    # documentos grandes demais antes mesmo de copiá-los
+    max_size = max_size or MAX_UPLOAD_SIZE
+    if file.size is not None and file.size > max_size:
+        raise file_too_large(file.filename, max_size)
+    return spool_stream(file.filename, file.file, max_size, directory)
+
+
+def open_spooled(filename: str, path: str) -> SpooledUpload:
+    """
+    Abre um documento já copiado para disco (ex.: o arquivo de um job),
+    recalculando o tamanho e o hash do conteúdo.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(SPOOL_CHUNK_SIZE):
+            size += len(chunk)
+            hasher.update(chunk)
+    return SpooledUpload(filename, path, size, hasher.hexdigest())
@@ -0,0 +1,112 @@
+from concurrent.futures import Future
+from .database import SessionLocal
+from .models import Contract
+import os
+import queue
+import threading
+import time
+
+
+# Quantidade máxima de contratos gravados em uma mesma transação
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "100"))
+# Tempo que o writer aguarda por mais gravações antes de confirmar um lote.
+# Com 0, o lote reúne apenas as gravações que já estavam na fila, sem atraso extra.
+WRITE_BATCH_LINGER_MS = float(os.getenv("WRITE_BATCH_LINGER_MS", "0"))
+
+
+class ContractWriter:
+    """
+    Grava contratos em transações agrupadas, a partir de uma única thread.
+
+    Uploads simultâneos deixam de disputar o lock de escrita do SQLite com um
+    commit cada: as gravações que chegam enquanto um commit está em andamento
+    são confirmadas juntas no commit seguinte. `write` só retorna depois que
+    o contrato está gravado, então a resposta ao cliente continua consistente.
+    """
+
+    def __init__(self, batch_size: int = WRITE_BATCH_SIZE, linger_ms: float = WRITE_BATCH_LINGER_MS):
+        self.batch_size = batch_size
+        self.linger = linger_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def write(self, **values) -> Contract:
+        """
+        Grava um contrato e retorna a instância (desanexada da sessão) com `id` preenchido.
+        """
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((values, future))
+        return future.result()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="contract-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                try:
+                    remaining = deadline - time.monotonic()
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._flush(batch)
+                    return
+                batch.append(item)
+
+            self._flush(batch)
+
+    def _flush(self, batch: list):
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            contracts = [Contract(**values) for values, _ in batch]
+            try:
+                db.add_all(contracts)
+                db.commit()
+            except Exception:
+                db.rollback()
+                db.expunge_all()
+                # Uma linha inválida não deve descartar as demais: grava uma a uma
+                for values, future in batch:
+                    try:
+                        contract = Contract(**values)
+                        db.add(contract)
+                        db.commit()
+                    except Exception as e:
+                        db.rollback()
+                        future.set_exception(e)
+                    else:
+                        # Evita que o rollback de uma linha seguinte expire esta instância
+                        db.expunge(contract)
+                        future.set_result(contract)
+                return
+
+            for contract, (_, future) in zip(contracts, batch):
+                future.set_result(contract)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            db.close()
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+
+contract_writer = ContractWriter()
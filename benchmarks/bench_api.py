@@ -0,0 +1,232 @@
+"""
+Benchmark offline da API de contratos.
+
+Sobe a aplicação em um servidor uvicorn local, com banco SQLite temporário e o
+backend de IA "fake" (sem acesso à internet), e dispara uploads e consultas
+concorrentes com os documentos de `examples/`.
+
+Relata requisições por segundo, latências p50/p95/p99 de cada rota e a
+divisão do tempo de upload entre extração de texto, IA e banco de dados.
+
+Uso:
+    python benchmarks/bench_api.py --requests 200 --concurrency 8 --latency-ms 800
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES_DIR = os.path.join(ROOT, "examples")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="quantidade de uploads (cada um seguido de uma consulta)")
+    parser.add_argument("--concurrency", type=int, default=8, help="clientes simultâneos")
+    parser.add_argument("--latency-ms", type=float, default=800, help="latência média simulada da IA")
+    parser.add_argument("--jitter-ms", type=float, default=200, help="variação da latência simulada da IA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de chamadas à IA que falham")
+    parser.add_argument("--llm-rpm", type=int, default=0, help="limite de chamadas por minuto do gateway de IA (0 desativa)")
+    parser.add_argument("--llm-tpm", type=int, default=0, help="limite de tokens por minuto do gateway de IA (0 desativa)")
+    parser.add_argument("--llm-concurrency", type=int, default=256, help="chamadas simultâneas permitidas pelo gateway de IA")
+    parser.add_argument("--cache", action="store_true", help="mantém o cache de extrações ativo")
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    return parser.parse_args()
+
+
+def configure_environment(args, db_path: str):
+    # Precisa acontecer antes de importar a aplicação, que lê a configuração ao ser importada
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_LLM_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["FAKE_LLM_ERROR_RATE"] = str(args.error_rate)
+    # O backend fake passa pelo gateway; sem estes limites o benchmark mediria o token bucket de produção
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.llm_rpm)
+    os.environ["LLM_TOKENS_PER_MINUTE"] = str(args.llm_tpm)
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    os.environ["EXTRACTION_CACHE_ENABLED"] = "true" if args.cache else "false"
+
+
+class StageTimer:
+    """
+    Acumula o tempo gasto em cada etapa do pipeline de upload.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return timed
+
+
+def instrument(timer: StageTimer):
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from app import contracts, llm_backends
+
+    contracts.extract_text_from_file = timer.wrap("parse", contracts.extract_text_from_file)
+    backend = llm_backends.get_backend()
+    backend.generate_answer = timer.wrap("llm", backend.generate_answer)
+
+    local = threading.local()
+
+    @event.listens_for(Session, "before_commit")
+    def before_commit(session):
+        local.started = time.perf_counter()
+
+    @event.listens_for(Session, "after_commit")
+    def after_commit(session):
+        started = getattr(local, "started", None)
+        if started is not None:
+            timer.add("db", time.perf_counter() - started)
+            local.started = None
+
+
+def start_server():
+    import uvicorn
+    from app.main import app
+    from app.migrations import run_migrations
+
+    run_migrations()
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def percentiles(samples: list[float]) -> dict:
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49] * 1000, "p95": cuts[94] * 1000, "p99": cuts[98] * 1000}
+
+
+def run(args) -> dict:
+    import httpx
+
+    documents = []
+    for name in sorted(os.listdir(EXAMPLES_DIR)):
+        if name.endswith((".pdf", ".docx")):
+            with open(os.path.join(EXAMPLES_DIR, name), "rb") as f:
+                documents.append((name, f.read()))
+
+    timer = StageTimer()
+    instrument(timer)
+    server, thread, base_url = start_server()
+
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        token = client.post("/login", data={"username": "admin", "password": "admin"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def record(route: str, started: float, status: int):
+            with lock:
+                latencies[route].append(time.perf_counter() - started)
+                statuses[route][status] += 1
+
+        def scenario(i: int):
+            name, content = documents[i % len(documents)]
+            filename = f"{i:05d}-{name}"
+
+            started = time.perf_counter()
+            response = client.post("/contracts/upload", headers=headers, files={"file": (filename, content)})
+            record("POST /contracts/upload", started, response.status_code)
+
+            started = time.perf_counter()
+            response = client.get(f"/contracts/{filename}", headers=headers)
+            record("GET /contracts/{filename}", started, response.status_code)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(scenario, range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    server.should_exit = True
+    thread.join(timeout=10)
+
+    uploads = len(latencies["POST /contracts/upload"]) or 1
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_seconds": elapsed,
+        "routes": {
+            route: {
+                "count": len(samples),
+                "rps": len(samples) / elapsed,
+                "statuses": dict(statuses[route]),
+                **percentiles(samples),
+            }
+            for route, samples in latencies.items()
+        },
+        # Tempo médio por upload em cada etapa; o restante é rede, fila e serialização
+        "stages_ms_per_upload": {
+            stage: sum(samples) * 1000 / uploads for stage, samples in timer.samples.items()
+        },
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"{result['requests']} uploads + consultas, {result['concurrency']} clientes, "
+        f"{result['elapsed_seconds']:.2f}s"
+    )
+    print()
+    print(f"{'rota':<28}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  status")
+    for route, stats in result["routes"].items():
+        print(
+            f"{route:<28}{stats['rps']:>9.1f}{stats['p50']:>10.1f}{stats['p95']:>10.1f}"
+            f"{stats['p99']:>10.1f}  {stats['statuses']}"
+        )
+    print()
+    print("tempo médio por upload, por etapa:")
+    for stage, ms in result["stages_ms_per_upload"].items():
+        print(f"  {stage:<8}{ms:>10.1f} ms")
+
+
+def main():
+    args = parse_args()
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    with tempfile.TemporaryDirectory(prefix="contract_api_bench_") as tmp:
+        configure_environment(args, os.path.join(tmp, "bench.db"))
+        result = run(args)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark de gravação sustentada de contratos no SQLite.
+
+Simula vários workers do uvicorn (processos) gravando no mesmo arquivo de banco,
+cada um com várias threads de requisição, e relata as gravações por segundo e
+os erros "database is locked".
+
+Compare, por exemplo:
+    python benchmarks/bench_db_writes.py --mode direct --no-tuning   # configuração original
+    python benchmarks/bench_db_writes.py --mode direct                # apenas os PRAGMAs
+    python benchmarks/bench_db_writes.py --mode writer                # PRAGMAs + gravação em lote
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROW = {
+    "contratante": ["Empresa Teste LTDA"],
+    "contratado": ["Fornecedor de Testes SA"],
+    "valor_bens": "R$ 50.000,00",
+    "obrigacoes_contratante": ["Pagar o valor", "Fornecer acesso"],
+    "obrigacoes_contratada": ["Entregar o produto", "Prestar suporte"],
+    "objeto": ["Licença de software de teste"],
+    "vigencia": "24 meses",
+    "clausula_rescisao": "Multa de 20% em caso de rescisão antecipada.",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4, help="workers simulados")
+    parser.add_argument("--threads", type=int, default=8, help="threads de requisição por worker")
+    parser.add_argument("--rows", type=int, default=250, help="gravações por thread")
+    parser.add_argument("--mode", choices=("direct", "writer"), default="writer",
+                        help="direct: um commit por contrato; writer: ContractWriter")
+    parser.add_argument("--no-tuning", action="store_true", help="desativa os PRAGMAs do SQLite")
+    return parser.parse_args()
+
+
+def worker(args, db_url: str, start_event, results):
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["SQLITE_TUNING"] = "false" if args.no_tuning else "true"
+    sys.path.insert(0, ROOT)
+
+    from app.database import SessionLocal
+    from app.models import Contract
+    from app.writer import contract_writer
+
+    errors = 0
+    lock = threading.Lock()
+
+    def direct(i: int):
+        db = SessionLocal()
+        try:
+            contract = Contract(filename=f"{os.getpid()}-{i}.pdf", **ROW)
+            db.add(contract)
+            db.commit()
+            db.refresh(contract)
+        finally:
+            db.close()
+
+    def via_writer(i: int):
+        contract_writer.write(filename=f"{os.getpid()}-{i}.pdf", **ROW)
+
+    write = direct if args.mode == "direct" else via_writer
+
+    def run(offset: int):
+        nonlocal errors
+        for i in range(args.rows):
+            try:
+                write(offset + i)
+            except Exception:
+                with lock:
+                    errors += 1
+
+    threads = [threading.Thread(target=run, args=(t * args.rows,)) for t in range(args.threads)]
+    start_event.wait()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    contract_writer.close()
+    results.put(errors)
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, ROOT)
+
+    with tempfile.TemporaryDirectory(prefix="contract_api_bench_") as tmp:
+        db_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["DATABASE_URL"] = db_url
+        from app.database import Base, engine
+        from app import models  # noqa: F401 - registra as tabelas
+        Base.metadata.create_all(bind=engine)
+        engine.dispose()
+
+        ctx = multiprocessing.get_context("spawn")
+        start_event = ctx.Event()
+        results = ctx.Queue()
+        processes = [
+            ctx.Process(target=worker, args=(args, db_url, start_event, results))
+            for _ in range(args.processes)
+        ]
+        for p in processes:
+            p.start()
+        # Aguarda a importação da aplicação nos processos antes de medir
+        time.sleep(2)
+
+        started = time.perf_counter()
+        start_event.set()
+        errors = sum(results.get() for _ in processes)
+        for p in processes:
+            p.join()
+        elapsed = time.perf_counter() - started
+
+    total = args.processes * args.threads * args.rows
+    print(
+        f"modo={args.mode} tuning={'não' if args.no_tuning else 'sim'} "
+        f"processos={args.processes} threads={args.threads}"
+    )
+    print(f"{total - errors} gravações em {elapsed:.2f}s -> {(total - errors) / elapsed:.0f}/s, {errors} erros")
+
+
+if __name__ == "__main__":
+    main()
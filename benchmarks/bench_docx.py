@@ -0,0 +1,121 @@
+"""
+Benchmark da extração de texto de arquivos .docx.
+
+Compara a leitura pelo modelo de objetos do python-docx (caminho anterior, que
+ignora as tabelas) com a leitura incremental de `word/document.xml`
+(`app.docx_text`). Cada extrator roda em um processo próprio, para que o pico
+de memória (RSS máximo) de um não contamine o outro.
+
+    python benchmarks/bench_docx.py --paragraphs 20000 --tables 200
+    python benchmarks/bench_docx.py --file examples/Modelo-de-Contrato-de-Locacao-de-Imovel-Residencial.docx
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="documento .docx a ser lido (padrão: documento gerado)")
+    parser.add_argument("--paragraphs", type=int, default=20000, help="parágrafos do documento gerado")
+    parser.add_argument("--tables", type=int, default=200, help="tabelas 10x4 do documento gerado")
+    parser.add_argument("--iterations", type=int, default=5, help="extrações por processo")
+    return parser.parse_args()
+
+
+def generate_docx(path: str, paragraphs: int, tables: int):
+    from docx import Document
+
+    doc = Document()
+    every = max(paragraphs // max(tables, 1), 1)
+    for i in range(paragraphs):
+        doc.add_paragraph(
+            f"Cláusula {i}: o LOCATÁRIO se obriga a pagar pontualmente o aluguel "
+            f"e os encargos da locação, sob pena de multa de 10% sobre o valor devido."
+        )
+        if tables and i % every == 0 and len(doc.tables) < tables:
+            table = doc.add_table(rows=10, cols=4)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"Parcela {r}.{c} | R$ {r * 100 + c},00"
+    doc.save(path)
+
+
+def python_docx(path: str) -> str:
+    from docx import Document
+
+    return "\n".join(p.text for p in Document(path).paragraphs)
+
+
+def streaming(path: str) -> str:
+    from app.docx_text import iter_docx_text
+
+    return "\n".join(iter_docx_text(path))
+
+
+EXTRACTORS = {"python-docx": python_docx, "streaming": streaming}
+
+
+def peak_rss_kib() -> int:
+    # VmHWM é zerado no exec do processo filho; ru_maxrss herdaria o pico do processo
+    # pai (que gerou o documento) quando o "spawn" é feito por fork + exec
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def worker(name: str, path: str, iterations: int, results):
+    sys.path.insert(0, ROOT)
+    extract = EXTRACTORS[name]
+    # Importações fora da medição
+    import docx  # noqa: F401
+    import app.docx_text  # noqa: F401
+    baseline = peak_rss_kib()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        chars = len(extract(path))
+    elapsed = time.perf_counter() - started
+
+    peak = peak_rss_kib()
+    results.put((name, elapsed / iterations, chars, baseline, peak))
+
+
+def main():
+    args = parse_args()
+    ctx = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory(prefix="contract_api_bench_") as tmp:
+        path = args.file
+        if path is None:
+            path = os.path.join(tmp, "bench.docx")
+            generate_docx(path, args.paragraphs, args.tables)
+        size = os.path.getsize(path)
+        print(f"documento: {path} ({size / 1024:.0f} KiB)")
+
+        for name in EXTRACTORS:
+            results = ctx.Queue()
+            process = ctx.Process(target=worker, args=(name, path, args.iterations, results))
+            process.start()
+            name, seconds, chars, baseline, peak = results.get()
+            process.join()
+            print(
+                f"{name:12} {seconds * 1000:8.1f} ms/documento  {size / seconds / 2**20:6.1f} MiB/s  "
+                f"{chars} caracteres  pico de RSS {peak / 1024:.0f} MiB (após importações: {baseline / 1024:.0f} MiB)"
+            )
+
+
+if __name__ == "__main__":
+    main()
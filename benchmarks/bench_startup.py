@@ -0,0 +1,98 @@
+"""
+Benchmark de partida a frio (cold start) da aplicação.
+
+Sobe o uvicorn em um processo novo, repetidas vezes, e mede o tempo até a
+primeira resposta 200 em `/`, além do tempo de importação de `app.main`.
+O banco é preparado antes, com `python -m app.migrations`, fora da medição.
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --runs 10 --workers 4
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="partidas medidas")
+    parser.add_argument("--workers", type=int, default=1, help="workers do uvicorn")
+    parser.add_argument("--timeout", type=float, default=60, help="espera máxima pela primeira resposta, em segundos")
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_200(env: dict, workers: int, timeout: float) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"O servidor terminou com o código {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError(f"Sem resposta em {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def import_time(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT, env=env)
+    return float(output)
+
+
+def summary(samples: list[float]) -> str:
+    return (
+        f"mín {min(samples) * 1000:.0f} ms  mediana {statistics.median(samples) * 1000:.0f} ms  "
+        f"máx {max(samples) * 1000:.0f} ms"
+    )
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="contract_api_bench_") as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "JWT_SECRET_KEY": os.environ.get("JWT_SECRET_KEY", "benchmark-secret"),
+        }
+        subprocess.run([sys.executable, "-m", "app.migrations"], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+
+        imports = [import_time(env) for _ in range(args.runs)]
+        first_200 = [time_to_first_200(env, args.workers, args.timeout) for _ in range(args.runs)]
+
+    print(f"partidas={args.runs} workers={args.workers}")
+    print(f"importação de app.main:  {summary(imports)}")
+    print(f"primeiro 200 em /:       {summary(first_200)}")
+
+
+if __name__ == "__main__":
+    main()
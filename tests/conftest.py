@@ -1,23 +1,31 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.database import Base
+from app import contracts, export, streaming, writer
+from app.database import set_sqlite_pragmas, json_serializer
 from app.contracts import get_db
 from app.auth import create_access_token
+from app.cache import extraction_cache
+from app.response_cache import contract_responses
 from app import models
-import json
+import os
+import tempfile
 
-# Use an in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Use a throwaway SQLite file for testing. Unlike a single shared in-memory
+# connection, this gives background job workers their own connections and
+# transactions, just like in production.
+TEST_DB_DIR = tempfile.mkdtemp(prefix="contract_api_tests_")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    json_serializer=json_serializer,
 )
+event.listen(engine, "connect", set_sqlite_pragmas)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -33,11 +41,19 @@ def override_get_db():
 # Apply the override to the FastAPI app
 app.dependency_overrides[get_db] = override_get_db
 
+# Background jobs, streaming uploads and the contract writer open their own sessions
+# outside of FastAPI's dependency injection
+contracts.SessionLocal = TestingSessionLocal
+contracts.JOBS_SPOOL_DIR = os.path.join(TEST_DB_DIR, "jobs")
+writer.SessionLocal = TestingSessionLocal
+streaming.SessionLocal = TestingSessionLocal
+export.SessionLocal = TestingSessionLocal
+
 
 @pytest.fixture(scope="function")
 def db_session():
     """
-    Yields a clean, in-memory database session for each test.
+    Yields a clean database session for each test.
     Creates all tables before the test and drops them after.
     """
     Base.metadata.create_all(bind=engine)
@@ -49,10 +65,32 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_extraction_cache():
+    """
+    Clears the in-memory extraction cache so uploads in one test
+    are never served from results cached by another.
+    """
+    extraction_cache.clear()
+    yield
+    extraction_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_contract_responses():
+    """
+    Clears cached GET /contracts/{filename} responses between tests, since
+    dropping the tables does not go through the ORM invalidation hooks.
+    """
+    contract_responses.clear()
+    yield
+    contract_responses.clear()
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """
-    Yields a TestClient that uses the clean, in-memory database.
+    Yields a TestClient that uses the clean test database.
     Depends on db_session to ensure tables are created and dropped.
     """
     with TestClient(app) as c:
@@ -76,12 +114,12 @@ def mock_ai_service_response():
     This avoids making real API calls during tests.
     """
     return {
-        "contratante": json.dumps(["Empresa Teste LTDA"]),
-        "contratado": json.dumps(["Fornecedor de Testes SA"]),
+        "contratante": ["Empresa Teste LTDA"],
+        "contratado": ["Fornecedor de Testes SA"],
         "valor_bens": "R$ 50.000,00",
-        "obrigacoes_contratante": json.dumps(["Pagar o valor", "Fornecer acesso"]),
-        "obrigacoes_contratada": json.dumps(["Entregar o produto", "Prestar suporte"]),
-        "objeto": json.dumps(["Licença de software de teste"]),
+        "obrigacoes_contratante": ["Pagar o valor", "Fornecer acesso"],
+        "obrigacoes_contratada": ["Entregar o produto", "Prestar suporte"],
+        "objeto": ["Licença de software de teste"],
         "vigencia": "24 meses",
         "clausula_rescisao": "Multa de 20% em caso de rescisão antecipada.",
     }
\ No newline at end of file
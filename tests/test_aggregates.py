@@ -0,0 +1,105 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.models import Contract, ContractPartyTotal, ContractTotal
+from app.money import parse_amount
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("R$ 50.000,00", (5000000, "BRL")),
+        ("R$ 1.500,00 (mil e quinhentos reais)", (150000, "BRL")),
+        ("Aluguel mensal de R$ 2.300,00, reajustado pelo IGP-M", (230000, "BRL")),
+        ("R$ 2,5 milhões", (250000000, "BRL")),
+        ("3.000 reais", (300000, "BRL")),
+        ("US$ 10,000.50", (1000050, "USD")),
+        ("US$ 1.200", (120000, "USD")),
+        ("€ 300,00", (30000, "EUR")),
+        ("EUR 1.500,00", (150000, "EUR")),
+        ("300 euros", (30000, "EUR")),
+        ("50.000,00", (5000000, "BRL")),
+        ("24 meses", (None, None)),
+        ("Não especificado", (None, None)),
+        (None, (None, None)),
+    ],
+)
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+def totals(db_session: Session) -> dict:
+    return {
+        "totals": {t.moeda: (t.contracts, t.valor_centavos) for t in db_session.query(ContractTotal)},
+        "parties": {
+            (p.role, p.party, p.moeda): (p.contracts, p.valor_centavos)
+            for p in db_session.query(ContractPartyTotal)
+        },
+    }
+
+
+def test_totals_follow_inserts_updates_and_deletes(db_session: Session, mock_ai_service_response: dict):
+    """
+    Tests that the summary tables are kept in step with contracts by the triggers.
+    """
+    first = Contract(filename="a.pdf", **mock_ai_service_response)
+    second = Contract(
+        filename="b.pdf",
+        **{**mock_ai_service_response, "valor_bens": "R$ 1.000,00", "contratante": ["Banco X", "Banco X"]},
+    )
+    db_session.add_all([first, second, Contract(filename="c.pdf", **{**mock_ai_service_response, "valor_bens": "A definir"})])
+    db_session.commit()
+
+    assert (first.valor_centavos, first.moeda) == (5000000, "BRL")
+    assert totals(db_session) == {
+        "totals": {"BRL": (2, 5100000)},
+        "parties": {
+            ("contratante", "Empresa Teste LTDA", "BRL"): (1, 5000000),
+            ("contratante", "Banco X", "BRL"): (1, 100000),
+            ("contratado", "Fornecedor de Testes SA", "BRL"): (2, 5100000),
+        },
+    }
+
+    second.valor_bens = "R$ 3.000,00"
+    db_session.commit()
+    db_session.delete(first)
+    db_session.commit()
+
+    assert totals(db_session) == {
+        "totals": {"BRL": (1, 300000)},
+        "parties": {
+            ("contratante", "Banco X", "BRL"): (1, 300000),
+            ("contratado", "Fornecedor de Testes SA", "BRL"): (1, 300000),
+        },
+    }
+
+
+def test_aggregates_endpoint_and_value_filters(
+    authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict
+):
+    """
+    Tests the aggregates endpoint and the value range filters of GET /contracts.
+    """
+    for i, value in enumerate(["R$ 100,00", "R$ 2.000,00", "US$ 500.00", "sem valor"]):
+        db_session.add(Contract(
+            filename=f"{i}.pdf", **{**mock_ai_service_response, "valor_bens": value, "contratante": [f"Parte {i}"]}
+        ))
+    db_session.commit()
+
+    response = authenticated_client.get("/contracts/aggregates", params={"limit": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["totals"] == [
+        {"moeda": "BRL", "contracts": 2, "valor_centavos": 210000},
+        {"moeda": "USD", "contracts": 1, "valor_centavos": 50000},
+    ]
+    assert body["unvalued"] == 1
+    assert [(p["party"], p["valor_centavos"]) for p in body["parties"]] == [("Parte 1", 200000)]
+
+    response = authenticated_client.get("/contracts/aggregates", params={"party": "Parte 0"})
+    assert [p["contracts"] for p in response.json()["parties"]] == [1]
+
+    response = authenticated_client.get("/contracts", params={"valor_min": 50000})
+    assert [item["valor_bens"] for item in response.json()["items"]] == ["R$ 2.000,00"]
+    response = authenticated_client.get("/contracts", params={"valor_max": 100000, "moeda": "usd"})
+    assert [item["moeda"] for item in response.json()["items"]] == ["USD"]
@@ -0,0 +1,85 @@
+import brotli
+import gzip
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.assets import AssetStore, IMMUTABLE, accepted_encodings, hashed_name, static_assets
+from app.models import Contract
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br;q=0.5") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("gzip;q=0, identity") == {"identity"}
+    assert {"br", "gzip"} <= accepted_encodings("*")
+    assert accepted_encodings(None) == set()
+
+
+def test_html_references_use_content_hashed_urls(tmp_path):
+    """
+    Tests that references to static files inside HTML are rewritten to
+    content-hashed URLs, which are served as immutable.
+    """
+    (tmp_path / "app.js").write_text("console.log('ok');\n" * 50)
+    (tmp_path / "index.html").write_text('<script src="/static/app.js"></script><img src="/static/missing.png">')
+
+    store = AssetStore(str(tmp_path))
+    html, immutable = store.get("index.html")
+    assert not immutable
+
+    body = html.contents["identity"].decode()
+    assert 'src="/static/missing.png"' in body
+    hashed = body.split('src="/static/')[1].split('"')[0]
+    assert hashed.startswith("app.") and hashed.endswith(".js") and hashed != "app.js"
+
+    script, immutable = store.get(hashed)
+    assert immutable
+    assert script is store.get("app.js")[0]
+    assert gzip.decompress(script.contents["gzip"]) == script.contents["identity"]
+    assert brotli.decompress(script.contents["br"]) == script.contents["identity"]
+
+
+def test_index_negotiation_and_revalidation(client: TestClient):
+    """
+    Tests that the front-end is served precompressed by Accept-Encoding,
+    with a per-encoding ETag answered by 304 on revalidation.
+    """
+    response = client.get("/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["cache-control"] == "no-cache"
+    assert "Analisador de Contratos com IA" in response.text
+
+    identity = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] != response.headers["etag"]
+
+    revalidated = client.get(
+        "/", headers={"Accept-Encoding": "gzip, br", "If-None-Match": response.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    assert client.get("/static/index.html").status_code == 200
+    assert client.get("/static/nope.js").status_code == 404
+
+
+def test_hashed_static_url_is_immutable(client: TestClient):
+    """
+    Tests that the content-hashed URL of a static file is cached as immutable.
+    """
+    asset, _ = static_assets.get("index.html")
+    response = client.get(f"/static/{hashed_name('index.html', asset.digest)}")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE
+
+
+def test_large_json_is_gzipped(authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict):
+    """
+    Tests that large JSON API responses are gzip-compressed on the wire.
+    """
+    db_session.add_all(Contract(filename=f"{i}.pdf", **mock_ai_service_response) for i in range(20))
+    db_session.commit()
+
+    response = authenticated_client.get("/contracts", params={"limit": 20}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["items"]) == 20
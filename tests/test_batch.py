@@ -0,0 +1,82 @@
+import io
+import zipfile
+import pymupdf
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.models import Contract
+
+
+def make_pdf(text: str) -> bytes:
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@patch("app.batch.BATCH_PARSE_WORKERS", 2)
+@patch("app.batch.extract_contract_info")
+def test_upload_batch_reports_per_file_results(
+    mock_extract_info: MagicMock,
+    authenticated_client: TestClient,
+    db_session: Session,
+    mock_ai_service_response: dict
+):
+    """
+    Tests that a batch parses every document, reports failures per file
+    without aborting the batch, and stores all successful contracts.
+    """
+    mock_extract_info.return_value = mock_ai_service_response
+
+    files = [
+        ("files", ("a.pdf", io.BytesIO(make_pdf("Contrato A")), "application/pdf")),
+        ("files", ("b.pdf", io.BytesIO(make_pdf("Contrato B")), "application/pdf")),
+        ("files", ("broken.pdf", io.BytesIO(b"not a pdf"), "application/pdf")),
+        ("files", ("notes.txt", io.BytesIO(b"plain text"), "text/plain")),
+    ]
+    response = authenticated_client.post("/contracts/upload/batch", files=files)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["succeeded"] == 2
+    assert body["failed"] == 2
+    statuses = {r["filename"]: r["status"] for r in body["results"]}
+    assert statuses == {"a.pdf": "ok", "b.pdf": "ok", "broken.pdf": "error", "notes.txt": "error"}
+    assert mock_extract_info.call_count == 2
+    assert db_session.query(Contract).count() == 2
+
+
+@patch("app.batch.BATCH_PARSE_WORKERS", 1)
+@patch("app.batch.extract_contract_info")
+def test_upload_batch_zip_deduplicates_llm_calls(
+    mock_extract_info: MagicMock,
+    authenticated_client: TestClient,
+    db_session: Session,
+    mock_ai_service_response: dict
+):
+    """
+    Tests that a ZIP archive is expanded into its documents and that
+    identical documents inside one batch share a single AI call.
+    """
+    mock_extract_info.return_value = mock_ai_service_response
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("pasta/one.pdf", make_pdf("Mesmo contrato"))
+        zf.writestr("pasta/two.pdf", make_pdf("Mesmo contrato"))
+        zf.writestr("pasta/", b"")
+    archive.seek(0)
+
+    response = authenticated_client.post(
+        "/contracts/upload/batch",
+        files=[("files", ("lote.zip", archive, "application/zip"))],
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["succeeded"] == 2
+    assert [r["filename"] for r in body["results"]] == ["one.pdf", "two.pdf"]
+    mock_extract_info.assert_called_once()
+    assert all(r["contract_id"] for r in body["results"])
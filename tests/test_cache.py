@@ -0,0 +1,75 @@
+import threading
+import time
+from unittest.mock import MagicMock
+from sqlalchemy.orm import Session
+from app.cache import ExtractionCache, LRUCache, hash_text
+from app.models import ExtractionCacheEntry
+
+
+def test_lru_evicts_least_recently_used():
+    """
+    Tests that the in-memory tier keeps at most `maxsize` entries
+    and discards the least recently read one first.
+    """
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_hash_text_ignores_whitespace_differences():
+    """
+    Tests that texts differing only in spacing share the same key.
+    """
+    assert hash_text("Cláusula  1ª\n  Do objeto") == hash_text("Cláusula 1ª Do objeto ")
+
+
+def test_persistent_tier_survives_memory_clear(db_session: Session):
+    """
+    Tests that entries are written to the database and read back
+    after the in-memory tier has been cleared.
+    """
+    cache = ExtractionCache(maxsize=4)
+    cache.set(db_session, ("text:abc",), {"vigencia": "12 meses"})
+    cache.clear()
+
+    assert db_session.get(ExtractionCacheEntry, "text:abc") is not None
+    assert cache.get(db_session, "text:abc") == {"vigencia": "12 meses"}
+
+
+def test_concurrent_misses_share_one_computation():
+    """
+    Tests that simultaneous requests for the same key run the
+    expensive computation only once.
+    """
+    cache = ExtractionCache(maxsize=4)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"vigencia": "12 meses"}
+
+    # The database tier is not under test here, and a Session is not thread-safe
+    db = MagicMock()
+    db.get.return_value = None
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_compute(db, "text:k", compute))
+        )
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"vigencia": "12 meses"}] * 4
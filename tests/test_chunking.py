@@ -0,0 +1,76 @@
+from unittest.mock import patch, MagicMock
+from app.ai_service import extract_contract_info
+from app.chunking import split_into_chunks, merge_answers
+
+
+def test_split_into_chunks_respects_budget_and_paragraphs():
+    """
+    Tests that chunks stay within the token budget and are cut only
+    at paragraph or page boundaries.
+    """
+    paragraphs = [f"CLÁUSULA {i}ª - " + "texto " * 20 for i in range(30)]
+    text = "\n".join(paragraphs[:15]) + "\n\f\n" + "\n".join(paragraphs[15:])
+
+    chunks = split_into_chunks(text, budget=100)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert [p for chunk in chunks for p in chunk.split("\n")] == [p.strip() for p in paragraphs]
+
+
+def test_merge_answers_deduplicates_and_picks_best_candidate():
+    """
+    Tests the deterministic merge of partial answers: list fields are
+    deduplicated in order and text fields keep the most specific value.
+    """
+    answers = [
+        {
+            "contratante": ["Empresa Teste LTDA"],
+            "contratado": [],
+            "valor_bens": "conforme cláusula quinta",
+            "obrigacoes_contratante": ["Pagar o valor"],
+            "obrigacoes_contratada": [],
+            "objeto": ["Licença de software"],
+            "vigencia": "",
+            "clausula_rescisao": "",
+        },
+        {
+            "contratante": ["empresa teste  ltda"],
+            "contratado": ["Fornecedor SA"],
+            "valor_bens": "R$ 50.000,00",
+            "obrigacoes_contratante": ["Pagar o valor", "Fornecer acesso"],
+            "obrigacoes_contratada": ["Prestar suporte"],
+            "objeto": [],
+            "vigencia": "24 meses",
+            "clausula_rescisao": "Multa de 20% em caso de rescisão antecipada.",
+        },
+    ]
+
+    merged = merge_answers(answers)
+
+    assert merged["contratante"] == ["Empresa Teste LTDA"]
+    assert merged["contratado"] == ["Fornecedor SA"]
+    assert merged["obrigacoes_contratante"] == ["Pagar o valor", "Fornecer acesso"]
+    assert merged["valor_bens"] == "R$ 50.000,00"
+    assert merged["vigencia"] == "24 meses"
+    assert merged["clausula_rescisao"] == "Multa de 20% em caso de rescisão antecipada."
+
+
+@patch("app.ai_service.LONG_DOCUMENT_TOKENS", 50)
+@patch("app.chunking.CHUNK_TOKEN_BUDGET", 50)
+@patch("app.ai_service.generate_answer")
+def test_long_contract_is_extracted_per_chunk(
+    mock_generate: MagicMock, mock_ai_service_response: dict
+):
+    """
+    Tests that contracts above LONG_DOCUMENT_TOKENS are sent to the
+    model in several chunks and merged into a single answer.
+    """
+    mock_generate.return_value = mock_ai_service_response
+
+    text = "\n".join("Parágrafo " + "x" * 150 for _ in range(4))
+    info = extract_contract_info(text)
+
+    assert mock_generate.call_count == 4
+    assert info["contratante"] == mock_ai_service_response["contratante"]
+    assert info["vigencia"] == mock_ai_service_response["vigencia"]
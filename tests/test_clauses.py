@@ -0,0 +1,79 @@
+import pytest
+from app import ai_service
+from app.ai_service import ModelAnswer, extract_targeted_contract_info
+from app.clauses import ClauseIndex
+from app.llm_backends import FakeBackend, set_backend
+
+CONTRACT = "\n".join([
+    "CONTRATO DE LOCAÇÃO\nLOCADOR: Maria da Silva\nLOCATÁRIO: João Souza",
+    "CLÁUSULA PRIMEIRA – DO OBJETO\nLocação do imóvel situado na Rua A, 100.",
+    "CLÁUSULA SEGUNDA – DO ALUGUEL\nO aluguel mensal é de R$ 1.500,00.",
+    "PARÁGRAFO ÚNICO – O pagamento será feito até o dia 10 de cada mês.",
+    "CLÁUSULA TERCEIRA – DO PRAZO\nO prazo da locação é de 30 meses.",
+    "CLÁUSULA QUARTA – DAS OBRIGAÇÕES\nO LOCATÁRIO deve conservar o imóvel.",
+    "CLÁUSULA QUINTA – DO FORO\nAs partes elegem o foro de Belém.",
+])
+
+
+class RecordingBackend(FakeBackend):
+    def __init__(self):
+        super().__init__(latency_ms=0, jitter_ms=0, error_rate=0, seed=1, through_gateway=False)
+        self.prompts = []
+
+    def generate_answer(self, contract_content, system_instruction, response_schema):
+        self.prompts.append((contract_content, tuple(response_schema.model_fields)))
+        return super().generate_answer(contract_content, system_instruction, response_schema)
+
+
+@pytest.fixture
+def backend():
+    backend = RecordingBackend()
+    set_backend(backend)
+    yield backend
+    set_backend(None)
+
+
+def test_index_finds_clauses_by_heading_with_paragraphs():
+    """
+    Tests that a heading match returns the clause with its paragraphs, that
+    accents are ignored, and that the preamble is kept apart.
+    """
+    index = ClauseIndex(CONTRACT)
+
+    assert index.preamble.startswith("CONTRATO DE LOCAÇÃO")
+    assert [c.heading for c in index.find(["ALUGUE"])] == [
+        "CLÁUSULA SEGUNDA – DO ALUGUEL",
+        "PARÁGRAFO ÚNICO – O pagamento será feito até o dia 10 de cada mês.",
+    ]
+    assert [c.heading for c in index.find(["OBRIGACO"])] == ["CLÁUSULA QUARTA – DAS OBRIGAÇÕES"]
+    assert index.find(["RESCIS"]) == []
+
+
+def test_targeted_extraction_sends_only_relevant_clauses(backend: RecordingBackend):
+    """
+    Tests that each field group receives only its clauses, and that groups
+    without a matching clause share one call with the full text.
+    """
+    answer = extract_targeted_contract_info(CONTRACT)
+
+    prompts = dict((fields, content) for content, fields in backend.prompts)
+    assert "R$ 1.500,00" in prompts[("valor_bens",)]
+    assert "30 meses" not in prompts[("valor_bens",)]
+    assert prompts[("vigencia",)] == "CLÁUSULA TERCEIRA – DO PRAZO\nO prazo da locação é de 30 meses."
+    assert prompts[("contratante", "contratado")].startswith("CONTRATO DE LOCAÇÃO")
+    # Nenhuma cláusula trata de rescisão: o campo vem da chamada com o contrato inteiro
+    assert prompts[tuple(ModelAnswer.model_fields)] == CONTRACT
+    assert len(backend.prompts) == 6
+    assert list(answer) == list(ModelAnswer.model_fields)
+
+
+def test_extraction_mode_switch(backend: RecordingBackend, monkeypatch):
+    """
+    Tests that extract_contract_info only splits the prompt in "targeted" mode.
+    """
+    ai_service.extract_contract_info(CONTRACT)
+    assert len(backend.prompts) == 1
+
+    monkeypatch.setattr(ai_service, "EXTRACTION_MODE", "targeted")
+    ai_service.extract_contract_info(CONTRACT)
+    assert len(backend.prompts) == 7
@@ -1,10 +1,14 @@
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
+from app import contracts
 from app.models import Contract
 from sqlalchemy.orm import Session
 import json
 import io
+import os
+import time
+from fastapi import HTTPException
 
 # --- /contracts/upload Tests ---
 
@@ -86,6 +90,34 @@ def test_upload_pdf_success(
     assert contract_in_db.vigencia == mock_ai_service_response["vigencia"]
 
 
+@patch("app.contracts.extract_contract_info")
+@patch("app.contracts.extract_text_from_file")
+def test_cached_bytes_do_not_bypass_file_type_check(
+    mock_extract_text: MagicMock,
+    mock_extract_info: MagicMock,
+    authenticated_client: TestClient,
+    db_session: Session,
+    mock_ai_service_response: dict
+):
+    """
+    Tests that a .txt upload with the same bytes as an analyzed PDF is rejected,
+    instead of being served from the file-hash cache.
+    """
+    mock_extract_text.return_value = "Este é o texto extraído do contrato."
+    mock_extract_info.return_value = mock_ai_service_response
+    content = b"fake pdf content"
+
+    response = authenticated_client.post("/contracts/upload", files={"file": ("a.pdf", io.BytesIO(content), "application/pdf")})
+    assert response.status_code == 200
+
+    for params in ({}, {"async": "true"}):
+        response = authenticated_client.post(
+            "/contracts/upload", params=params, files={"file": ("a.txt", io.BytesIO(content), "text/plain")}
+        )
+        assert response.status_code == 400
+    assert db_session.query(Contract).count() == 1
+
+
 # --- /contracts/{filename} Tests ---
 
 def test_get_contract_unauthenticated(client: TestClient):
@@ -129,4 +161,237 @@ def test_get_contract_success(
     json_response = response.json()
     assert json_response["id"] == new_contract.id
     assert json_response["filename"] == "my_test_contract.pdf"
-    assert json_response["objeto"] == mock_ai_service_response["objeto"]
\ No newline at end of file
+    assert json_response["objeto"] == mock_ai_service_response["objeto"]
+
+@patch("app.contracts.extract_contract_info")
+@patch("app.contracts.extract_text_from_file")
+def test_upload_duplicate_served_from_cache(
+    mock_extract_text: MagicMock,
+    mock_extract_info: MagicMock,
+    authenticated_client: TestClient,
+    db_session: Session,
+    mock_ai_service_response: dict
+):
+    """
+    Tests that re-sending the same file skips both text extraction
+    and the AI call, while still storing a new contract row.
+    """
+    mock_extract_text.return_value = "Este é o texto extraído do contrato."
+    mock_extract_info.return_value = mock_ai_service_response
+
+    for name in ("first.pdf", "second.pdf"):
+        file = (name, io.BytesIO(b"same pdf content"), "application/pdf")
+        response = authenticated_client.post("/contracts/upload", files={"file": file})
+        assert response.status_code == 200
+        assert response.json()["vigencia"] == mock_ai_service_response["vigencia"]
+
+    mock_extract_text.assert_called_once()
+    mock_extract_info.assert_called_once()
+    assert db_session.query(Contract).count() == 2
+
+
+# --- Async job mode Tests ---
+
+def wait_for_job(client: TestClient, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/contracts/jobs/{job_id}").json()
+        if status["status"] in ("done", "failed"):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish in {timeout}s")
+
+
+@patch("app.contracts.extract_contract_info")
+@patch("app.contracts.extract_text_from_file")
+def test_upload_async_job_success(
+    mock_extract_text: MagicMock,
+    mock_extract_info: MagicMock,
+    authenticated_client: TestClient,
+    db_session: Session,
+    mock_ai_service_response: dict
+):
+    """
+    Tests that ?async=true returns 202 with a job id immediately, and that
+    the result becomes available through the job endpoints once processed.
+    """
+    mock_extract_text.return_value = "Este é o texto extraído do contrato."
+    mock_extract_info.return_value = mock_ai_service_response
+
+    file = ("contract.pdf", io.BytesIO(b"fake pdf content"), "application/pdf")
+    response = authenticated_client.post(
+        "/contracts/upload", params={"async": "true"}, files={"file": file}
+    )
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+    assert response.headers["location"] == f"/contracts/jobs/{job['id']}"
+
+    status = wait_for_job(authenticated_client, job["id"])
+    assert status["status"] == "done"
+
+    result = authenticated_client.get(f"/contracts/jobs/{job['id']}/result")
+    assert result.status_code == 200
+    assert result.json()["id"] == status["contract_id"]
+    assert result.json()["vigencia"] == mock_ai_service_response["vigencia"]
+    # The uploaded file is kept on disk only until the job finishes
+    assert os.listdir(contracts.JOBS_SPOOL_DIR) == []
+
+
+@patch("app.contracts.extract_text_from_file")
+def test_upload_async_job_failure(
+    mock_extract_text: MagicMock,
+    authenticated_client: TestClient,
+):
+    """
+    Tests that extraction errors are recorded on the job instead of
+    being lost, and that the result endpoint answers 409.
+    """
+    mock_extract_text.side_effect = HTTPException(status_code=500, detail="PDF corrompido")
+
+    file = ("broken.pdf", io.BytesIO(b"not a pdf"), "application/pdf")
+    job = authenticated_client.post(
+        "/contracts/upload", params={"async": "true"}, files={"file": file}
+    ).json()
+
+    status = wait_for_job(authenticated_client, job["id"])
+    assert status["status"] == "failed"
+    assert status["error"] == "PDF corrompido"
+
+    result = authenticated_client.get(f"/contracts/jobs/{job['id']}/result")
+    assert result.status_code == 409
+
+
+def test_get_job_not_found(authenticated_client: TestClient):
+    """
+    Tests getting a 404 response for an unknown job id.
+    """
+    response = authenticated_client.get("/contracts/jobs/doesnotexist")
+    assert response.status_code == 404
+
+
+def test_job_claimed_only_once(db_session: Session):
+    """
+    Tests that a pending job can be claimed by a single worker.
+    """
+    from app.contracts import claim_job
+    from app.models import AnalysisJob
+
+    db_session.add(AnalysisJob(id="job1", filename="a.pdf", status="pending"))
+    db_session.commit()
+
+    assert claim_job(db_session, "job1") is not None
+    assert claim_job(db_session, "job1") is None
+
+
+def test_resume_reclaims_only_expired_jobs(db_session: Session):
+    """
+    Tests that startup only requeues running jobs whose heartbeat expired.
+    """
+    from app.contracts import resume_pending_jobs
+    from app.models import AnalysisJob
+    from datetime import datetime, timedelta
+
+    now = datetime.utcnow()
+    db_session.add_all([
+        AnalysisJob(id="live", filename="a.pdf", status="running", claimed_by="w1", heartbeat_at=now),
+        AnalysisJob(
+            id="stale", filename="b.pdf", status="running", claimed_by="w2", heartbeat_at=now - timedelta(hours=1)
+        ),
+    ])
+    db_session.commit()
+
+    with patch("app.contracts.job_pool") as pool:
+        resume_pending_jobs()
+
+    submitted = [c.args[1] for c in pool.submit.call_args_list]
+    assert submitted == ["stale"]
+    db_session.expire_all()
+    assert db_session.get(AnalysisJob, "live").status == "running"
+    assert db_session.get(AnalysisJob, "stale").status == "pending"
+
+
+@patch("app.contracts.extract_contract_info")
+@patch("app.contracts.extract_text_from_file")
+def test_upload_without_text_skips_ai(
+    mock_extract_text: MagicMock,
+    mock_extract_info: MagicMock,
+    authenticated_client: TestClient,
+):
+    """
+    Tests that a document with no extractable text (e.g. a scanned PDF that
+    OCR could not read) is rejected without calling the AI service.
+    """
+    mock_extract_text.return_value = "\n\f\n  \n"
+
+    file = ("scanned.pdf", io.BytesIO(b"fake scanned pdf"), "application/pdf")
+    response = authenticated_client.post("/contracts/upload", files={"file": file})
+
+    assert response.status_code == 422
+    assert "Nenhum texto encontrado" in response.json()["detail"]
+    mock_extract_info.assert_not_called()
+
+
+def test_get_contract_conditional_and_cached(
+    authenticated_client: TestClient,
+    db_session: Session,
+    mock_ai_service_response: dict,
+):
+    """
+    Tests ETag / If-None-Match handling, that repeat reads are served from the
+    response cache, and that committing a change to the contract invalidates it.
+    """
+    contract = Contract(filename="cached.pdf", **mock_ai_service_response)
+    db_session.add(contract)
+    db_session.commit()
+
+    first = authenticated_client.get("/contracts/cached.pdf")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    response = authenticated_client.get("/contracts/cached.pdf", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    # A repeat read does not touch the database
+    with patch("app.contracts.Session.query", side_effect=AssertionError("database queried")):
+        assert authenticated_client.get("/contracts/cached.pdf").json() == first.json()
+
+    contract.vigencia = "36 meses"
+    db_session.commit()
+
+    response = authenticated_client.get("/contracts/cached.pdf", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["vigencia"] == "36 meses"
+
+
+def test_read_racing_a_commit_is_not_cached(
+    authenticated_client: TestClient,
+    db_session: Session,
+    mock_ai_service_response: dict,
+):
+    """
+    Tests that a response read before a concurrent commit is returned but not
+    stored, so the cache does not keep the data the commit replaced.
+    """
+    contract = Contract(filename="race.pdf", **mock_ai_service_response)
+    db_session.add(contract)
+    db_session.commit()
+    original = contracts.ContractData.model_validate
+
+    def commit_during_read(obj, **kwargs):
+        # The row is already loaded; another request commits a change before it is cached
+        data = original(obj, **kwargs)
+        contract.vigencia = "36 meses"
+        db_session.commit()
+        return data
+
+    with patch("app.contracts.ContractData.model_validate", side_effect=commit_during_read):
+        stale = authenticated_client.get("/contracts/race.pdf")
+    assert stale.json()["vigencia"] == mock_ai_service_response["vigencia"]
+
+    assert authenticated_client.get("/contracts/race.pdf").json()["vigencia"] == "36 meses"
@@ -0,0 +1,51 @@
+from io import BytesIO
+from pathlib import Path
+from docx import Document
+from app.docx_text import iter_docx_text
+from app.parsing import extract_docx_text
+
+EXAMPLE = Path(__file__).parent.parent / "examples" / "Modelo-de-Contrato-de-Locacao-de-Imovel-Residencial.docx"
+
+
+def make_docx() -> BytesIO:
+    doc = Document()
+    doc.add_paragraph("CONTRATO DE LOCAÇÃO")
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = "Locador"
+    table.cell(0, 1).text = "Maria da Silva"
+    table.cell(1, 0).text = "Valor do aluguel"
+    table.cell(1, 1).text = "R$ 1.500,00"
+    paragraph = doc.add_paragraph("Prazo:")
+    paragraph.add_run().add_tab()
+    paragraph.add_run("12 meses")
+    doc.add_paragraph("Cláusula final.")
+
+    stream = BytesIO()
+    doc.save(stream)
+    stream.seek(0)
+    return stream
+
+
+def test_tables_are_extracted_in_document_order():
+    """
+    Tests that table rows are emitted between the surrounding paragraphs,
+    with the cells of a row joined together.
+    """
+    assert list(iter_docx_text(make_docx())) == [
+        "CONTRATO DE LOCAÇÃO",
+        "Locador | Maria da Silva",
+        "Valor do aluguel | R$ 1.500,00",
+        "Prazo:\t12 meses",
+        "Cláusula final.",
+    ]
+
+
+def test_matches_python_docx_paragraphs():
+    """
+    Tests that, for a document without tables, the text is the same as the
+    paragraphs read by python-docx.
+    """
+    expected = "\n".join(p.text for p in Document(str(EXAMPLE)).paragraphs)
+
+    with open(EXAMPLE, "rb") as f:
+        assert extract_docx_text(f) == expected
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.models import Contract
+import csv
+import gzip
+import io
+import json
+
+
+def add_contracts(db_session: Session, base: dict, count: int, **overrides) -> list[Contract]:
+    contracts = [
+        Contract(filename=f"contract-{i:03d}.pdf", **{**base, **overrides})
+        for i in range(count)
+    ]
+    db_session.add_all(contracts)
+    db_session.commit()
+    return contracts
+
+
+def test_export_ndjson_streams_every_contract(
+    authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict, monkeypatch
+):
+    """
+    Tests that the NDJSON export has one object per contract, in id order, across several DB batches.
+    """
+    monkeypatch.setattr("app.export.EXPORT_BATCH_SIZE", 2)
+    contracts = add_contracts(db_session, mock_ai_service_response, 5)
+
+    response = authenticated_client.get("/contracts/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "attachment" in response.headers["content-disposition"]
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [c.id for c in contracts]
+    assert rows[0]["contratante"] == mock_ai_service_response["contratante"]
+    assert rows[0]["updated_at"] is not None
+
+
+def test_export_csv_and_filters(
+    authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict
+):
+    """
+    Tests the CSV header, JSON-encoded list cells and the party / changed_since filters.
+    """
+    add_contracts(db_session, mock_ai_service_response, 2)
+    add_contracts(db_session, mock_ai_service_response, 1, contratante=["Banco X"])
+
+    response = authenticated_client.get("/contracts/export", params={"format": "csv", "contratante": "banco x"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert json.loads(rows[0]["contratante"]) == ["Banco X"]
+
+    future = (datetime.utcnow() + timedelta(hours=1)).isoformat()
+    response = authenticated_client.get("/contracts/export", params={"changed_since": future})
+    assert response.text == ""
+
+    response = authenticated_client.get("/contracts/export", params={"format": "xml"})
+    assert response.status_code == 422
+
+
+def test_export_changed_since_with_offset(
+    authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict
+):
+    """
+    Tests that a changed_since with a UTC offset is compared as the same instant in UTC.
+    """
+    before, after = add_contracts(db_session, mock_ai_service_response, 2)
+    before.updated_at = datetime(2026, 1, 1, 12, 30)
+    after.updated_at = datetime(2026, 1, 1, 13, 30)
+    db_session.commit()
+
+    # 10:00 at -03:00 is 13:00 UTC
+    response = authenticated_client.get("/contracts/export", params={"changed_since": "2026-01-01T10:00:00-03:00"})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [after.id]
+
+
+def test_export_gzip(
+    authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict
+):
+    """
+    Tests that the export is gzip-encoded on the wire when the client accepts it.
+    """
+    add_contracts(db_session, mock_ai_service_response, 3)
+
+    with authenticated_client.stream(
+        "GET", "/contracts/export", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        body = gzip.decompress(b"".join(response.iter_raw()))
+
+    assert len(body.decode().splitlines()) == 3
+
+
+def test_export_requires_auth(client: TestClient):
+    response = client.get("/contracts/export")
+    assert response.status_code == 401
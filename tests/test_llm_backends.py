@@ -0,0 +1,65 @@
+import io
+import pytest
+from fastapi.testclient import TestClient
+from app.ai_service import ModelAnswer, extract_contract_info
+from app.llm_backends import FakeBackend, set_backend
+from app.llm_gateway import LLMGatewayError
+import json
+
+
+@pytest.fixture
+def fake_backend():
+    backend = FakeBackend(latency_ms=0, jitter_ms=0, error_rate=0, seed=1, through_gateway=False)
+    set_backend(backend)
+    yield backend
+    set_backend(None)
+
+
+def test_fake_backend_returns_model_answer_shape(fake_backend: FakeBackend):
+    """
+    Tests that the fake backend answers with data that validates against
+    ModelAnswer, deterministically for the same text.
+    """
+    first = extract_contract_info("CLÁUSULA PRIMEIRA - DO OBJETO")
+    second = extract_contract_info("CLÁUSULA PRIMEIRA - DO OBJETO")
+
+    assert first == second
+    assert ModelAnswer(**first)
+
+
+def test_fake_backend_errors_surface_as_503(
+    fake_backend: FakeBackend, authenticated_client: TestClient, monkeypatch
+):
+    """
+    Tests that simulated model failures reach the client as 503.
+    """
+    fake_backend.error_rate = 1.0
+    monkeypatch.setattr("app.contracts.extract_text_from_file", lambda file, on_page=None: "texto do contrato")
+
+    file = ("contract.pdf", io.BytesIO(b"fake pdf content"), "application/pdf")
+    response = authenticated_client.post("/contracts/upload", files={"file": file})
+
+    assert response.status_code == 503
+    assert "Falha simulada" in response.json()["detail"]
+
+
+def test_fake_backend_through_gateway_is_retried():
+    """
+    Tests that with through_gateway the fake answers come through an
+    LLMGateway, which retries simulated failures like network errors.
+    """
+    backend = FakeBackend(latency_ms=0, jitter_ms=0, error_rate=1.0, seed=1, through_gateway=True)
+    backend.gateway.retry_base = 0
+    set_backend(backend)
+    try:
+        with pytest.raises(LLMGatewayError, match="Falha simulada"):
+            extract_contract_info("CLÁUSULA PRIMEIRA - DO OBJETO")
+        assert backend.gateway.retries == backend.gateway.max_retries
+
+        backend.error_rate = 0
+        answer = extract_contract_info("CLÁUSULA PRIMEIRA - DO OBJETO")
+        assert ModelAnswer(**answer)
+        streamed = "".join(backend.stream_answer("CLÁUSULA PRIMEIRA - DO OBJETO", "", ModelAnswer))
+        assert json.loads(streamed) == answer
+    finally:
+        set_backend(None)
@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from google.genai import errors
+from app.llm_gateway import LLMGateway, LLMGatewayError, CircuitOpenError
+
+
+class FakeClient:
+    """
+    Mimics `genai.Client().aio.models.generate_content` with scripted outcomes.
+    """
+
+    def __init__(self, outcomes, delay=0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self.generate_content,
+            generate_content_stream=self.generate_content_stream,
+        ))
+
+    async def generate_content(self, model, contents, config):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+            if isinstance(outcome, Exception):
+                raise outcome
+            return SimpleNamespace(text=outcome, usage_metadata=None)
+        finally:
+            self.active -= 1
+
+    async def generate_content_stream(self, model, contents, config):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, Exception):
+            raise outcome
+
+        async def chunks():
+            for text in outcome.split(" "):
+                await asyncio.sleep(self.delay)
+                yield SimpleNamespace(text=text, usage_metadata=None)
+        return chunks()
+
+
+def make_gateway(client, **kwargs):
+    options = dict(requests_per_minute=0, tokens_per_minute=0, retry_base=0.001, retry_max=0.001)
+    options.update(kwargs)
+    return LLMGateway(client=client, **options)
+
+
+def call(gateway):
+    return gateway.generate(model="m", contents="texto", config={})
+
+
+def test_gateway_retries_transient_errors():
+    """
+    Tests that 429/5xx responses are retried and the call succeeds
+    once the model answers.
+    """
+    client = FakeClient([errors.APIError(429, {}), errors.APIError(503, {}), "ok"])
+    gateway = make_gateway(client, max_retries=3)
+
+    assert call(gateway).text == "ok"
+    assert client.calls == 3
+    assert gateway.stats()["retries"] == 2
+
+
+def test_gateway_does_not_retry_client_errors():
+    """
+    Tests that non-transient errors (e.g. 400) are raised immediately.
+    """
+    client = FakeClient([errors.APIError(400, {})])
+    gateway = make_gateway(client, max_retries=3)
+
+    with pytest.raises(errors.APIError):
+        call(gateway)
+    assert client.calls == 1
+
+
+def test_gateway_times_out_and_opens_circuit():
+    """
+    Tests that slow calls time out, and that repeated failures open the
+    circuit so later calls are refused without reaching the model.
+    """
+    client = FakeClient([], delay=0.2)
+    gateway = make_gateway(client, timeout=0.01, max_retries=1, circuit_failures=2)
+
+    with pytest.raises(LLMGatewayError):
+        call(gateway)
+    assert client.calls == 2
+
+    with pytest.raises(CircuitOpenError):
+        call(gateway)
+    assert client.calls == 2
+    assert gateway.stats()["circuit"] == "open"
+
+
+def test_gateway_bounds_concurrency():
+    """
+    Tests that no more than `max_concurrency` calls reach the model at once.
+    """
+    client = FakeClient([], delay=0.05)
+    gateway = make_gateway(client, max_concurrency=2)
+
+    async def burst():
+        await asyncio.gather(*[
+            gateway.agenerate(model="m", contents="texto", config={}) for _ in range(6)
+        ])
+
+    asyncio.run(burst())
+    assert client.calls == 6
+    assert client.max_active == 2
+
+
+def test_gateway_stream_retries_before_first_chunk():
+    """
+    Tests that streaming calls are retried on transient errors raised before
+    any output, and that chunks are relayed to the calling thread in order.
+    """
+    client = FakeClient([errors.APIError(503, {}), "um dois três"])
+    gateway = make_gateway(client, max_retries=2)
+
+    chunks = [chunk.text for chunk in gateway.stream(model="m", contents="texto", config={})]
+
+    assert chunks == ["um", "dois", "três"]
+    assert client.calls == 2
+    assert gateway.stats()["in_flight"] == 0
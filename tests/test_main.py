@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 import pytest
 from fastapi.testclient import TestClient
 
@@ -43,4 +46,20 @@ def test_login_failure_wrong_username(client: TestClient):
         data={"username": "notadmin", "password": "admin"}
     )
     assert response.status_code == 400
-    assert response.json() == {"detail": "Usuário ou senha inválidos"}
\ No newline at end of file
+    assert response.json() == {"detail": "Usuário ou senha inválidos"}
+
+def test_import_is_lightweight(tmp_path):
+    """
+    Tests that importing the application neither loads the heavy document/AI
+    libraries nor touches the database, so new workers start quickly.
+    """
+    database = tmp_path / "cold.db"
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('google.genai', 'pymupdf', 'docx') if m in sys.modules))"
+    )
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}", "JWT_SECRET_KEY": "test"}
+    output = subprocess.check_output([sys.executable, "-c", code], env=env, text=True)
+
+    assert output.strip() == ""
+    assert not database.exists()
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.metrics import record_llm_usage
+import io
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@patch("app.contracts.extract_contract_info")
+@patch("app.contracts.extract_text_from_file")
+def test_upload_reports_stage_timings(
+    mock_extract_text: MagicMock,
+    mock_extract_info: MagicMock,
+    authenticated_client: TestClient,
+    mock_ai_service_response: dict,
+):
+    """
+    Tests that an upload carries a Server-Timing breakdown and that the same
+    stages are observed in the /metrics histograms.
+    """
+    mock_extract_text.return_value = "Texto do contrato para métricas."
+    mock_extract_info.return_value = mock_ai_service_response
+    before = sample("contract_api_stage_seconds_count", stage="llm")
+
+    file = ("metrics.pdf", io.BytesIO(b"pdf for metrics"), "application/pdf")
+    response = authenticated_client.post("/contracts/upload", files={"file": file})
+
+    assert response.status_code == 200
+    stages = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert stages == ["upload_read", "extract_pdf", "llm_queue_interactive", "llm", "db_commit", "total"]
+    assert sample("contract_api_stage_seconds_count", stage="llm") == before + 1
+
+    metrics = authenticated_client.get("/metrics")
+    assert metrics.status_code == 200
+    assert 'contract_api_stage_seconds_bucket{le="0.005",stage="extract_pdf"}' in metrics.text
+    assert "contract_api_requests_in_flight" in metrics.text
+
+
+def test_llm_usage_tokens_counted():
+    """
+    Tests that prompt and candidate token counts from usage metadata are
+    added to the input/output token counters.
+    """
+    before_in = sample("contract_api_llm_tokens_total", direction="input")
+    before_out = sample("contract_api_llm_tokens_total", direction="output")
+
+    record_llm_usage(SimpleNamespace(prompt_token_count=1200, candidates_token_count=300))
+    record_llm_usage(None)
+
+    assert sample("contract_api_llm_tokens_total", direction="input") == before_in + 1200
+    assert sample("contract_api_llm_tokens_total", direction="output") == before_out + 300
@@ -0,0 +1,131 @@
+import json
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app import migrations
+from app.migrations import run_migrations
+from app.models import AnalysisJob, Contract, ContractParty, ContractPartyTotal, ContractTotal, ExtractionCacheEntry, SchemaMigration
+
+
+def test_json_list_migration_converts_legacy_rows(tmp_path):
+    """
+    Tests that rows written with the old double-encoded text columns are
+    read back as real lists after migrating, and that re-running is a no-op.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE contracts (id INTEGER PRIMARY KEY, filename VARCHAR, "
+            "contratante TEXT, contratado TEXT, valor_bens TEXT, obrigacoes_contratante TEXT, "
+            "obrigacoes_contratada TEXT, objeto TEXT, vigencia TEXT, clausula_rescisao TEXT)"
+        ))
+        conn.execute(
+            text(
+                "INSERT INTO contracts (filename, contratante, contratado, valor_bens, obrigacoes_contratante, "
+                "obrigacoes_contratada, objeto) VALUES ('old.pdf', :a, :b, 'R$ 1.500,00', :c, :d, :e)"
+            ),
+            {
+                "a": json.dumps(["Empresa Teste LTDA"]),
+                "b": "Fornecedor SA",
+                "c": json.dumps(json.dumps(["Pagar o valor"])),
+                "d": "",
+                "e": None,
+            },
+        )
+        conn.execute(text("CREATE TABLE extraction_cache (key VARCHAR PRIMARY KEY, result TEXT NOT NULL, created_at DATETIME)"))
+        conn.execute(
+            text("INSERT INTO extraction_cache (key, result) VALUES ('text:x', :r)"),
+            {"r": json.dumps({"contratante": json.dumps(["Empresa Teste LTDA"]), "vigencia": "12 meses"})},
+        )
+
+    run_migrations(engine)
+    run_migrations(engine)
+
+    db = sessionmaker(bind=engine)()
+    try:
+        contract = db.query(Contract).one()
+        assert contract.contratante == ["Empresa Teste LTDA"]
+        assert contract.contratado == ["Fornecedor SA"]
+        assert contract.obrigacoes_contratante == ["Pagar o valor"]
+        assert contract.obrigacoes_contratada == []
+        assert contract.objeto == []
+        assert contract.text_hash is None
+        assert (contract.version, contract.previous_id) == (1, None)
+        assert contract.updated_at is not None
+        assert (contract.valor_centavos, contract.moeda) == (150000, "BRL")
+        assert [(t.moeda, t.contracts, t.valor_centavos) for t in db.query(ContractTotal)] == [("BRL", 1, 150000)]
+        assert db.get(ContractPartyTotal, ("contratado", "Fornecedor SA", "BRL")).valor_centavos == 150000
+        assert db.get(ContractParty, ("contratante", "empresa teste ltda", contract.id)) is not None
+
+        cached = json.loads(db.get(ExtractionCacheEntry, "text:x").result)
+        assert cached["contratante"] == ["Empresa Teste LTDA"]
+        assert [m.version for m in db.query(SchemaMigration)] == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    finally:
+        db.close()
+
+
+def test_job_payload_migration_moves_files_to_disk(tmp_path, monkeypatch):
+    """
+    Tests that uploads of unfinished jobs stored in the database are moved to
+    the jobs spool directory and the payload column is dropped.
+    """
+    monkeypatch.setattr(migrations, "JOBS_SPOOL_DIR", str(tmp_path / "jobs"))
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE analysis_jobs (id VARCHAR PRIMARY KEY, owner VARCHAR, filename VARCHAR, "
+            "status VARCHAR NOT NULL, payload BLOB, error TEXT, contract_id INTEGER, "
+            "created_at DATETIME, finished_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO analysis_jobs (id, filename, status, payload) VALUES ('j1', 'a.pdf', 'pending', :p)"
+        ), {"p": b"%PDF-1.4 legacy"})
+
+    run_migrations(engine)
+
+    db = sessionmaker(bind=engine)()
+    try:
+        job = db.get(AnalysisJob, "j1")
+        assert job.payload_path.endswith(".pdf")
+        with open(job.payload_path, "rb") as f:
+            assert f.read() == b"%PDF-1.4 legacy"
+    finally:
+        db.close()
+    with engine.connect() as conn:
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(analysis_jobs)"))]
+    assert "payload" not in columns
+
+
+def test_search_index_migration_with_accented_legacy_rows(tmp_path):
+    """
+    Tests that legacy rows whose lists were serialized with escaped accents
+    are rewritten and indexed without corrupting the full-text index.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE contracts (id INTEGER PRIMARY KEY, filename VARCHAR, "
+            "contratante TEXT, contratado TEXT, valor_bens TEXT, obrigacoes_contratante TEXT, "
+            "obrigacoes_contratada TEXT, objeto TEXT, vigencia TEXT, clausula_rescisao TEXT)"
+        ))
+        conn.execute(
+            text(
+                "INSERT INTO contracts (filename, contratante, contratado, objeto) "
+                "VALUES ('old.pdf', :a, :b, :c)"
+            ),
+            {
+                "a": json.dumps(["Construções Ação LTDA"]),
+                "b": json.dumps(["João Müller"]),
+                "c": json.dumps(["Locação de imóvel"]),
+            },
+        )
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("INSERT INTO contracts_fts(contracts_fts) VALUES ('integrity-check')"))
+        matches = conn.execute(
+            text("SELECT rowid FROM contracts_fts WHERE contracts_fts MATCH :q"), {"q": "construcoes locacao"}
+        ).scalars().all()
+        assert matches == [1]
+        contratante = conn.execute(text("SELECT contratante FROM contracts")).scalar()
+    assert "Construções Ação LTDA" in contratante
@@ -0,0 +1,64 @@
+from unittest.mock import patch
+import pymupdf
+import pytest
+from app import ocr
+from app.parsing import extract_pdf_text
+
+
+@pytest.fixture(autouse=True)
+def inline_ocr(monkeypatch):
+    monkeypatch.setattr(ocr, "OCR_WORKERS", 1)
+    ocr.clear_cache()
+    yield
+    ocr.clear_cache()
+
+
+def make_scanned_pdf() -> bytes:
+    """
+    One digital page followed by two image-only (scanned) pages.
+    """
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), "Cláusula primeira: objeto do contrato.")
+    for shade in (0.2, 0.8):
+        pixmap = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 40, 40), False)
+        pixmap.clear_with(int(shade * 255))
+        doc.new_page().insert_image(pymupdf.Rect(72, 72, 300, 300), pixmap=pixmap)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+PAGE_WORDS = {1: "locação", 2: "garantia"}
+
+
+def fake_ocr(source, page_numbers):
+    return [[(72, 72 * n, 300, 100, f"texto reconhecido: {PAGE_WORDS[n]}")] for n in page_numbers]
+
+
+def test_ocr_only_pages_without_text():
+    """
+    Tests that only image-only pages are sent to OCR, and that a second
+    extraction of the same pages is served from the per-page cache.
+    """
+    data = make_scanned_pdf()
+    with patch("app.ocr.ocr_page_blocks", side_effect=fake_ocr) as mock_ocr:
+        text = extract_pdf_text(data)
+        assert mock_ocr.call_args.args[1] == [1, 2]
+
+        assert "Cláusula primeira" in text
+        assert "texto reconhecido: locação" in text
+        assert "texto reconhecido: garantia" in text
+
+        assert extract_pdf_text(data) == text
+        mock_ocr.assert_called_once()
+
+
+def test_ocr_failure_leaves_pages_empty():
+    """
+    Tests that a missing Tesseract installation does not break extraction
+    of the pages that already have text.
+    """
+    with patch("app.ocr.ocr_page_blocks", side_effect=RuntimeError("No tessdata specified")):
+        text = extract_pdf_text(make_scanned_pdf())
+    assert text.split("\f")[0].strip() == "Cláusula primeira: objeto do contrato."
+    assert not text.split("\f", 1)[1].strip()
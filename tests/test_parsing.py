@@ -0,0 +1,61 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from app import parsing
+from app.parsing import ParseTimeoutError, extract_pdf_text, parse
+
+EXAMPLE = "examples/contrato_MPCPA_Engnew.pdf"
+
+
+@pytest.fixture(autouse=True)
+def parse_pool(monkeypatch):
+    monkeypatch.setattr(parsing, "PARSE_WORKERS", 2)
+    yield
+    parsing.shutdown()
+
+
+def test_pool_matches_inline_extraction():
+    """
+    Tests that a document parsed in the process pool yields the same text as
+    an in-process extraction, and that page progress is relayed back in order.
+    """
+    progress = []
+
+    text = parse(EXAMPLE, EXAMPLE, on_page=lambda page, pages: progress.append((page, pages)))
+
+    assert text == extract_pdf_text(EXAMPLE)
+    pages = progress[-1][1]
+    assert progress == [(page, pages) for page in range(1, pages + 1)]
+
+
+def test_timeout_only_stops_the_slow_document():
+    """
+    Tests that a parse exceeding the timeout raises ParseTimeoutError without
+    affecting a document being parsed at the same time.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        slow = executor.submit(parse, EXAMPLE, EXAMPLE, timeout=0.001)
+        other = executor.submit(parse, EXAMPLE, EXAMPLE)
+
+        with pytest.raises(ParseTimeoutError) as error:
+            slow.result()
+        assert not error.value.queued
+        assert other.result() == extract_pdf_text(EXAMPLE)
+
+
+def test_queue_wait_is_not_counted_in_the_timeout(monkeypatch):
+    """
+    Tests that waiting for a free slot is bounded separately from the
+    extraction timeout and reported as a queued timeout.
+    """
+    monkeypatch.setattr(parsing, "PARSE_WORKERS", 1)
+    monkeypatch.setattr(parsing, "PARSE_QUEUE_TIMEOUT_SECONDS", 0.01)
+    slots = parsing.get_slots()
+    slots.acquire()
+    try:
+        with pytest.raises(ParseTimeoutError) as error:
+            parse(EXAMPLE, EXAMPLE)
+        assert error.value.queued
+    finally:
+        slots.release()
+
+    assert parse(EXAMPLE, EXAMPLE) == extract_pdf_text(EXAMPLE)
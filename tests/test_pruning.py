@@ -0,0 +1,71 @@
+from app.parsing import extract_pdf_text
+from app.pruning import prune_repeated_blocks
+
+
+def test_prune_repeated_blocks_removes_headers_footers_and_page_numbers():
+    """
+    Tests that blocks repeated at the same position across pages are removed,
+    page numbers are recognized despite changing digits, and body text is kept.
+    """
+    bodies = ["Do objeto do contrato.", "Do valor e pagamento.", "Da rescisão."]
+    pages = [
+        [
+            (100, 30, 500, 50, "PREFEITURA MUNICIPAL - CONTRATO 12/2024"),
+            (100, 100, 500, 300, body),
+            (100, 740, 300, 760, f"{n} / 3"),
+        ]
+        for n, body in enumerate(bodies, start=1)
+    ]
+
+    pruned, stats = prune_repeated_blocks(pages)
+
+    assert [[block[4] for block in page] for page in pruned] == [[body] for body in bodies]
+    assert stats["blocks"] == 6
+    assert stats["chars"] > 0 and stats["tokens"] > 0
+
+
+def test_prune_signature_stamp_on_single_page():
+    """
+    Tests that e-signature stamps in the page margin are removed even when
+    they do not repeat.
+    """
+    pages = [[
+        (100, 100, 500, 300, "O CONTRATANTE pagará o valor mensal."),
+        (330, 770, 500, 830, "Assinado digitalmente por EMPRESA LTDA\nDN: C=BR, O=ICP-Brasil"),
+    ]]
+
+    pruned, stats = prune_repeated_blocks(pages, [(595, 842)])
+
+    assert [block[4] for block in pruned[0]] == ["O CONTRATANTE pagará o valor mensal."]
+    assert stats["blocks"] == 1
+
+
+def test_prune_keeps_body_text_mentioning_signatures_and_numbers():
+    """
+    Tests that body clauses citing e-signatures and bare numbers such as
+    table cells are kept, since they are neither repeated nor in the margin.
+    """
+    clause = "As partes reconhecem a validade do documento assinado eletronicamente (ICP-Brasil)."
+    pages = [[
+        (100, 100, 500, 300, clause),
+        (100, 320, 200, 340, "12"),
+        (220, 320, 320, 340, "2024"),
+        (280, 800, 320, 820, "1"),
+    ]]
+
+    pruned, stats = prune_repeated_blocks(pages, [(595, 842)])
+
+    assert [block[4] for block in pruned[0]] == [clause, "12", "2024"]
+    assert stats["blocks"] == 1
+
+
+def test_extract_pdf_text_prunes_example_contract():
+    """
+    Tests the pruning stage against the signed example contract.
+    """
+    text = extract_pdf_text("examples/contrato_MPCPA_Engnew.pdf")
+
+    assert "CLÁUSULA PRIMEIRA" in text
+    assert "ASSINADO ELETRONICAMENTE" not in text
+    assert "Identificador de autenticação" not in text
+    assert "1 / 13" not in text
@@ -0,0 +1,48 @@
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.models import Contract, ContractText
+from app.reanalysis import reanalyze_contracts
+from app.text_store import load_text
+import io
+
+
+@patch("app.contracts.extract_contract_info")
+@patch("app.contracts.extract_text_from_file")
+def test_reanalysis_uses_stored_text(
+    mock_extract_text: MagicMock,
+    mock_extract_info: MagicMock,
+    authenticated_client: TestClient,
+    db_session: Session,
+    mock_ai_service_response: dict,
+):
+    """
+    Tests that uploads store the extracted text once per distinct content, and
+    that re-analysis updates every contract from it without parsing any file.
+    """
+    text = "Contrato de locação de imóvel. " * 200
+    mock_extract_text.return_value = text
+    mock_extract_info.return_value = mock_ai_service_response
+
+    for i in range(2):
+        file = (f"contract-{i}.pdf", io.BytesIO(b"pdf %d" % i), "application/pdf")
+        assert authenticated_client.post("/contracts/upload", files={"file": file}).status_code == 200
+
+    (stored,) = db_session.query(ContractText).all()
+    assert stored.compressed_size < stored.size
+    assert load_text(db_session, stored.hash) == text
+    assert {c.text_hash for c in db_session.query(Contract)} == {stored.hash}
+
+    new_answer = {**mock_ai_service_response, "vigencia": "36 meses", "objeto": ["Locação de imóvel"]}
+    mock_extract_text.reset_mock()
+    with patch("app.reanalysis.extract_contract_info", return_value=new_answer) as mock_reanalyze:
+        stats = reanalyze_contracts(db_session, batch_size=1, concurrency=2)
+
+    mock_reanalyze.assert_called_once_with(text)
+    mock_extract_text.assert_not_called()
+    assert stats == {"texts": 1, "contracts": 2, "failed": 0, "skipped": 0}
+
+    db_session.expire_all()
+    for contract in db_session.query(Contract):
+        assert contract.vigencia == "36 meses"
+        assert contract.objeto == ["Locação de imóvel"]
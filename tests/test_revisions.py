@@ -0,0 +1,124 @@
+import io
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.clauses import split_clauses
+from app.revisions import analyze_revision, diff_clauses
+
+CLAUSES = [
+    "CONTRATO DE PRESTAÇÃO DE SERVIÇOS\nCONTRATANTE: Empresa Teste LTDA\nCONTRATADA: Fornecedor SA",
+    "CLÁUSULA PRIMEIRA – DO OBJETO\nPrestação de serviços de manutenção predial.",
+    "CLÁUSULA SEGUNDA – DO VALOR\nO valor mensal é de R$ 10.000,00.",
+    "CLÁUSULA TERCEIRA – DAS OBRIGAÇÕES\nA CONTRATADA deve manter equipe no local.",
+    "CLÁUSULA QUARTA – DO PRAZO\nO prazo de vigência é de 12 meses.",
+    "CLÁUSULA QUINTA – DA RESCISÃO\nA rescisão exige aviso prévio de 30 dias.",
+    "CLÁUSULA SEXTA – DO FORO\nFica eleito o foro da comarca de Belém.",
+]
+PREVIOUS_TEXT = "\n".join(CLAUSES)
+REVISED_TEXT = PREVIOUS_TEXT.replace("12 meses", "24 meses")
+
+
+def test_split_clauses_by_heading():
+    """
+    Tests that the text is split at each clause heading, keeping the preamble.
+    """
+    assert split_clauses(PREVIOUS_TEXT) == CLAUSES
+
+
+def test_diff_ignores_whitespace_changes():
+    """
+    Tests that only the amended clause is reported, and that reflowed lines
+    are not considered a change.
+    """
+    previous = split_clauses(PREVIOUS_TEXT)
+    current = split_clauses(REVISED_TEXT.replace("DO OBJETO\n", "DO OBJETO \n"))
+
+    assert diff_clauses(previous, current) == ([4], [4])
+
+
+@patch("app.revisions.generate_answer")
+def test_revision_sends_only_changed_clauses(mock_generate: MagicMock, mock_ai_service_response: dict):
+    """
+    Tests that a one-clause amendment sends the changed clause, its neighbors
+    and its previous wording, and that the partial answer is merged into the
+    previous fields.
+    """
+    mock_generate.return_value = {
+        "contratante": [], "contratado": [], "valor_bens": "", "obrigacoes_contratante": [],
+        "obrigacoes_contratada": [], "objeto": [], "vigencia": "24 meses", "clausula_rescisao": "",
+    }
+
+    info = analyze_revision(PREVIOUS_TEXT, mock_ai_service_response, REVISED_TEXT)
+
+    prompt = mock_generate.call_args.args[0]
+    assert "24 meses" in prompt and "12 meses" in prompt
+    assert CLAUSES[3] in prompt and CLAUSES[5] in prompt
+    assert CLAUSES[1] not in prompt and CLAUSES[6] not in prompt
+    assert info == {**mock_ai_service_response, "vigencia": "24 meses"}
+
+
+@patch("app.revisions.generate_answer")
+@patch("app.contracts.extract_contract_info")
+@patch("app.contracts.extract_text_from_file")
+def test_upload_revision(
+    mock_extract_text: MagicMock,
+    mock_extract_info: MagicMock,
+    mock_generate: MagicMock,
+    authenticated_client: TestClient,
+    db_session: Session,
+    mock_ai_service_response: dict,
+):
+    """
+    Tests that uploading with `revises` stores a new version linked to the
+    previous one, analyzed incrementally instead of with a full analysis.
+    """
+    mock_extract_text.return_value = PREVIOUS_TEXT
+    mock_extract_info.return_value = mock_ai_service_response
+    first = authenticated_client.post(
+        "/contracts/upload", files={"file": ("contrato.pdf", io.BytesIO(b"v1"), "application/pdf")}
+    ).json()
+    assert (first["version"], first["previous_id"]) == (1, None)
+
+    mock_extract_text.return_value = REVISED_TEXT
+    mock_generate.return_value = {"vigencia": "24 meses"}
+    response = authenticated_client.post(
+        f"/contracts/upload?revises={first['id']}",
+        files={"file": ("contrato-aditivo.pdf", io.BytesIO(b"v2"), "application/pdf")},
+    )
+
+    assert response.status_code == 200
+    revised = response.json()
+    assert (revised["version"], revised["previous_id"]) == (2, first["id"])
+    assert revised["vigencia"] == "24 meses"
+    assert revised["contratante"] == mock_ai_service_response["contratante"]
+    mock_extract_info.assert_called_once()
+    mock_generate.assert_called_once()
+
+    # Resending the same amendment is served from the cache without loading the previous text
+    with patch("app.revisions.load_text") as mock_load_text:
+        again = authenticated_client.post(
+            f"/contracts/upload?revises={first['id']}",
+            files={"file": ("contrato-aditivo.pdf", io.BytesIO(b"v2"), "application/pdf")},
+        )
+    assert again.json()["vigencia"] == "24 meses"
+    mock_load_text.assert_not_called()
+
+    # The same bytes uploaded on their own get a full analysis, not the merged revision
+    standalone = authenticated_client.post(
+        "/contracts/upload", files={"file": ("contrato-aditivo.pdf", io.BytesIO(b"v2"), "application/pdf")}
+    ).json()
+    assert (standalone["version"], standalone["previous_id"]) == (1, None)
+    assert standalone["vigencia"] == mock_ai_service_response["vigencia"]
+    assert mock_extract_info.call_count == 2
+
+
+def test_upload_revision_of_unknown_contract(authenticated_client: TestClient):
+    """
+    Tests that `revises` pointing to a missing contract returns 404.
+    """
+    response = authenticated_client.post(
+        "/contracts/upload?revises=999",
+        files={"file": ("contrato.pdf", io.BytesIO(b"v2"), "application/pdf")},
+    )
+
+    assert response.status_code == 404
@@ -0,0 +1,147 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.jobs import JobPool
+from app.scheduler import BULK, INTERACTIVE, FairScheduler, SchedulerFullError
+
+
+def wait_until(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def dispatch_order(scheduler: FairScheduler, requests: list[tuple[str, str]]) -> list[str]:
+    """
+    Queues `(user, priority)` requests behind a held slot, one at a time, then
+    frees the slot and returns the users in the order the scheduler ran them.
+    """
+    blocker = scheduler.acquire("blocker", BULK)
+    order, threads = [], []
+
+    def run(user, priority):
+        ticket = scheduler.acquire(user, priority)
+        order.append(user)
+        scheduler.release(ticket)
+
+    for count, (user, priority) in enumerate(requests, start=1):
+        thread = threading.Thread(target=run, args=(user, priority))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: sum(s["queued"] for s in scheduler.stats().values()) == count)
+
+    scheduler.release(blocker)
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_interactive_runs_before_queued_bulk_work():
+    scheduler = FairScheduler(max_concurrency=1, reserved=0)
+    order = dispatch_order(scheduler, [("a", BULK), ("a", BULK), ("b", INTERACTIVE)])
+    assert order == ["b", "a", "a"]
+
+
+def test_users_share_a_class_fairly_by_weight():
+    """
+    Tests that a user arriving after another's backlog is served in turn, and
+    that a heavier weight gets proportionally more turns.
+    """
+    scheduler = FairScheduler(max_concurrency=1, reserved=0)
+    order = dispatch_order(scheduler, [("a", BULK)] * 4 + [("b", BULK)] * 2)
+    assert order == ["a", "b", "a", "b", "a", "a"]
+
+    scheduler = FairScheduler(max_concurrency=1, reserved=0, weights={"b": 2})
+    order = dispatch_order(scheduler, [("a", BULK)] * 3 + [("b", BULK)] * 4)
+    assert order[:5].count("b") >= 3
+
+
+def test_per_user_cap_and_reserved_interactive_slot():
+    scheduler = FairScheduler(max_concurrency=3, reserved=1, user_concurrency=1)
+    first = scheduler.acquire("a", BULK)
+    other_user = scheduler.acquire("b", BULK)
+
+    # "a" is at its cap, and the remaining slot is reserved for interactive work
+    waiting = threading.Thread(target=lambda: scheduler.release(scheduler.acquire("c", BULK)))
+    waiting.start()
+    wait_until(lambda: scheduler.stats()[BULK]["queued"] == 1)
+    interactive = scheduler.acquire("a", INTERACTIVE)
+
+    for ticket in (first, other_user, interactive):
+        scheduler.release(ticket)
+    waiting.join(timeout=5)
+    assert scheduler.stats()[BULK] == {"queued": 0, "admitted": 0, "running": 0, "users_waiting": 0}
+
+
+def test_admission_control():
+    scheduler = FairScheduler(max_concurrency=1, max_queued=10, max_queued_per_user=1)
+    held = scheduler.acquire("a", INTERACTIVE)
+    thread = threading.Thread(target=lambda: scheduler.release(scheduler.acquire("a", INTERACTIVE)))
+    thread.start()
+    wait_until(lambda: scheduler.stats()[INTERACTIVE]["queued"] == 1)
+
+    with pytest.raises(SchedulerFullError) as error:
+        scheduler.admit("a", INTERACTIVE)
+    assert error.value.retry_after >= 1
+    scheduler.admit("b", INTERACTIVE)
+    scheduler.admit("a", BULK)
+
+    scheduler.release(held)
+    thread.join(timeout=5)
+
+
+def test_admitted_uploads_hold_their_place_until_released():
+    """
+    Tests that uploads still being read count against the queue limits, that
+    reaching the queue consumes the reservation, and that releasing frees it.
+    """
+    scheduler = FairScheduler(max_concurrency=1, max_queued=2, max_queued_per_user=2)
+    first = scheduler.admit("a", INTERACTIVE)
+    second = scheduler.admit("b", INTERACTIVE)
+    with pytest.raises(SchedulerFullError):
+        scheduler.admit("c", INTERACTIVE)
+
+    with first:
+        scheduler.release(scheduler.acquire("a", INTERACTIVE))
+        assert scheduler.stats()[INTERACTIVE]["admitted"] == 1
+    second.release()
+    second.release()
+    assert scheduler.stats()[INTERACTIVE] == {"queued": 0, "admitted": 0, "running": 0, "users_waiting": 0}
+    scheduler.admit("c", INTERACTIVE)
+
+
+def test_queue_wait_times_out():
+    scheduler = FairScheduler(max_concurrency=1, queue_timeout=0.05)
+    held = scheduler.acquire("a", INTERACTIVE)
+    with pytest.raises(SchedulerFullError) as error:
+        scheduler.acquire("b", INTERACTIVE)
+    assert error.value.retry_after >= 1
+    assert scheduler.stats()[INTERACTIVE] == {"queued": 0, "admitted": 0, "running": 1, "users_waiting": 0}
+
+    scheduler.release(held)
+    scheduler.release(scheduler.acquire("b", INTERACTIVE))
+
+
+def test_upload_returns_429_when_queue_is_full(authenticated_client: TestClient, monkeypatch):
+    monkeypatch.setattr("app.contracts.llm_scheduler", FairScheduler(max_queued=0))
+    response = authenticated_client.post(
+        "/contracts/upload", files={"file": ("contrato.pdf", b"%PDF-1.4", "application/pdf")}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_job_pool_serves_owners_in_turn():
+    pool = JobPool(max_workers=1, max_pending=10, max_pending_per_owner=3)
+    gate, order = threading.Event(), []
+    pool.submit(gate.wait, owner="a")
+    for i in range(3):
+        assert pool.submit(order.append, f"a{i}", owner="a")
+    assert not pool.submit(order.append, "a3", owner="a")
+    assert pool.submit(order.append, "b0", owner="b")
+
+    gate.set()
+    pool.shutdown(wait=True)
+    assert order == ["a0", "b0", "a1", "a2"]
@@ -0,0 +1,115 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.models import Contract, ContractParty
+
+
+def add_contracts(db_session: Session, base: dict, count: int, **overrides) -> list[Contract]:
+    contracts = [
+        Contract(filename=f"contract-{i:03d}.pdf", **{**base, **overrides})
+        for i in range(count)
+    ]
+    db_session.add_all(contracts)
+    db_session.commit()
+    return contracts
+
+
+def test_list_contracts_keyset_pagination(
+    authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict
+):
+    """
+    Tests that walking the cursor returns every contract exactly once, newest first.
+    """
+    contracts = add_contracts(db_session, mock_ai_service_response, 5)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = authenticated_client.get("/contracts", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted((c.id for c in contracts), reverse=True)
+
+
+def test_list_contracts_filters(
+    authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict
+):
+    """
+    Tests filtering by filename and by membership in the JSON party lists.
+    """
+    add_contracts(db_session, mock_ai_service_response, 2)
+    add_contracts(db_session, mock_ai_service_response, 1, contratante=["Outra Empresa SA", "Banco X"])
+
+    response = authenticated_client.get("/contracts", params={"contratante": "banco x"})
+    assert [item["contratante"] for item in response.json()["items"]] == [["Outra Empresa SA", "Banco X"]]
+
+    response = authenticated_client.get("/contracts", params={"filename": "contract-001.pdf"})
+    assert [item["filename"] for item in response.json()["items"]] == ["contract-001.pdf"]
+
+    response = authenticated_client.get("/contracts", params={"cursor": "abc"})
+    assert response.status_code == 400
+
+
+def test_party_filter_follows_updates_and_deletes(
+    authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict
+):
+    """
+    Tests that the contract_parties index used by the party filters is kept
+    in sync when a contract's parties change or the contract is deleted.
+    """
+    first, second = add_contracts(db_session, mock_ai_service_response, 2)
+
+    def filtered(**params) -> list[int]:
+        return [item["id"] for item in authenticated_client.get("/contracts", params=params).json()["items"]]
+
+    assert filtered(contratante="EMPRESA TESTE LTDA") == [second.id, first.id]
+
+    first.contratante = ["Banco X"]
+    db_session.delete(second)
+    db_session.commit()
+
+    assert filtered(contratante="empresa teste ltda") == []
+    assert filtered(contratante="banco x") == [first.id]
+    assert db_session.query(ContractParty).filter(ContractParty.contract_id == second.id).count() == 0
+
+
+def test_search_contracts(
+    authenticated_client: TestClient, db_session: Session, mock_ai_service_response: dict
+):
+    """
+    Tests full-text search: accents are ignored, prefixes match, every word is
+    required, and rows inserted or updated later are picked up by the index.
+    """
+    add_contracts(db_session, mock_ai_service_response, 3)
+    (other,) = add_contracts(
+        db_session, mock_ai_service_response, 1,
+        objeto=["Locação de imóvel comercial"],
+        clausula_rescisao="Rescisão sem multa após 12 meses.",
+    )
+
+    response = authenticated_client.get("/contracts/search", params={"q": "locacao imov"})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [other.id]
+
+    response = authenticated_client.get("/contracts/search", params={"q": "rescisao", "limit": 2})
+    first = response.json()
+    assert len(first["items"]) == 2 and first["next_cursor"]
+    response = authenticated_client.get(
+        "/contracts/search", params={"q": "rescisao", "limit": 2, "cursor": first["next_cursor"]}
+    )
+    second = response.json()
+    assert second["next_cursor"] is None
+    ids = [item["id"] for item in first["items"] + second["items"]]
+    assert len(ids) == len(set(ids)) == 4
+
+    other.objeto = ["Cessão de direitos"]
+    db_session.commit()
+    assert authenticated_client.get("/contracts/search", params={"q": "locacao"}).json()["items"] == []
+    assert authenticated_client.get("/contracts/search", params={"q": "cessao"}).json()["items"][0]["id"] == other.id
+
+    response = authenticated_client.get("/contracts/search", params={"q": '"*'})
+    assert response.status_code == 400
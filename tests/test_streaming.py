@@ -0,0 +1,103 @@
+import io
+import json
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.json_stream import ObjectFieldParser
+from app.llm_backends import FakeBackend, set_backend
+from app.models import Contract
+
+
+@pytest.fixture
+def fake_backend():
+    backend = FakeBackend(latency_ms=0, jitter_ms=0, error_rate=0, seed=1, through_gateway=False)
+    set_backend(backend)
+    yield backend
+    set_backend(None)
+
+
+def parse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def fake_extraction(file, on_page=None):
+    for page in (1, 2, 3):
+        on_page(page, 3)
+    return "Texto do contrato de locação, com cláusulas."
+
+
+def test_object_field_parser_emits_completed_fields():
+    """
+    Tests that fields are emitted as soon as their value is complete, even when
+    the JSON is split mid-token, nested, escaped or wrapped in a list.
+    """
+    document = json.dumps([{
+        "contratante": ["Empresa \"A\", LTDA", "B {SA}"],
+        "valor_bens": "R$ 1.000,00",
+        "obrigacoes_contratante": [],
+    }], ensure_ascii=False)
+
+    parser = ObjectFieldParser()
+    emitted = []
+    for char in document:
+        emitted += parser.feed(char)
+
+    assert emitted == [
+        ("contratante", ["Empresa \"A\", LTDA", "B {SA}"]),
+        ("valor_bens", "R$ 1.000,00"),
+        ("obrigacoes_contratante", []),
+    ]
+
+    parser = ObjectFieldParser()
+    assert parser.feed('{"vigencia": "12 meses", "obje') == [("vigencia", "12 meses")]
+
+
+def test_upload_stream_sends_progress_fields_and_result(
+    fake_backend: FakeBackend, authenticated_client: TestClient, db_session: Session, monkeypatch
+):
+    """
+    Tests the SSE upload: page progress first, then every field of the
+    analysis as it is produced, and finally the stored contract.
+    """
+    monkeypatch.setattr("app.contracts.extract_text_from_file", fake_extraction)
+
+    file = ("stream.pdf", io.BytesIO(b"fake pdf content"), "application/pdf")
+    response = authenticated_client.post("/contracts/upload/stream", files={"file": file})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+
+    progress = [data for event, data in events if event == "progress"]
+    assert [p["stage"] for p in progress] == ["upload", "extract", "extract", "extract", "llm"]
+    assert progress[-2] == {"stage": "extract", "page": 3, "pages": 3}
+
+    fields = {data["field"]: data["value"] for event, data in events if event == "field"}
+    assert len(fields) == 8
+
+    event, contract = events[-1]
+    assert event == "done"
+    assert contract["filename"] == "stream.pdf"
+    assert contract["contratante"] == fields["contratante"]
+    assert db_session.get(Contract, contract["id"]).vigencia == fields["vigencia"]
+
+
+def test_upload_stream_reports_errors(
+    fake_backend: FakeBackend, authenticated_client: TestClient, monkeypatch
+):
+    """
+    Tests that a model failure ends the stream with an error event.
+    """
+    fake_backend.error_rate = 1.0
+    monkeypatch.setattr("app.contracts.extract_text_from_file", fake_extraction)
+
+    file = ("stream.pdf", io.BytesIO(b"other fake pdf"), "application/pdf")
+    response = authenticated_client.post("/contracts/upload/stream", files={"file": file})
+
+    event, data = parse_events(response.text)[-1]
+    assert event == "error"
+    assert data["status"] == 503
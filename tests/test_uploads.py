@@ -0,0 +1,47 @@
+import io
+import os
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.uploads import spool_stream
+
+
+def test_spool_stream_hashes_and_keeps_file_on_disk():
+    """
+    Tests that a spooled upload is written to a temporary file, hashed
+    while copying, and removed once closed.
+    """
+    with spool_stream("contract.pdf", io.BytesIO(b"x" * 3000)) as spooled:
+        assert spooled.size == 3000
+        assert os.path.getsize(spooled.path) == 3000
+        assert len(spooled.sha256) == 64
+        path = spooled.path
+
+    assert not os.path.exists(path)
+
+
+@patch("app.uploads.SPOOL_CHUNK_SIZE", 1024)
+def test_spool_stream_stops_at_max_size():
+    """
+    Tests that copying stops with 413 as soon as the limit is crossed,
+    leaving no temporary file behind.
+    """
+    stream = io.BytesIO(b"x" * 10_000)
+    with pytest.raises(HTTPException) as exc:
+        spool_stream("big.pdf", stream, max_size=2048)
+
+    assert exc.value.status_code == 413
+    # Only the chunks up to the limit were read from the upload
+    assert stream.tell() == 3072
+
+
+@patch("app.uploads.MAX_UPLOAD_SIZE", 16)
+def test_upload_too_large(authenticated_client: TestClient):
+    """
+    Tests that /contracts/upload rejects files above MAX_UPLOAD_SIZE with 413.
+    """
+    file = ("contract.pdf", io.BytesIO(b"x" * 64), "application/pdf")
+    response = authenticated_client.post("/contracts/upload", files={"file": file})
+
+    assert response.status_code == 413
@@ -0,0 +1,81 @@
+import threading
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.models import Contract
+from app.writer import ContractWriter
+
+
+def contract_values(filename: str) -> dict:
+    return {"filename": filename, "valor_bens": "R$ 1,00", "vigencia": "12 meses"}
+
+
+def test_sqlite_pragmas_applied(db_session: Session):
+    """
+    Tests that connections are opened in WAL mode with a busy timeout.
+    """
+    assert db_session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    assert db_session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_writer_groups_concurrent_writes(db_session: Session):
+    """
+    Tests that writes queued while a commit is in progress are committed
+    together, and that every caller gets its own persisted contract back.
+    """
+    writer = ContractWriter(batch_size=50, linger_ms=50)
+    commits = []
+    listener = lambda session: commits.append(1)
+    event.listen(Session, "after_commit", listener)
+    try:
+        results = []
+        threads = [
+            threading.Thread(target=lambda i=i: results.append(writer.write(**contract_values(f"{i}.pdf"))))
+            for i in range(20)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        event.remove(Session, "after_commit", listener)
+        writer.close()
+
+    assert len({contract.id for contract in results}) == 20
+    assert db_session.query(Contract).count() == 20
+    assert len(commits) < 20
+
+
+def test_writer_isolates_failing_rows(db_session: Session):
+    """
+    Tests that a row that cannot be inserted fails only its own caller,
+    while the other writes of the same batch are still committed.
+    """
+    existing = Contract(**contract_values("existing.pdf"))
+    db_session.add(existing)
+    db_session.commit()
+
+    writer = ContractWriter(batch_size=10, linger_ms=100)
+    outcomes = {}
+
+    def write(name, **extra):
+        try:
+            outcomes[name] = writer.write(**contract_values(name), **extra).id
+        except Exception as e:
+            outcomes[name] = e
+
+    threads = [
+        threading.Thread(target=write, args=("a.pdf",)),
+        threading.Thread(target=write, args=("duplicate.pdf",), kwargs={"id": existing.id}),
+        threading.Thread(target=write, args=("b.pdf",)),
+    ]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        writer.close()
+
+    assert isinstance(outcomes["duplicate.pdf"], Exception)
+    assert isinstance(outcomes["a.pdf"], int) and isinstance(outcomes["b.pdf"], int)
+    assert db_session.query(Contract).count() == 3